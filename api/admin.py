@@ -8,6 +8,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from api.deps import get_db, get_current_client
 from engine_core.indicator_engine import compute_indicators_all
+from engine_core.market_snapshot import get_market_snapshot
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -76,15 +77,12 @@ def get_swing_trades(conn=Depends(get_db), admin=Depends(verify_admin)):
             SELECT 
                 st.*,
                 c.name as client_name,
-                dp.close as current_price,
-                ROUND(((COALESCE(st.exit_price, dp.close) - st.entry_price) / st.entry_price) * 100, 2) as perf_pct,
-                ROUND((COALESCE(st.exit_price, dp.close) - st.entry_price) * st.quantity, 2) as pnl_abs
+                ls.close as current_price,
+                ROUND(((COALESCE(st.exit_price, ls.close) - st.entry_price) / st.entry_price) * 100, 2) as perf_pct,
+                ROUND((COALESCE(st.exit_price, ls.close) - st.entry_price) * st.quantity, 2) as pnl_abs
             FROM public.swing_trades st
             JOIN public.clients c ON c.id = st.client_id
-            LEFT JOIN (
-                SELECT DISTINCT ON (symbol) symbol, close 
-                FROM daily_prices ORDER BY symbol, date DESC
-            ) dp ON dp.symbol = st.symbol
+            LEFT JOIN latest_stock_state ls ON ls.symbol = st.symbol
             ORDER BY st.entry_date DESC, st.symbol ASC
         """)
         return cur.fetchall()
@@ -130,6 +128,27 @@ def get_hall_of_fame(conn=Depends(get_db), admin=Depends(verify_admin)):
     finally:
         cur.close()
 
+@router.get("/hall-of-fame/history")
+def get_hall_of_fame_history(symbol: Optional[str] = None, days: int = 90, shadow: bool = False,
+                             conn=Depends(get_db), admin=Depends(verify_admin)):
+    """Daily Hall of Fame (or shadow portfolio) snapshots: price, score and perf since first appearance."""
+    table = "strategy_shadow_daily" if shadow else "top_score_tracking_daily"
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        cur.execute(f"""
+            SELECT *
+            FROM public.{table}
+            WHERE snapshot_date >= (SELECT MAX(snapshot_date) FROM public.{table}) - %(days)s
+              AND (%(symbol)s IS NULL OR symbol = %(symbol)s)
+            ORDER BY snapshot_date DESC, symbol ASC
+        """, {"days": days, "symbol": symbol.upper() if symbol else None})
+        return cur.fetchall()
+    except Exception as e:
+        logger.error(f"HALL OF FAME HISTORY ERROR: {e}")
+        return JSONResponse(status_code=500, content={"detail": str(e)})
+    finally:
+        cur.close()
+
 @router.get("/daily-leaderboard")
 def get_daily_leaderboard(conn=Depends(get_db), admin=Depends(verify_admin)):
     """Fetch the top scoring stocks for the most recent date with component breakdown."""
@@ -207,31 +226,31 @@ def get_global_universe(conn=Depends(get_db), admin=Depends(verify_admin)):
                 FROM watch_counts w
                 FULL OUTER JOIN hold_counts h ON h.symbol = w.symbol
             )
-            SELECT 
-                i.*,
-                ss.total_score as score,
-                ss.condition_ema_50_200, ss.condition_ema_200_slope,
-                ss.condition_6m_high, ss.condition_volume, ss.condition_rs,
-                dp.close as current_price,
-                dp.rs_90d,
-                (COALESCE(ss.condition_6m_high, FALSE) AND COALESCE(ss.condition_volume, FALSE)) as is_breakout
+            SELECT i.*
             FROM interest i
-            LEFT JOIN (
-                SELECT DISTINCT ON (symbol) 
-                    symbol, total_score, date,
-                    condition_ema_50_200, condition_ema_200_slope,
-                    condition_6m_high, condition_volume, condition_rs
-                FROM stock_scores 
-                ORDER BY symbol, date DESC
-            ) ss ON ss.symbol = i.symbol
-            LEFT JOIN (
-                SELECT DISTINCT ON (symbol) symbol, close, rs_90d, date
-                FROM daily_prices
-                ORDER BY symbol, date DESC
-            ) dp ON dp.symbol = i.symbol
             ORDER BY i.total_interest DESC, i.symbol ASC
         """)
-        return cur.fetchall()
+        interest_rows = cur.fetchall()
+
+        # Latest scores/prices come from the shared snapshot instead of DISTINCT ON scans
+        snapshot = get_market_snapshot(conn)
+        universe = []
+        for row in interest_rows:
+            ss = snapshot.score(row["symbol"]) or {}
+            dp = snapshot.price(row["symbol"]) or {}
+            universe.append({
+                **row,
+                "score": ss.get("total_score"),
+                "condition_ema_50_200": ss.get("condition_ema_50_200"),
+                "condition_ema_200_slope": ss.get("condition_ema_200_slope"),
+                "condition_6m_high": ss.get("condition_6m_high"),
+                "condition_volume": ss.get("condition_volume"),
+                "condition_rs": ss.get("condition_rs"),
+                "current_price": dp.get("close"),
+                "rs_90d": dp.get("rs_90d"),
+                "is_breakout": bool(ss.get("condition_6m_high") and ss.get("condition_volume")),
+            })
+        return universe
     except Exception as e:
         logger.error(f"GLOBAL UNIVERSE ERROR: {e}")
         return JSONResponse(status_code=500, content={"detail": str(e)})
@@ -392,12 +411,9 @@ def get_client_portfolio(client_id: str, conn=Depends(get_db), admin=Depends(ver
     try:
         # Get latest score for each symbol in holdings
         cur.execute("""
-            SELECT eh.symbol, eh.quantity, eh.avg_cost, ss.total_score, ss.date as last_score_date
+            SELECT eh.symbol, eh.quantity, eh.avg_cost, ls.total_score, ls.score_date as last_score_date
             FROM client_external_holdings eh
-            LEFT JOIN (
-                SELECT symbol, total_score, date FROM stock_scores s1
-                WHERE date = (SELECT MAX(date) FROM stock_scores WHERE symbol = s1.symbol)
-            ) ss ON ss.symbol = eh.symbol
+            LEFT JOIN latest_stock_state ls ON ls.symbol = eh.symbol
             WHERE eh.client_id = %s
         """, (client_id,))
         holdings = cur.fetchall()
@@ -0,0 +1,112 @@
+"""
+asyncio data-access layer for the hot read endpoints.
+
+The sync routers block a threadpool worker for every psycopg2 round trip.
+Endpoints built on this module instead await an ``asyncpg`` pool, so a single
+uvicorn worker can keep many requests in flight while they wait on Postgres.
+
+SQL is written with psycopg2-style ``%s`` placeholders and shared with the sync
+handlers; ``fetch``/``fetchrow`` translate them to asyncpg's ``$n`` form.
+
+Set ``MRI_API_ASYNC_READS=0`` (or leave asyncpg uninstalled) to serve the same
+routes from the sync handlers, e.g. to compare the two with
+``scripts/load_test_api.py``.
+"""
+import asyncio
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - optional until the API image installs it
+    asyncpg = None
+
+logger = logging.getLogger("mri_api")
+
+ASYNC_READS = asyncpg is not None and os.getenv("MRI_API_ASYNC_READS", "1").lower() not in ("0", "false", "off", "no")
+
+_pool = None
+_pool_lock = None
+_placeholder = re.compile(r"%s")
+
+
+def _numbered(sql):
+    """Rewrite ``%s`` placeholders as ``$1, $2, ...`` for asyncpg."""
+    counter = iter(range(1, sql.count("%s") + 1))
+    return _placeholder.sub(lambda _: f"${next(counter)}", sql)
+
+
+def _connect_kwargs():
+    """Connection settings matching api.deps._connect."""
+    ssl_mode = os.getenv("DB_SSL", "false").lower() == "true"
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        return {"dsn": database_url, "ssl": "require" if ssl_mode else "prefer"}
+    kwargs = dict(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5433")),
+        database=os.getenv("DB_NAME", "mri_db"),
+        user=os.getenv("DB_USER", "mri_admin"),
+        password=os.getenv("DB_PASSWORD", ""),
+    )
+    if ssl_mode:
+        kwargs["ssl"] = "require"
+    return kwargs
+
+
+async def get_async_pool():
+    """Return the process-wide asyncpg pool, creating it on first use."""
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+    if asyncpg is None:
+        raise RuntimeError("asyncpg is not installed; async read endpoints are unavailable")
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(
+                min_size=int(os.getenv("MRI_DB_POOL_MIN", "1")),
+                max_size=int(os.getenv("MRI_DB_POOL_MAX", "10")),
+                max_inactive_connection_lifetime=float(os.getenv("MRI_DB_POOL_MAX_IDLE", "300")),
+                # Set to 0 when going through a transaction-mode PgBouncer.
+                statement_cache_size=int(os.getenv("MRI_ASYNC_DB_STATEMENT_CACHE", "100")),
+                **_connect_kwargs(),
+            )
+            logger.info("Async DB pool ready")
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def client_connection(client_id=None):
+    """
+    Acquire a pooled connection inside a read transaction.
+
+    With ``client_id`` the transaction sets ``app.current_client_id`` for the
+    RLS policies, like ``get_current_client`` does on the sync path.
+    """
+    pool = await get_async_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            if client_id is not None:
+                await conn.execute("SELECT set_config('app.current_client_id', $1::text, true)", str(client_id))
+            yield conn
+
+
+async def fetch(conn, sql, *args):
+    """Run ``sql`` (``%s`` placeholders) and return the rows as dicts."""
+    return [dict(r) for r in await conn.fetch(_numbered(sql), *args)]
+
+
+async def fetchrow(conn, sql, *args):
+    row = await conn.fetchrow(_numbered(sql), *args)
+    return dict(row) if row is not None else None
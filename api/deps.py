@@ -8,6 +8,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+from engine_core.db_pool import pooled_connection
 
 # ── Config ──────────────────────────────────────────────────
 SECRET_KEY = os.getenv("JWT_SECRET", "mri-dev-secret-change-in-prod")
@@ -17,8 +18,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 security = HTTPBearer()
 
 # ── Database ────────────────────────────────────────────────
-def get_db():
-    """Yield a psycopg2 connection with RealDictCursor."""
+def _connect():
+    """Open a new psycopg2 connection with RealDictCursor."""
     database_url = os.getenv("DATABASE_URL")
     ssl_mode = os.getenv("DB_SSL", "false").lower() == "true"
 
@@ -42,6 +43,12 @@ def get_db():
         if ssl_mode:
             connect_kwargs["sslmode"] = "require"
         conn = psycopg2.connect(**connect_kwargs)
+    return conn
+
+
+def get_db():
+    """Yield a pooled psycopg2 connection with RealDictCursor; returned to the pool afterwards."""
+    conn = pooled_connection("api", _connect)
     try:
         yield conn
     finally:
@@ -55,11 +62,10 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_client(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    conn=Depends(get_db),
-):
-    """Parse JWT and return client dict from DB. Raises 401 on failure."""
+CLIENT_BY_ID_SQL = "SELECT id, email, name, is_active, initial_capital, created_at FROM clients WHERE id = %s"
+
+
+def _client_id_from_token(credentials: HTTPAuthorizationCredentials) -> str:
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         client_id: str = payload.get("sub")
@@ -67,9 +73,18 @@ def get_current_client(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired or invalid")
+    return client_id
+
+
+def get_current_client(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    conn=Depends(get_db),
+):
+    """Parse JWT and return client dict from DB. Raises 401 on failure."""
+    client_id = _client_id_from_token(credentials)
 
     cur = conn.cursor()
-    cur.execute("SELECT id, email, name, is_active, initial_capital, created_at FROM clients WHERE id = %s", (str(client_id),))
+    cur.execute(CLIENT_BY_ID_SQL, (str(client_id),))
     client = cur.fetchone()
     if not client or not client["is_active"]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Client not found or inactive")
@@ -78,3 +93,17 @@ def get_current_client(
     cur.execute("SELECT set_config('app.current_client_id', %s::text, true);", (str(client_id),))
 
     return client
+
+
+async def get_current_client_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """Async twin of get_current_client for endpoints served from api.async_db."""
+    from api.async_db import client_connection, fetchrow
+
+    client_id = _client_id_from_token(credentials)
+    async with client_connection() as conn:
+        client = await fetchrow(conn, CLIENT_BY_ID_SQL, str(client_id))
+    if not client or not client["is_active"]:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Client not found or inactive")
+    return client
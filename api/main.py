@@ -23,6 +23,8 @@ from api.watchlist import router as watchlist_router
 from api.admin import router as admin_router
 from api.schema import ensure_required_tables
 from engine_core.db import get_connection
+from api.async_db import close_async_pool
+from engine_core.db_pool import close_pools, pool_stats
 
 load_dotenv()
 
@@ -42,6 +44,12 @@ def on_startup():
         if conn:
             conn.close()
 
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    close_pools()
+    await close_async_pool()
+
 # Custom Exception Handler to log validation errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -76,7 +84,7 @@ app.include_router(admin_router)
 # Explicit Health Check (Must be before catch-all)
 @app.api_route("/api/health", methods=["GET", "POST"])
 async def health():
-    return {"status": "healthy"}
+    return {"status": "healthy", "db_pools": pool_stats()}
 
 # Serve Frontend Static Files
 static_path = os.path.join(os.path.dirname(__file__), "static")
@@ -1,80 +1,62 @@
 from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from psycopg2.extras import RealDictCursor
-from api.deps import get_db, get_current_client
+from api.async_db import ASYNC_READS, client_connection, fetch
+from api.deps import get_db, get_current_client, get_current_client_async
 from api.schema import ensure_required_tables
+from engine_core.db import get_connection
+from engine_core.market_snapshot import get_market_snapshot
 from engine_core.portfolio_review_engine import analyze_portfolio
 
 router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
 
 
-@router.get("/positions")
-def get_open_positions(
-    client=Depends(get_current_client),
-    conn=Depends(get_db),
-):
-    """Client's currently open positions (Core + External)."""
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    client_id = str(client["id"])
-
-    # 1. Fetch Core Positions (from MRI signals)
-    cur.execute(
-        """
-        SELECT cp.symbol, cp.entry_date, cp.entry_price, cp.quantity, cp.highest_price,
-               dp.close AS current_price,
-               ROUND(((dp.close - cp.entry_price) / cp.entry_price) * 100, 2) AS pnl_pct,
-               ss.total_score,
-               ss.condition_ema_50_200, ss.condition_ema_200_slope,
-               ss.condition_6m_high, ss.condition_volume, ss.condition_rs
-        FROM client_portfolio cp
-        LEFT JOIN LATERAL (
-            SELECT close FROM daily_prices
-            WHERE symbol = cp.symbol
-            ORDER BY date DESC LIMIT 1
-        ) dp ON true
-        LEFT JOIN LATERAL (
-            SELECT total_score, condition_ema_50_200, condition_ema_200_slope,
-                   condition_6m_high, condition_volume, condition_rs
-            FROM stock_scores
-            WHERE symbol = cp.symbol
-            ORDER BY date DESC LIMIT 1
-        ) ss ON true
-        WHERE cp.client_id = %s AND cp.is_open = true
-        ORDER BY cp.entry_date DESC
-        """,
-        (client_id,),
-    )
-    core_rows = cur.fetchall()
-
-    # 2. Fetch STEE Swing Trades
-    cur.execute(
-        """
-        SELECT st.symbol, st.entry_date, st.entry_price, st.quantity,
-               dp.close AS current_price,
-               ROUND(((dp.close - st.entry_price) / st.entry_price) * 100, 2) AS pnl_pct,
-               ss.total_score,
-               ss.condition_ema_50_200, ss.condition_ema_200_slope,
-               ss.condition_6m_high, ss.condition_volume, ss.condition_rs
-        FROM swing_trades st
-        LEFT JOIN LATERAL (
-            SELECT close FROM daily_prices
-            WHERE symbol = st.symbol
-            ORDER BY date DESC LIMIT 1
-        ) dp ON true
-        LEFT JOIN LATERAL (
-            SELECT total_score, condition_ema_50_200, condition_ema_200_slope,
-                   condition_6m_high, condition_volume, condition_rs
-            FROM stock_scores
-            WHERE symbol = st.symbol
-            ORDER BY date DESC LIMIT 1
-        ) ss ON true
-        WHERE st.client_id = %s AND st.status IN ('OPEN', 'PARTIAL_EXIT')
-        ORDER BY st.entry_date DESC
-        """,
-        (client_id,),
-    )
-    swing_rows = cur.fetchall()
-
+CORE_POSITIONS_SQL = """
+    SELECT cp.symbol, cp.entry_date, cp.entry_price, cp.quantity, cp.highest_price
+    FROM client_portfolio cp
+    WHERE cp.client_id = %s AND cp.is_open = true
+    ORDER BY cp.entry_date DESC
+    """
+
+SWING_POSITIONS_SQL = """
+    SELECT st.symbol, st.entry_date, st.entry_price, st.quantity
+    FROM swing_trades st
+    WHERE st.client_id = %s AND st.status IN ('OPEN', 'PARTIAL_EXIT')
+    ORDER BY st.entry_date DESC
+    """
+
+EXTERNAL_HOLDINGS_SQL = "SELECT symbol, quantity, avg_cost FROM client_external_holdings WHERE client_id = %s"
+
+
+def _with_latest_market_data(rows, snapshot):
+    """Attach the cached latest close, P&L % and score conditions to position rows."""
+    enriched = []
+    for row in rows:
+        ss = snapshot.score(row["symbol"]) or {}
+        current_price = (snapshot.price(row["symbol"]) or {}).get("close")
+        entry_price = row["entry_price"]
+        pnl_pct = None
+        if current_price is not None and entry_price:
+            pnl_pct = (
+                (Decimal(current_price) - Decimal(entry_price)) / Decimal(entry_price) * 100
+            ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        enriched.append({
+            **row,
+            "current_price": current_price,
+            "pnl_pct": pnl_pct,
+            "total_score": ss.get("total_score"),
+            "condition_ema_50_200": ss.get("condition_ema_50_200"),
+            "condition_ema_200_slope": ss.get("condition_ema_200_slope"),
+            "condition_6m_high": ss.get("condition_6m_high"),
+            "condition_volume": ss.get("condition_volume"),
+            "condition_rs": ss.get("condition_rs"),
+        })
+    return enriched
+
+
+def _core_and_swing_positions(core_rows, swing_rows):
     positions = []
 
     # Process Core
@@ -133,82 +115,147 @@ def get_open_positions(
             }
         )
 
-    # Process External via Review Engine for valuation
-    if external_rows:
-        is_dict_ext = len(external_rows) > 0 and isinstance(external_rows[0], dict)
-        external_holdings = []
-        for r in external_rows:
-            if is_dict_ext:
-                external_holdings.append(dict(r))
-            else:
-                external_holdings.append({
-                    "symbol": r[0],
-                    "quantity": r[1],
-                    "avg_cost": r[2]
-                })
+    return positions
+
 
-        try:
-            analysis = analyze_portfolio(external_holdings, conn=conn)
-            for h in analysis.get("holdings", []):
-                positions.append(
-                    {
-                        "source": "External",
-                        "symbol": h["symbol"],
-                        "entry_date": "N/A",
-                        "entry_price": float(h["avg_cost"]) if h.get("avg_cost") else None,
-                        "quantity": h["quantity"],
-                        "current_price": float(h["current_price"]) if h.get("current_price") else None,
-                        "pnl_pct": float(h["pnl_pct"]) if h.get("pnl_pct") is not None else None,
-                    }
-                )
-        except Exception:
-            # If analysis tables are missing (fresh DB) or scoring isn't ready yet, still show holdings.
-            conn.rollback()
-            syms = [str(h.get("symbol", "")).upper().strip() for h in external_holdings if h.get("symbol")]
-            prices_by_symbol = {}
-            if syms:
-                cur.execute(
-                    """
-                    SELECT DISTINCT ON (dp.symbol) dp.symbol, dp.close
-                    FROM daily_prices dp
-                    WHERE dp.symbol = ANY(%s)
-                    ORDER BY dp.symbol, dp.date DESC
-                    """,
-                    (syms,),
-                )
-                prices_rows = cur.fetchall()
-                is_dict_pr = not prices_rows or isinstance(prices_rows[0], dict)
-                prices_by_symbol = {
-                    (r["symbol"] if is_dict_pr else r[0]): (r["close"] if is_dict_pr else r[1]) 
-                    for r in prices_rows 
-                    if (r["symbol"] if is_dict_pr else r[0])
+def _external_positions(external_rows, conn):
+    """Value external holdings via the Review Engine (falls back to latest closes)."""
+    positions = []
+    if not external_rows:
+        return positions
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    is_dict_ext = len(external_rows) > 0 and isinstance(external_rows[0], dict)
+    external_holdings = []
+    for r in external_rows:
+        if is_dict_ext:
+            external_holdings.append(dict(r))
+        else:
+            external_holdings.append({
+                "symbol": r[0],
+                "quantity": r[1],
+                "avg_cost": r[2]
+            })
+
+    try:
+        analysis = analyze_portfolio(external_holdings, conn=conn)
+        for h in analysis.get("holdings", []):
+            positions.append(
+                {
+                    "source": "External",
+                    "symbol": h["symbol"],
+                    "entry_date": "N/A",
+                    "entry_price": float(h["avg_cost"]) if h.get("avg_cost") else None,
+                    "quantity": h["quantity"],
+                    "current_price": float(h["current_price"]) if h.get("current_price") else None,
+                    "pnl_pct": float(h["pnl_pct"]) if h.get("pnl_pct") is not None else None,
                 }
+            )
+    except Exception:
+        # If analysis tables are missing (fresh DB) or scoring isn't ready yet, still show holdings.
+        conn.rollback()
+        syms = [str(h.get("symbol", "")).upper().strip() for h in external_holdings if h.get("symbol")]
+        prices_by_symbol = {}
+        if syms:
+            cur.execute(
+                """
+                SELECT DISTINCT ON (dp.symbol) dp.symbol, dp.close
+                FROM daily_prices dp
+                WHERE dp.symbol = ANY(%s)
+                ORDER BY dp.symbol, dp.date DESC
+                """,
+                (syms,),
+            )
+            prices_rows = cur.fetchall()
+            is_dict_pr = not prices_rows or isinstance(prices_rows[0], dict)
+            prices_by_symbol = {
+                (r["symbol"] if is_dict_pr else r[0]): (r["close"] if is_dict_pr else r[1]) 
+                for r in prices_rows 
+                if (r["symbol"] if is_dict_pr else r[0])
+            }
+
+        for h in external_holdings:
+            sym = str(h.get("symbol", "")).upper().strip()
+            qty = float(h.get("quantity", 0) or 0)
+            avg_cost = float(h.get("avg_cost", 0) or 0)
+            current = prices_by_symbol.get(sym)
+            current_price = float(current) if current is not None else None
+            pnl_pct = None
+            if current_price is not None and avg_cost > 0:
+                pnl_pct = round(((current_price - avg_cost) / avg_cost) * 100, 2)
+
+            positions.append(
+                {
+                    "source": "External",
+                    "symbol": sym,
+                    "entry_date": "N/A",
+                    "entry_price": avg_cost if avg_cost > 0 else None,
+                    "quantity": qty,
+                    "current_price": current_price,
+                    "pnl_pct": pnl_pct,
+                }
+            )
+    return positions
+
+
+def _external_positions_own_conn(external_rows):
+    conn = get_connection()
+    try:
+        return _external_positions(external_rows, conn)
+    finally:
+        conn.close()
+
+
+def get_open_positions(
+    client=Depends(get_current_client),
+    conn=Depends(get_db),
+):
+    """Client's currently open positions (Core + External)."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    client_id = str(client["id"])
 
-            for h in external_holdings:
-                sym = str(h.get("symbol", "")).upper().strip()
-                qty = float(h.get("quantity", 0) or 0)
-                avg_cost = float(h.get("avg_cost", 0) or 0)
-                current = prices_by_symbol.get(sym)
-                current_price = float(current) if current is not None else None
-                pnl_pct = None
-                if current_price is not None and avg_cost > 0:
-                    pnl_pct = round(((current_price - avg_cost) / avg_cost) * 100, 2)
-
-                positions.append(
-                    {
-                        "source": "External",
-                        "symbol": sym,
-                        "entry_date": "N/A",
-                        "entry_price": avg_cost if avg_cost > 0 else None,
-                        "quantity": qty,
-                        "current_price": current_price,
-                        "pnl_pct": pnl_pct,
-                    }
-                )
+    # 1. Fetch Core Positions (from MRI signals)
+    cur.execute(CORE_POSITIONS_SQL, (client_id,))
+    core_rows = cur.fetchall()
 
+    # 2. Fetch STEE Swing Trades
+    cur.execute(SWING_POSITIONS_SQL, (client_id,))
+    swing_rows = cur.fetchall()
+
+    # 3. Fetch External Holdings
+    cur.execute(EXTERNAL_HOLDINGS_SQL, (client_id,))
+    external_rows = cur.fetchall()
+
+    snapshot = get_market_snapshot(conn)
+    positions = _core_and_swing_positions(
+        _with_latest_market_data(core_rows, snapshot),
+        _with_latest_market_data(swing_rows, snapshot),
+    )
+    positions.extend(_external_positions(external_rows, conn))
     return {"count": len(positions), "positions": positions}
 
 
+async def get_open_positions_async(client=Depends(get_current_client_async)):
+    """Client's currently open positions (Core + External), read via asyncpg."""
+    client_id = str(client["id"])
+    async with client_connection(client_id) as conn:
+        core_rows = await fetch(conn, CORE_POSITIONS_SQL, client_id)
+        swing_rows = await fetch(conn, SWING_POSITIONS_SQL, client_id)
+        external_rows = await fetch(conn, EXTERNAL_HOLDINGS_SQL, client_id)
+
+    snapshot = await run_in_threadpool(get_market_snapshot)
+    positions = _core_and_swing_positions(
+        _with_latest_market_data(core_rows, snapshot),
+        _with_latest_market_data(swing_rows, snapshot),
+    )
+    if external_rows:
+        # The Review Engine is psycopg2-based; keep it off the event loop.
+        positions.extend(await run_in_threadpool(_external_positions_own_conn, external_rows))
+    return {"count": len(positions), "positions": positions}
+
+
+router.get("/positions")(get_open_positions_async if ASYNC_READS else get_open_positions)
+
+
 @router.get("/equity")
 def get_equity_curve(
     client=Depends(get_current_client),
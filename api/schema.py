@@ -10,6 +10,10 @@ objects and never DROP/ALTER existing schema.
 
 from __future__ import annotations
 
+from engine_core.latest_state import ensure_latest_stock_state_table
+from engine_core.ranked_candidates import ensure_ranked_candidates_table
+from engine_core.score_tracking import ensure_tracking_snapshot_tables
+
 
 def ensure_prde_tables(cur) -> None:
     """Ensure PRDE fundamentals and report tables exist."""
@@ -446,5 +450,14 @@ def ensure_required_tables(conn) -> None:
     # 18. PRDE - PE Re-Rating Discovery Engine
     ensure_prde_tables(cur)
 
+    # 19. Per-symbol latest price/score state maintained by the scoring pipeline
+    ensure_latest_stock_state_table(cur)
+
+    # 20. Daily ranked BUY candidates shared by signal generation, API and emails
+    ensure_ranked_candidates_table(cur)
+
+    # 21. Daily snapshots of the Hall of Fame / shadow portfolio trackers
+    ensure_tracking_snapshot_tables(cur)
+
     conn.commit()
     cur.close()
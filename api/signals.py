@@ -4,7 +4,9 @@ Signal endpoints: today's signals, signal history, current regime.
 from fastapi import APIRouter, Depends, Query
 from datetime import date
 
-from api.deps import get_db, get_current_client
+from api.async_db import ASYNC_READS, client_connection, fetch
+from api.deps import get_db, get_current_client, get_current_client_async
+from engine_core.ranked_candidates import load_ranked_candidates
 
 router = APIRouter(prefix="/api/signals", tags=["signals"])
 
@@ -86,14 +88,7 @@ def get_current_regime(conn=Depends(get_db)):
     return res
 
 
-@router.get("/today")
-def get_todays_signals(
-    client=Depends(get_current_client),
-    conn=Depends(get_db),
-):
-    """Today's BUY/SELL signals for the logged-in client."""
-    cur = conn.cursor()
-    cur.execute("""
+TODAY_SIGNALS_SQL = """
         SELECT cs.id, cs.date, cs.symbol, cs.action, cs.recommended_price,
                cs.score, cs.regime, cs.reason,
                ca.action_taken, ca.actual_price, ca.quantity,
@@ -111,10 +106,10 @@ def get_todays_signals(
         WHERE cs.client_id = %s
           AND cs.date = (SELECT MAX(date) FROM client_signals WHERE client_id = %s)
         ORDER BY cs.action, cs.score DESC
-    """, (str(client["id"]), str(client["id"])))
-    signals = cur.fetchall()
-    cur.close()
+    """
+
 
+def _todays_signals_payload(signals):
     is_dict = not signals or isinstance(signals[0], dict)
     
     return {
@@ -144,6 +139,29 @@ def get_todays_signals(
     }
 
 
+def get_todays_signals(
+    client=Depends(get_current_client),
+    conn=Depends(get_db),
+):
+    """Today's BUY/SELL signals for the logged-in client."""
+    cur = conn.cursor()
+    cur.execute(TODAY_SIGNALS_SQL, (str(client["id"]), str(client["id"])))
+    signals = cur.fetchall()
+    cur.close()
+    return _todays_signals_payload(signals)
+
+
+async def get_todays_signals_async(client=Depends(get_current_client_async)):
+    """Today's BUY/SELL signals for the logged-in client (asyncpg)."""
+    client_id = str(client["id"])
+    async with client_connection(client_id) as conn:
+        signals = await fetch(conn, TODAY_SIGNALS_SQL, client_id, client_id)
+    return _todays_signals_payload(signals)
+
+
+router.get("/today")(get_todays_signals_async if ASYNC_READS else get_todays_signals)
+
+
 @router.get("/pending")
 def get_pending_signals(
     client=Depends(get_current_client),
@@ -253,14 +271,7 @@ def get_signal_history(
     ]
 
 
-@router.get("/screener")
-def get_screener(
-    conn=Depends(get_db),
-    min_score: int = Query(default=75, ge=0, le=100),
-):
-    """Latest stock scores, filterable by minimum score."""
-    cur = conn.cursor()
-    cur.execute("""
+SCREENER_SQL = """
         SELECT ss.symbol, ss.total_score, ss.date,
                ss.condition_ema_50_200, ss.condition_ema_200_slope,
                ss.condition_6m_high, ss.condition_volume, ss.condition_rs,
@@ -270,10 +281,10 @@ def get_screener(
         WHERE ss.date = (SELECT MAX(date) FROM stock_scores)
           AND ss.total_score >= %s
         ORDER BY ss.total_score DESC, ss.symbol
-    """, (min_score,))
-    stocks = cur.fetchall()
-    cur.close()
+    """
 
+
+def _screener_payload(stocks):
     is_dict = not stocks or isinstance(stocks[0], dict)
 
     return {
@@ -296,3 +307,57 @@ def get_screener(
             for s in stocks
         ],
     }
+
+
+def get_screener(
+    conn=Depends(get_db),
+    min_score: int = Query(default=75, ge=0, le=100),
+):
+    """Latest stock scores, filterable by minimum score."""
+    cur = conn.cursor()
+    cur.execute(SCREENER_SQL, (min_score,))
+    stocks = cur.fetchall()
+    cur.close()
+    return _screener_payload(stocks)
+
+
+async def get_screener_async(min_score: int = Query(default=75, ge=0, le=100)):
+    """Latest stock scores, filterable by minimum score (asyncpg)."""
+    async with client_connection() as conn:
+        stocks = await fetch(conn, SCREENER_SQL, min_score)
+    return _screener_payload(stocks)
+
+
+router.get("/screener")(get_screener_async if ASYNC_READS else get_screener)
+
+
+@router.get("/candidates")
+def get_ranked_candidates(
+    conn=Depends(get_db),
+    signal_date: date | None = Query(default=None, alias="date"),
+    eligible_only: bool = Query(default=False),
+):
+    """The day's ranked BUY candidates (with sector tags) as stored by the signal generator."""
+    cur = conn.cursor()
+    try:
+        rows = load_ranked_candidates(cur, signal_date, eligible_only)
+    finally:
+        cur.close()
+    return {
+        "date": str(rows[0]["signal_date"]) if rows else None,
+        "regime": rows[0]["regime"] if rows else None,
+        "count": len(rows),
+        "candidates": [
+            {
+                "rank": r["rank"],
+                "symbol": r["symbol"],
+                "score": r["total_score"],
+                "rs_90d": float(r["rs_90d"]) if r["rs_90d"] is not None else None,
+                "adtv": float(r["adtv"]) if r["adtv"] is not None else None,
+                "sector": r["sector"],
+                "close": float(r["close"]) if r["close"] is not None else None,
+                "eligible": r["eligible"],
+            }
+            for r in rows
+        ],
+    }
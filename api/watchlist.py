@@ -1,11 +1,14 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import psycopg2.extras
 
 import csv
 import io
-from api.deps import get_db, get_current_client
+from api.async_db import ASYNC_READS, client_connection, fetch
+from api.deps import get_db, get_current_client, get_current_client_async
+from engine_core.market_snapshot import get_market_snapshot
 from engine_core.on_demand_ingest import ingest_missing_symbols_sync
 
 router = APIRouter(prefix="/api/watchlist", tags=["watchlist"])
@@ -61,58 +64,42 @@ def search_universe(q: str, conn=Depends(get_db)):
     finally:
         cur.close()
 
-@router.get("", response_model=List[WatchlistItem])
-def get_watchlist(client=Depends(get_current_client), conn=Depends(get_db)):
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    
-    # Fetch symbols from watchlist
-    cur.execute("SELECT symbol FROM client_watchlist WHERE client_id = %s::uuid", (str(client["id"]),))
-    rows = cur.fetchall()
-    
-    if not rows:
-        cur.close()
-        return []
+WATCHLIST_SQL = """
+        SELECT symbol, (created_at < (NOW() - INTERVAL '5 minutes')) AS is_stale
+        FROM client_watchlist
+        WHERE client_id = %s::uuid
+    """
 
-    is_dict_sym = isinstance(rows[0], dict)
-    symbols = [row["symbol"] if is_dict_sym else row[0] for row in rows]
-    
-    # Fetch latest scores and prices (using LEFT JOIN so we don't lose new symbols)
-    cur.execute("""
-        SELECT 
-            cw.symbol,
-            ss.score,
-            ss.condition_ema_50_200,
-            ss.condition_ema_200_slope,
-            ss.condition_6m_high,
-            ss.condition_volume,
-            ss.condition_rs,
-            dp.close as current_price,
-            CASE 
-                WHEN dp.close > dp.ema_200 THEN 'BULL'
-                WHEN dp.close < dp.ema_200 THEN 'BEAR'
-                ELSE 'NEUTRAL'
-            END as trend_alignment,
-            (dp.close IS NULL AND cw.created_at < (NOW() - INTERVAL '5 minutes')) as is_not_found
-        FROM client_watchlist cw
-        LEFT JOIN (
-            SELECT DISTINCT ON (symbol) 
-                symbol, total_score as score, date,
-                condition_ema_50_200, condition_ema_200_slope,
-                condition_6m_high, condition_volume, condition_rs
-            FROM stock_scores 
-            ORDER BY symbol, date DESC
-        ) ss ON ss.symbol = cw.symbol
-        LEFT JOIN (
-            SELECT DISTINCT ON (symbol) symbol, close, ema_200, date
-            FROM daily_prices
-            ORDER BY symbol, date DESC
-        ) dp ON dp.symbol = cw.symbol
-        WHERE cw.client_id = %s::uuid
-    """, (str(client["id"]),))
-    
-    data = cur.fetchall()
-    cur.close()
-    
+
+def _watchlist_rows(watch_rows, snapshot):
+    """Join the client's watchlist rows with the cached latest scores and prices."""
+    data = []
+    for w in watch_rows:
+        ss = snapshot.score(w["symbol"]) or {}
+        dp = snapshot.price(w["symbol"]) or {}
+        close, ema_200 = dp.get("close"), dp.get("ema_200")
+        if close is not None and ema_200 is not None and close > ema_200:
+            trend = "BULL"
+        elif close is not None and ema_200 is not None and close < ema_200:
+            trend = "BEAR"
+        else:
+            trend = "NEUTRAL"
+        data.append({
+            "symbol": w["symbol"],
+            "score": ss.get("total_score"),
+            "condition_ema_50_200": ss.get("condition_ema_50_200"),
+            "condition_ema_200_slope": ss.get("condition_ema_200_slope"),
+            "condition_6m_high": ss.get("condition_6m_high"),
+            "condition_volume": ss.get("condition_volume"),
+            "condition_rs": ss.get("condition_rs"),
+            "current_price": close,
+            "trend_alignment": trend,
+            "is_not_found": bool(close is None and w["is_stale"]),
+        })
+    return data
+
+
+def _watchlist_items(data):
     results = []
     for row in data:
         # Determine if row is dict (RealDictCursor) or tuple
@@ -156,6 +143,35 @@ def get_watchlist(client=Depends(get_current_client), conn=Depends(get_db)):
         
     return results
 
+
+def get_watchlist(client=Depends(get_current_client), conn=Depends(get_db)):
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    
+    # Fetch symbols from watchlist
+    cur.execute(WATCHLIST_SQL, (str(client["id"]),))
+    watch_rows = cur.fetchall()
+    cur.close()
+    
+    if not watch_rows:
+        return []
+
+    # Latest scores and prices come from the shared snapshot (new symbols simply have no entry yet)
+    return _watchlist_items(_watchlist_rows(watch_rows, get_market_snapshot(conn)))
+
+
+async def get_watchlist_async(client=Depends(get_current_client_async)):
+    """Watchlist with latest scores and prices, read via asyncpg."""
+    async with client_connection(str(client["id"])) as conn:
+        watch_rows = await fetch(conn, WATCHLIST_SQL, str(client["id"]))
+    if not watch_rows:
+        return []
+    snapshot = await run_in_threadpool(get_market_snapshot)
+    return _watchlist_items(_watchlist_rows(watch_rows, snapshot))
+
+
+router.get("", response_model=List[WatchlistItem])(get_watchlist_async if ASYNC_READS else get_watchlist)
+
+
 @router.post("", status_code=status.HTTP_201_CREATED)
 def add_to_watchlist(req: WatchlistAddRequest, background_tasks: BackgroundTasks, client=Depends(get_current_client), conn=Depends(get_db)):
     symbol = req.symbol.upper().strip()
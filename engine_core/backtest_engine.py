@@ -0,0 +1,464 @@
+"""
+Unified MRI backtest engine.
+
+One event-driven day loop shared by every backtest entry point
+(portfolio_engine, portfolio_engine_nextday, the frozen-snapshot scripts and
+the parameter sweep). What used to differ between those copies is pluggable:
+
+* data sources -- ``DbDataSource`` (market_regime / stock_scores /
+  daily_prices) or ``FrameDataSource`` (already-scored snapshot frames) --
+  both produce the dense (date x symbol) arrays from ``build_market_arrays``;
+* execution models -- when a signal is filled and at which price:
+
+  ``SameDayClose``       exits and entries fill at the signal day's close.
+  ``NextDayOpen``        orders queue at the close and fill at the next
+                         trading day's open (close when there is no open).
+  ``SignalDayNextOpen``  the original portfolio_engine model: fills at the
+                         next day's open but are booked on the signal day.
+
+The rules (thresholds, stop, slot count and sizing) live in
+``BacktestRules``; defaults are the production MRI rules.
+"""
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from engine_core.db import fetch_df
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BacktestRules:
+    initial_capital: float = 100000.0
+    tx_cost: float = 0.004
+    entry_score: float = 4
+    exit_score: float = 2
+    trailing_stop: float = 0.20
+    max_positions: int = 10
+    position_weight: float = 0.10
+    stop_label: str = None  # defaults to TRAILING_STOP_<pct>
+
+    @property
+    def stop_reason(self):
+        return self.stop_label or f"TRAILING_STOP_{round(self.trailing_stop * 100)}"
+
+
+# ---------------------------------------------------------------------------
+# Market data
+# ---------------------------------------------------------------------------
+def build_market_arrays(dates, prices_df, scores_df, regime_dict=None):
+    """
+    Pivot long price/score frames into dense (date x symbol) arrays aligned to ``dates``.
+
+    Symbols get integer ids (column index). Each value array comes with a
+    ``*_present`` mask because a missing row and a NaN value behave differently
+    in the simulation (a missing score counts as 0, a missing close means hold).
+    ``score_rank`` keeps each score row's position within its date so equal
+    scores are ranked in row order (a stable sort), as before. ``regime`` holds
+    each date's classification (NEUTRAL when missing).
+    """
+    # Factorize once, then map only the unique dates/symbols to array positions.
+    date_index = pd.DatetimeIndex(pd.to_datetime(dates))
+    price_dates, price_date_keys = pd.factorize(prices_df['date'])
+    price_syms, price_sym_keys = pd.factorize(prices_df['symbol'])
+    score_dates, score_date_keys = pd.factorize(scores_df['date'])
+    score_syms, score_sym_keys = pd.factorize(scores_df['symbol'])
+    symbols = pd.Index(sorted(set(price_sym_keys) | set(score_sym_keys)))
+    shape = (len(date_index), len(symbols))
+
+    def _positions(date_codes, date_keys, sym_codes, sym_keys):
+        d = np.append(date_index.get_indexer(pd.to_datetime(date_keys)), -1)[date_codes]
+        s = np.append(symbols.get_indexer(sym_keys), -1)[sym_codes]
+        keep = (d >= 0) & (s >= 0)
+        return d[keep], s[keep], keep
+
+    def _dense(d, s, values, fill):
+        out = np.full(shape, fill, dtype=values.dtype)
+        present = np.zeros(shape, dtype=bool)
+        out[d, s] = values
+        present[d, s] = True
+        return out, present
+
+    d, s, keep = _positions(price_dates, price_date_keys, price_syms, price_sym_keys)
+    close, close_present = _dense(d, s, prices_df['close'].to_numpy(dtype=float)[keep], np.nan)
+    open_, open_present = _dense(d, s, prices_df['open'].to_numpy(dtype=float)[keep], np.nan)
+
+    d, s, keep = _positions(score_dates, score_date_keys, score_syms, score_sym_keys)
+    score, score_present = _dense(d, s, scores_df['total_score'].to_numpy(dtype=float)[keep], 0.0)
+    rank_values = pd.Series(score_dates).groupby(score_dates).cumcount().to_numpy()[keep]
+    score_rank, _ = _dense(d, s, rank_values.astype(np.int64), 0)
+
+    regime_dict = regime_dict or {}
+    return {
+        'dates': list(dates),
+        'date_values': date_index.to_numpy(),
+        'regime': np.array([regime_dict.get(d, 'NEUTRAL') for d in dates], dtype=object),
+        'symbols': symbols.to_numpy(),
+        'close': close, 'close_present': close_present,
+        'open': open_, 'open_present': open_present,
+        'score': score, 'score_present': score_present,
+        'score_rank': score_rank,
+        'has_prices': close_present.any(axis=1),
+    }
+
+
+class DbDataSource:
+    """Regime, scores and prices from the database (portfolio_engine inputs)."""
+
+    def __init__(self, start_date=None, end_date=None):
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def load(self):
+        logger.info("Loading market regime history...")
+        regime_df = fetch_df("SELECT date, classification FROM market_regime WHERE classification IS NOT NULL ORDER BY date")
+        regime_df["date"] = pd.to_datetime(regime_df["date"], errors="coerce").dt.date
+        if self.start_date:
+            regime_df = regime_df[regime_df['date'] >= pd.to_datetime(self.start_date).date()]
+        if self.end_date:
+            regime_df = regime_df[regime_df['date'] <= pd.to_datetime(self.end_date).date()]
+
+        logger.info("Loading stock scores...")
+        scores_df = fetch_df("SELECT date, symbol, total_score FROM stock_scores WHERE total_score IS NOT NULL")
+        scores_df["date"] = pd.to_datetime(scores_df["date"], errors="coerce")
+        scores_df["total_score"] = pd.to_numeric(scores_df["total_score"], errors="coerce")
+
+        # Close drives signals and valuation, open is the execution price
+        logger.info("Loading price data...")
+        prices_df = fetch_df("SELECT date, symbol, close, open FROM daily_prices")
+        prices_df["date"] = pd.to_datetime(prices_df["date"], errors="coerce")
+        prices_df["close"] = pd.to_numeric(prices_df["close"], errors="coerce")
+        prices_df["open"] = pd.to_numeric(prices_df["open"], errors="coerce")
+
+        dates = sorted(regime_df['date'].dropna())
+        return build_market_arrays(dates, prices_df, scores_df, dict(zip(regime_df['date'], regime_df['classification'])))
+
+
+class FrameDataSource:
+    """
+    Already-scored frames, e.g. from the frozen CSV snapshot scripts.
+
+    ``scored`` has date, symbol, open, close and total_score per row;
+    ``regime_df`` has date and classification and defines the trading calendar.
+    """
+
+    def __init__(self, scored, regime_df):
+        self.scored = scored
+        self.regime_df = regime_df
+
+    def load(self):
+        dates = sorted(self.regime_df["date"].tolist())
+        regime = dict(zip(self.regime_df["date"], self.regime_df["classification"]))
+        return build_market_arrays(
+            dates,
+            self.scored[["date", "symbol", "close", "open"]],
+            self.scored[["date", "symbol", "total_score"]],
+            regime,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Portfolio book
+# ---------------------------------------------------------------------------
+class _Book:
+    """Cash, open positions in fixed-size slot arrays (kept in entry order) and the trade log."""
+
+    def __init__(self, m, rules, execution_label):
+        n = rules.max_positions
+        self.m = m
+        self.rules = rules
+        self.label = execution_label
+        self.sym = np.zeros(n, dtype=np.int64)
+        self.shares = np.zeros(n, dtype=np.int64)
+        self.entry = np.zeros(n, dtype=float)
+        self.high = np.zeros(n, dtype=float)
+        self.entry_day = np.zeros(n, dtype=np.int64)
+        self.n = 0
+        self.cash = rules.initial_capital
+        self.held = np.zeros(len(m['symbols']), dtype=bool)
+        self.trades = []
+
+    def value(self, i):
+        """Cash plus positions at day ``i``'s close (entry price when a symbol has no row)."""
+        if not self.n:
+            return self.cash + 0.0
+        sym = self.sym[:self.n]
+        marks = np.where(self.m['close_present'][i, sym], self.m['close'][i, sym], self.entry[:self.n])
+        # cumsum adds strictly left to right in entry order, so equity is bit-for-bit
+        # the same running sum as a per-position loop (np.sum would sum pairwise).
+        return self.cash + np.cumsum(self.shares[:self.n] * marks)[-1]
+
+    def sell(self, slots, prices, day, reasons):
+        """Close the positions in ``slots`` (ascending) at ``prices``; compacts the slot arrays."""
+        if not len(slots):
+            return
+        tx_cost = self.rules.tx_cost
+        for k, price, reason in zip(slots, prices, reasons):
+            shares = int(self.shares[k])
+            gross_proceeds = shares * price
+            net_proceeds = gross_proceeds - gross_proceeds * tx_cost
+            self.cash += net_proceeds
+            trade = {
+                'symbol': self.m['symbols'][self.sym[k]],
+                'entry_date': self.m['dates'][self.entry_day[k]],
+                'exit_date': self.m['dates'][day],
+                'entry_price': self.entry[k],
+                'exit_price': price,
+                'shares': shares,
+                'pnl': net_proceeds - (shares * self.entry[k]),
+                'exit_reason': reason,
+            }
+            if self.label:
+                trade['execution'] = self.label
+            self.trades.append(trade)
+
+        keep = np.ones(self.n, dtype=bool)
+        keep[list(slots)] = False
+        self.held[self.sym[:self.n][~keep]] = False
+        n_keep = int(keep.sum())
+        for arr in (self.sym, self.shares, self.entry, self.high, self.entry_day):
+            arr[:n_keep] = arr[:self.n][keep]
+        self.n = n_keep
+
+    def buy(self, s, price, day, allocation):
+        """Buy ``s`` with up to ``allocation`` of cash (fees included); returns True when filled."""
+        if not (price > 0 and self.cash > 0):
+            return False
+        tx_cost = self.rules.tx_cost
+        invest_amount = min(allocation, self.cash)
+        shares = int((invest_amount / (1 + tx_cost)) // price)
+        cost = (shares * price) * (1 + tx_cost)
+        if shares > 0 and self.cash >= cost:
+            self.cash -= cost
+            k = self.n
+            self.sym[k] = s
+            self.shares[k] = shares
+            self.entry[k] = price
+            self.high[k] = price
+            self.entry_day[k] = day
+            self.held[s] = True
+            self.n += 1
+            return True
+        return False
+
+
+def _fill_price(m, i, sym):
+    """Day ``i``'s open for ``sym``, falling back to its close; NaN when neither is usable."""
+    open_px = m['open'][i, sym]
+    close_px = np.where(m['close_present'][i, sym], m['close'][i, sym], np.nan)
+    usable_open = m['open_present'][i, sym] & (open_px > 0)
+    return np.where(usable_open, open_px, close_px)
+
+
+# ---------------------------------------------------------------------------
+# Execution models
+# ---------------------------------------------------------------------------
+class SameDayClose:
+    """Signals at the close fill at that close."""
+    label = "SAME_DAY_CLOSE"
+
+    def reset(self, first_day, last_day):
+        pass
+
+    def open(self, book, i):
+        pass
+
+    def exit(self, book, i, slots, reasons):
+        book.sell(slots, book.m['close'][i, book.sym[slots]], i, reasons)
+
+    @property
+    def pending_exits(self):
+        return 0
+
+    def entry_mask(self, m, i):
+        return True
+
+    def enter(self, book, i, candidates):
+        m, rules = book.m, book.rules
+        for s in candidates:
+            if book.held[s] or book.n >= rules.max_positions:
+                continue
+            book.buy(s, m['close'][i, s], i, book.value(i) * rules.position_weight)
+
+
+class NextDayOpen:
+    """Orders raised at the close fill at the next trading day's open (close if no open)."""
+    label = "NEXT_DAY_OPEN"
+
+    def reset(self, first_day, last_day):
+        self._exits = []     # (symbol id, reason)
+        self._entries = []   # symbol ids
+        self._signalled = 0
+
+    def open(self, book, i):
+        m, rules = book.m, book.rules
+        if self._exits:
+            slot_of = {int(s): k for k, s in enumerate(book.sym[:book.n])}
+            slots, prices, reasons = [], [], []
+            for s, reason in self._exits:
+                k = slot_of.get(s)
+                if k is None:
+                    continue
+                price = _fill_price(m, i, s)
+                if np.isnan(price):
+                    continue  # no quote today: keep holding, re-evaluated at the close
+                slots.append(k)
+                prices.append(float(price))
+                reasons.append(reason)
+            order = np.argsort(slots, kind="stable")
+            book.sell([slots[j] for j in order], [prices[j] for j in order], i, [reasons[j] for j in order])
+
+        for s in self._entries:
+            if book.held[s] or book.n >= rules.max_positions:
+                continue
+            price = _fill_price(m, i, s)
+            if np.isnan(price):
+                continue
+            book.buy(s, float(price), i, book.value(i) * rules.position_weight)
+        self._exits, self._entries = [], []
+
+    def exit(self, book, i, slots, reasons):
+        self._exits = [(int(book.sym[k]), r) for k, r in zip(slots, reasons)]
+
+    @property
+    def pending_exits(self):
+        return len(self._exits)
+
+    def entry_mask(self, m, i):
+        return True
+
+    def enter(self, book, i, candidates):
+        self._entries = [int(s) for s in candidates]
+
+
+class SignalDayNextOpen:
+    """
+    Fills at the next day's open but books the trade on the signal day (the
+    original portfolio_engine model). Entries need a next-day open; exits fall
+    back to the signal day's close.
+    """
+    label = None  # trade logs keep the original columns
+
+    def reset(self, first_day, last_day):
+        self.last_day = last_day
+
+    def _next(self, i):
+        return i + 1 if i < self.last_day else None
+
+    def open(self, book, i):
+        pass
+
+    def exit(self, book, i, slots, reasons):
+        m = book.m
+        sym = book.sym[slots]
+        px = m['close'][i, sym]
+        j = self._next(i)
+        if j is None:
+            prices = px
+        else:
+            prices = np.where(m['open_present'][j, sym], m['open'][j, sym], px)
+            prices = np.where(np.isnan(prices), px, prices)
+        book.sell(slots, prices, i, reasons)
+
+    @property
+    def pending_exits(self):
+        return 0
+
+    def entry_mask(self, m, i):
+        j = self._next(i)
+        return m['open_present'][j] if j is not None else False
+
+    def enter(self, book, i, candidates):
+        m, rules = book.m, book.rules
+        j = self._next(i)
+        allocation = book.value(i) * rules.position_weight
+        for s in candidates:
+            book.buy(s, m['open'][j, s], i, allocation)
+
+
+EXECUTION_MODELS = {
+    "same_day_close": SameDayClose,
+    "next_day_open": NextDayOpen,
+    "signal_day_next_open": SignalDayNextOpen,
+}
+
+
+# ---------------------------------------------------------------------------
+# Day loop
+# ---------------------------------------------------------------------------
+def _window(m, start_date, end_date):
+    dates = m['date_values']
+    first = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left')) if start_date else 0
+    last = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right')) - 1 if end_date else len(dates) - 1
+    return first, last
+
+
+def run_backtest(m, execution="signal_day_next_open", rules=None, start_date=None, end_date=None):
+    """
+    Run the MRI rules over market arrays ``m`` with an execution model.
+
+    Each trading day: fill orders queued for the open, update trailing-stop
+    highs and raise exits (BEAR regime, score <= exit_score, trailing stop),
+    pick entries in BULL regime (score >= entry_score, best score first, equal
+    ``position_weight`` slots), then record equity at the close. Days without
+    any price rows are skipped. ``start_date``/``end_date`` select a window of
+    the loaded dates. Returns ``(trade_log, equity_curve)`` as lists of dicts.
+    """
+    rules = rules or BacktestRules()
+    model = EXECUTION_MODELS[execution]() if isinstance(execution, str) else execution
+    first_day, last_day = _window(m, start_date, end_date)
+    model.reset(first_day, last_day)
+    book = _Book(m, rules, model.label)
+
+    close, close_present = m['close'], m['close_present']
+    score, score_present, score_rank = m['score'], m['score_present'], m['score_rank']
+    stop_level = 1 - rules.trailing_stop
+    stop_reason = rules.stop_reason
+    equity_curve = []
+
+    for i in range(first_day, last_day + 1):
+        if not m['has_prices'][i]:
+            # Market holiday or no data; queued orders wait for the next trading day
+            continue
+        regime = m['regime'][i]
+        model.open(book, i)
+
+        # 1. EXITS (positions without a close today are held)
+        if book.n:
+            n = book.n
+            sym = book.sym[:n]
+            priced = close_present[i, sym]
+            px = close[i, sym]
+            book.high[:n] = np.where(priced & (px > book.high[:n]), px, book.high[:n])
+            reasons = np.select(
+                [np.full(n, regime == 'BEAR'), score[i, sym] <= rules.exit_score, px <= book.high[:n] * stop_level],
+                ['REGIME_BEAR', 'SCORE_LOW', stop_reason],
+                default='',
+            )
+            exiting = np.flatnonzero(priced & (reasons != ''))
+            if len(exiting):
+                model.exit(book, i, exiting, [str(r) for r in reasons[exiting]])
+
+        # 2. ENTRIES
+        slots = rules.max_positions - (book.n - model.pending_exits)
+        if regime == 'BULL' and slots > 0:
+            eligible = np.flatnonzero(
+                score_present[i] & (score[i] >= rules.entry_score) & ~book.held
+                & close_present[i] & model.entry_mask(m, i)
+            )
+            if len(eligible):
+                order = np.lexsort((score_rank[i, eligible], -score[i, eligible]))
+                model.enter(book, i, eligible[order[:slots]])
+
+        # 3. EOD EQUITY at today's close
+        equity_curve.append({
+            'date': m['dates'][i],
+            'equity': book.value(i),
+            'cash': book.cash,
+            'open_positions': book.n,
+        })
+
+    return book.trades, equity_curve
@@ -0,0 +1,313 @@
+"""
+In-process parameter sweeps over the portfolio simulator.
+
+Market data (regime, scores, prices and the NIFTY50 benchmark) is loaded from
+the DB once and pivoted into the dense arrays used by
+``backtest_engine.run_backtest``. Those arrays are published through
+``multiprocessing.shared_memory`` and every worker in the process pool maps
+them read-only, so scenarios -- date windows, transaction costs, entry/exit
+score thresholds, trailing stops -- run concurrently without reloading data or
+round-tripping through ``outputs/*.csv``.
+
+All scenario results land in one consolidated table (``backtest_sweep_results``
+and ``outputs/<prefix>sweep_results.csv``), one row per scenario.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import uuid
+from dataclasses import fields
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_batch
+
+from engine_core.backtest_engine import BacktestRules, build_market_arrays, run_backtest
+from engine_core.db import fetch_df, get_connection
+from engine_core.metrics_engine import calculate_metrics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rules a scenario may override; defaults come from BacktestRules
+SWEEP_AXES = ("tx_cost", "entry_score", "exit_score", "trailing_stop")
+DEFAULT_RULES = {f.name: f.default for f in fields(BacktestRules) if f.name in SWEEP_AXES}
+
+SWEEP_RESULTS_SQL = """
+    CREATE TABLE IF NOT EXISTS backtest_sweep_results (
+        run_id             UUID NOT NULL,
+        scenario           VARCHAR(120) NOT NULL,
+        start_date         DATE,
+        end_date           DATE,
+        tx_cost            NUMERIC(8,5),
+        entry_score        INT,
+        exit_score         INT,
+        trailing_stop      NUMERIC(6,4),
+        trades             INT,
+        final_equity       NUMERIC(18,2),
+        metrics            JSONB,
+        benchmark_metrics  JSONB,
+        error              TEXT,
+        created_at         TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (run_id, scenario)
+    )
+"""
+
+# Worker-side view of the shared market arrays (set by _attach_market).
+_market = None
+_benchmark = None
+_segments = []
+
+
+def load_market_data():
+    """Load regime, scores, prices and the NIFTY50 benchmark once for the whole sweep."""
+    logger.info("Loading market regime, scores and prices for the sweep...")
+    regime_df = fetch_df("SELECT date, classification FROM market_regime WHERE classification IS NOT NULL ORDER BY date")
+    regime_df["date"] = pd.to_datetime(regime_df["date"], errors="coerce").dt.date
+
+    scores_df = fetch_df("SELECT date, symbol, total_score FROM stock_scores WHERE total_score IS NOT NULL")
+    scores_df["date"] = pd.to_datetime(scores_df["date"], errors="coerce")
+    scores_df["total_score"] = pd.to_numeric(scores_df["total_score"], errors="coerce")
+
+    prices_df = fetch_df("SELECT date, symbol, close, open FROM daily_prices")
+    prices_df["date"] = pd.to_datetime(prices_df["date"], errors="coerce")
+    prices_df["close"] = pd.to_numeric(prices_df["close"], errors="coerce")
+    prices_df["open"] = pd.to_numeric(prices_df["open"], errors="coerce")
+
+    bench_df = fetch_df("SELECT date, close FROM market_index_prices WHERE symbol = 'NIFTY50' ORDER BY date")
+    bench_df["date"] = pd.to_datetime(bench_df["date"], errors="coerce").dt.date
+    bench_df["close"] = pd.to_numeric(bench_df["close"], errors="coerce")
+
+    dates = sorted(regime_df["date"].dropna())
+    market = build_market_arrays(dates, prices_df, scores_df, dict(zip(regime_df["date"], regime_df["classification"])))
+    benchmark = dict(zip(bench_df["date"].astype(str), bench_df["close"]))
+    logger.info(f"Loaded {len(dates)} days x {len(market['symbols'])} symbols, {len(benchmark)} benchmark days")
+    return market, benchmark
+
+
+def _share_market(market):
+    """Copy the ndarray fields into shared memory; return (segments, spec) for workers."""
+    segments, arrays, plain = [], {}, {}
+    for key, value in market.items():
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            shm = shared_memory.SharedMemory(create=True, size=max(value.nbytes, 1))
+            np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)[...] = value
+            segments.append(shm)
+            arrays[key] = (shm.name, value.shape, value.dtype.str)
+        else:
+            plain[key] = value
+    return segments, {"arrays": arrays, "plain": plain}
+
+
+def _attach_market(spec, benchmark):
+    """Process pool initializer: map the shared arrays without copying them."""
+    global _market, _benchmark
+    _market = dict(spec["plain"])
+    for key, (name, shape, dtype) in spec["arrays"].items():
+        shm = shared_memory.SharedMemory(name=name)
+        _segments.append(shm)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        _market[key] = view
+    _benchmark = benchmark
+
+
+def _scenario_rules(scenario):
+    return {k: v if scenario.get(k) is None else scenario[k] for k, v in DEFAULT_RULES.items()}
+
+
+def _json_metrics(metrics):
+    # JSONB rejects NaN (e.g. Sortino with no losing days)
+    if not metrics:
+        return None
+    return json.dumps({k: None if isinstance(v, float) and np.isnan(v) else v for k, v in metrics.items()})
+
+
+def evaluate_scenario(market, benchmark, scenario):
+    """Simulate one scenario on already-loaded arrays and score it against the benchmark."""
+    rules = _scenario_rules(scenario)
+    row = {
+        "scenario": scenario["name"],
+        "start_date": scenario.get("start"),
+        "end_date": scenario.get("end"),
+        **rules,
+        "trades": None,
+        "final_equity": None,
+        "metrics": None,
+        "benchmark_metrics": None,
+        "error": None,
+    }
+    try:
+        trade_log, equity_curve = run_backtest(
+            market,
+            execution="signal_day_next_open",
+            rules=BacktestRules(**rules),
+            start_date=scenario.get("start"),
+            end_date=scenario.get("end"),
+        )
+        row["trades"] = len(trade_log)
+        if not equity_curve:
+            raise ValueError("no trading days in window")
+        row["final_equity"] = round(float(equity_curve[-1]["equity"]), 2)
+
+        # Align to benchmark days, like metrics_engine's inner merge on date
+        aligned = [(str(e["date"]), e["equity"], benchmark[str(e["date"])])
+                   for e in equity_curve if str(e["date"]) in benchmark]
+        if len(aligned) < 2:
+            raise ValueError("fewer than two days overlap the NIFTY50 benchmark")
+        aligned_dates, strategy, bench = zip(*aligned)
+        row["metrics"] = calculate_metrics(aligned_dates, strategy, scenario["name"])
+        row["benchmark_metrics"] = calculate_metrics(aligned_dates, bench, "NIFTY 50 (Buy & Hold)")
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def _run_in_worker(scenario):
+    return evaluate_scenario(_market, _benchmark, scenario)
+
+
+def grid_scenarios(start=None, end=None, **axes):
+    """
+    Cartesian product of rule values, e.g.
+    ``grid_scenarios(tx_cost=[0.002, 0.004], trailing_stop=[0.15, 0.2])``.
+    """
+    keys = [k for k in DEFAULT_RULES if axes.get(k)]
+    if not keys:
+        return []
+    scenarios = []
+    for values in itertools.product(*(axes[k] for k in keys)):
+        params = dict(zip(keys, values))
+        label = ", ".join(f"{k}={v:g}" for k, v in params.items())
+        scenarios.append({"name": f"Grid ({label})", "start": start, "end": end, **params})
+    return scenarios
+
+
+def run_sweep(scenarios, workers=None, market=None, benchmark=None):
+    """
+    Run ``scenarios`` across a process pool sharing one copy of the market data.
+
+    Returns ``(results_df, rows)``: the consolidated table and the raw result
+    dicts, both in scenario order.
+    """
+    if market is None:
+        market, benchmark = load_market_data()
+    workers = workers or min(len(scenarios), os.cpu_count() or 1)
+
+    if workers <= 1:
+        rows = [evaluate_scenario(market, benchmark or {}, s) for s in scenarios]
+    else:
+        segments, spec = _share_market(market)
+        rows = [None] * len(scenarios)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_market,
+                                     initargs=(spec, benchmark or {})) as pool:
+                futures = {pool.submit(_run_in_worker, s): idx for idx, s in enumerate(scenarios)}
+                for future in as_completed(futures):
+                    row = future.result()
+                    rows[futures[future]] = row
+                    status = f"FAILED: {row['error']}" if row["error"] else f"{row['trades']} trades"
+                    logger.info(f"Scenario '{row['scenario']}' done ({status})")
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    return results_frame(rows), rows
+
+
+def results_frame(rows):
+    """Flatten result rows into one table: rules, then strategy and benchmark metrics."""
+    records = []
+    for row in rows:
+        record = {k: row[k] for k in ("scenario", "start_date", "end_date", *DEFAULT_RULES, "trades", "final_equity")}
+        for prefix, metrics in (("", row["metrics"]), ("NIFTY ", row["benchmark_metrics"])):
+            for key, value in (metrics or {}).items():
+                if key != "Portfolio":
+                    record[f"{prefix}{key}"] = value
+        record["error"] = row["error"]
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def save_sweep_results(rows, run_id=None):
+    """Persist one row per scenario into backtest_sweep_results; returns the run id."""
+    run_id = run_id or str(uuid.uuid4())
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SWEEP_RESULTS_SQL)
+            execute_batch(cur, """
+                INSERT INTO backtest_sweep_results (
+                    run_id, scenario, start_date, end_date, tx_cost, entry_score, exit_score,
+                    trailing_stop, trades, final_equity, metrics, benchmark_metrics, error
+                ) VALUES (
+                    %(run_id)s, %(scenario)s, %(start_date)s, %(end_date)s, %(tx_cost)s, %(entry_score)s,
+                    %(exit_score)s, %(trailing_stop)s, %(trades)s, %(final_equity)s,
+                    %(metrics)s, %(benchmark_metrics)s, %(error)s
+                )
+                ON CONFLICT (run_id, scenario) DO NOTHING
+            """, [
+                {
+                    **row,
+                    "run_id": run_id,
+                    "metrics": _json_metrics(row["metrics"]),
+                    "benchmark_metrics": _json_metrics(row["benchmark_metrics"]),
+                }
+                for row in rows
+            ])
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(f"Saved {len(rows)} scenario results to backtest_sweep_results (run {run_id})")
+    return run_id
+
+
+def write_results(results_df, rows, output_prefix="", save_db=True):
+    os.makedirs('outputs', exist_ok=True)
+    path = f'outputs/{output_prefix}sweep_results.csv'
+    results_df.to_csv(path, index=False)
+    logger.info("\n" + results_df.drop(columns=["error"]).to_string(index=False))
+    logger.info(f"Consolidated results written to {path}")
+    if save_db:
+        save_sweep_results(rows)
+
+
+def _number_list(cast):
+    return lambda value: [cast(v) for v in value.split(",")] if value else None
+
+
+def main(default_scenarios=()):
+    parser = argparse.ArgumentParser(description="Run backtest scenarios and parameter grids in parallel")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--grid-start', type=str, default=None, help='Grid window start (YYYY-MM-DD)')
+    parser.add_argument('--grid-end', type=str, default=None, help='Grid window end (YYYY-MM-DD)')
+    parser.add_argument('--tx-costs', type=_number_list(float), default=None, help='Comma list, e.g. 0.002,0.004,0.008')
+    parser.add_argument('--entry-scores', type=_number_list(int), default=None, help='Comma list, e.g. 3,4,5')
+    parser.add_argument('--exit-scores', type=_number_list(int), default=None, help='Comma list, e.g. 1,2')
+    parser.add_argument('--trailing-stops', type=_number_list(float), default=None, help='Comma list, e.g. 0.15,0.2,0.25')
+    parser.add_argument('--no-stress', action='store_true', help='Skip the built-in stress scenarios')
+    parser.add_argument('--no-db', action='store_true', help='Only write the CSV, not backtest_sweep_results')
+    parser.add_argument('--output-prefix', type=str, default="", help='Prefix for the results CSV')
+    args = parser.parse_args()
+
+    scenarios = [] if args.no_stress else list(default_scenarios)
+    scenarios += grid_scenarios(
+        start=args.grid_start, end=args.grid_end,
+        tx_cost=args.tx_costs, entry_score=args.entry_scores,
+        exit_score=args.exit_scores, trailing_stop=args.trailing_stops,
+    )
+    if not scenarios:
+        parser.error("nothing to run: pass grid values or drop --no-stress")
+
+    logger.info(f"Running {len(scenarios)} scenarios...")
+    results_df, rows = run_sweep(scenarios, workers=args.workers)
+    write_results(results_df, rows, output_prefix=args.output_prefix, save_db=not args.no_db)
+
+
+if __name__ == "__main__":
+    main()
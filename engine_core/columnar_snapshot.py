@@ -0,0 +1,270 @@
+"""
+Columnar on-disk format for frozen market data snapshots.
+
+The frozen backtests used to ``pd.read_csv`` the ~1.6M-row daily_prices CSV,
+re-parse dates, ``pd.to_numeric`` every column and MD5 the whole file on every
+run. ``export_csv`` converts such a CSV once into a directory of ``.npy``
+column files partitioned by year::
+
+    daily_prices.columnar/
+        manifest.json
+        2007/date.npy  2007/symbol.npy  2007/close.npy  ...
+        2008/...
+
+Rows inside a year are sorted by (date, symbol); ``date`` is ``datetime64[D]``,
+``symbol`` is an int32 code into the manifest's symbol list and every other
+column is float64 (already coerced, NaN for unparseable values).
+
+``load_columns`` memory-maps only the requested columns of the years that
+overlap the requested date range and slices each year by binary search on
+``date``. The manifest carries per-file SHA-256 digests and an overall
+``content_hash`` over them, so fingerprinting a snapshot is a manifest read
+rather than a full-file hash. ``load_frame`` is the entry point for scripts:
+it uses the columnar copy when it is current and falls back to the CSV.
+
+    python -m engine_core.columnar_snapshot export backups/20260304/daily_prices.csv
+    python -m engine_core.columnar_snapshot verify backups/20260304/daily_prices.columnar
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def columnar_path(csv_path) -> Path:
+    """Default location of the columnar copy of ``csv_path`` (``x.csv`` -> ``x.columnar``)."""
+    return Path(csv_path).with_suffix(".columnar")
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _content_hash(files: dict) -> str:
+    h = hashlib.sha256()
+    for name in sorted(files):
+        h.update(f"{name}:{files[name]['sha256']}:{files[name]['bytes']}\n".encode())
+    return h.hexdigest()
+
+
+def export_csv(csv_path, out_dir=None, date_col="date", symbol_col="symbol") -> dict:
+    """Convert a snapshot CSV into the columnar layout; returns the manifest."""
+    csv_path = Path(csv_path)
+    out_dir = Path(out_dir) if out_dir else columnar_path(csv_path)
+
+    df = pd.read_csv(csv_path, low_memory=False)
+    df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+    df = df.dropna(subset=[date_col])
+    df[symbol_col] = df[symbol_col].astype(str)
+    value_cols = [c for c in df.columns if c not in (date_col, symbol_col)]
+    for col in value_cols:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    df = df.sort_values([date_col, symbol_col], kind="mergesort").reset_index(drop=True)
+
+    symbols = sorted(df[symbol_col].unique())
+    codes = pd.Categorical(df[symbol_col], categories=symbols).codes.astype("int32")
+    dates = df[date_col].to_numpy().astype("datetime64[D]")
+    years = df[date_col].dt.year.to_numpy()
+
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    files, partitions = {}, {}
+    for year in np.unique(years):
+        lo, hi = np.searchsorted(years, [year, year + 1])
+        part = tmp_dir / str(year)
+        part.mkdir()
+        columns = {date_col: dates[lo:hi], symbol_col: codes[lo:hi]}
+        columns.update({c: df[c].to_numpy()[lo:hi] for c in value_cols})
+        for name, values in columns.items():
+            rel = f"{year}/{name}.npy"
+            np.save(tmp_dir / rel, np.ascontiguousarray(values))
+            files[rel] = {"sha256": _sha256(tmp_dir / rel), "bytes": (tmp_dir / rel).stat().st_size}
+        partitions[str(year)] = {
+            "rows": int(hi - lo),
+            "date_min": str(dates[lo]),
+            "date_max": str(dates[hi - 1]),
+        }
+
+    stat = csv_path.stat()
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": {"path": str(csv_path), "bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+        "rows": int(len(df)),
+        "date_column": date_col,
+        "symbol_column": symbol_col,
+        "columns": {date_col: "datetime64[D]", symbol_col: "int32", **{c: "float64" for c in value_cols}},
+        "symbols": symbols,
+        "partitions": partitions,
+        "files": files,
+        "content_hash": _content_hash(files),
+    }
+    (tmp_dir / MANIFEST).write_text(json.dumps(manifest, indent=1))
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp_dir.rename(out_dir)
+    return manifest
+
+
+def read_manifest(snapshot_dir) -> dict:
+    manifest = json.loads((Path(snapshot_dir) / MANIFEST).read_text())
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar snapshot format: {manifest.get('format_version')}")
+    return manifest
+
+
+def is_current(snapshot_dir, csv_path=None) -> bool:
+    """
+    True when ``snapshot_dir`` holds a manifest and, if the source CSV is still
+    around, it has not changed (size + mtime) since the export.
+    """
+    manifest_path = Path(snapshot_dir) / MANIFEST
+    if not manifest_path.exists():
+        return False
+    csv_path = Path(csv_path) if csv_path else None
+    if csv_path is None or not csv_path.exists():
+        return True
+    source = read_manifest(snapshot_dir)["source"]
+    stat = csv_path.stat()
+    return source["bytes"] == stat.st_size and source["mtime_ns"] == stat.st_mtime_ns
+
+
+def fingerprint(snapshot_dir, length=12) -> str:
+    """Content hash from the manifest (no data files are read)."""
+    return read_manifest(snapshot_dir)["content_hash"][:length]
+
+
+def verify(snapshot_dir) -> list[str]:
+    """Re-hash every column file; returns the files whose digest no longer matches."""
+    snapshot_dir = Path(snapshot_dir)
+    manifest = read_manifest(snapshot_dir)
+    return [rel for rel, meta in manifest["files"].items() if _sha256(snapshot_dir / rel) != meta["sha256"]]
+
+
+def load_columns(snapshot_dir, columns=None, start=None, end=None, symbols=None) -> pd.DataFrame:
+    """
+    Load ``columns`` for ``start <= date <= end`` as a DataFrame.
+
+    The date and symbol columns are always included (symbol as str). Only the
+    requested column files of overlapping year partitions are memory-mapped.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    manifest = read_manifest(snapshot_dir)
+    date_col, symbol_col = manifest["date_column"], manifest["symbol_column"]
+    value_cols = [c for c in (columns or manifest["columns"]) if c not in (date_col, symbol_col)]
+    unknown = set(value_cols) - set(manifest["columns"])
+    if unknown:
+        raise KeyError(f"Columns not in snapshot: {sorted(unknown)}")
+
+    start = np.datetime64(pd.Timestamp(start).date(), "D") if start is not None else None
+    end = np.datetime64(pd.Timestamp(end).date(), "D") if end is not None else None
+    symbol_names = np.asarray(manifest["symbols"], dtype=object)
+    wanted_codes = None
+    if symbols is not None:
+        wanted_codes = np.flatnonzero(np.isin(symbol_names, list(symbols))).astype("int32")
+
+    pieces = {c: [] for c in (date_col, symbol_col, *value_cols)}
+    for year, meta in sorted(manifest["partitions"].items()):
+        if start is not None and np.datetime64(meta["date_max"]) < start:
+            continue
+        if end is not None and np.datetime64(meta["date_min"]) > end:
+            continue
+        part = snapshot_dir / year
+        dates = np.load(part / f"{date_col}.npy", mmap_mode="r")
+        lo = int(np.searchsorted(dates, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(dates, end, side="right")) if end is not None else len(dates)
+        if hi <= lo:
+            continue
+        rows = slice(lo, hi)
+        codes = np.load(part / f"{symbol_col}.npy", mmap_mode="r")[rows]
+        mask = np.isin(codes, wanted_codes) if wanted_codes is not None else None
+        pieces[date_col].append(dates[rows] if mask is None else dates[rows][mask])
+        pieces[symbol_col].append(codes if mask is None else codes[mask])
+        for col in value_cols:
+            values = np.load(part / f"{col}.npy", mmap_mode="r")[rows]
+            pieces[col].append(values if mask is None else values[mask])
+
+    def _concat(parts, dtype):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    data = {
+        date_col: _concat(pieces[date_col], "datetime64[D]").astype("datetime64[ns]"),
+        symbol_col: symbol_names[_concat(pieces[symbol_col], "int32")],
+    }
+    data.update({c: _concat(pieces[c], "float64") for c in value_cols})
+    return pd.DataFrame(data)
+
+
+def load_frame(csv_path, columns, start=None, end=None, symbols=None):
+    """
+    Load a snapshot table from its columnar copy when that is current, else from the CSV.
+
+    Returns ``(df, fingerprint, source)``. The CSV fallback reproduces the old
+    read_csv + to_numeric path (and its full-file MD5 fingerprint).
+    """
+    csv_path = Path(csv_path)
+    snapshot_dir = columnar_path(csv_path)
+    if is_current(snapshot_dir, csv_path):
+        df = load_columns(snapshot_dir, columns, start, end, symbols)
+        return df, f"sha256:{fingerprint(snapshot_dir)}", snapshot_dir
+
+    df = pd.read_csv(csv_path, usecols=columns, parse_dates=["date"])
+    if start is not None:
+        df = df[df["date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["date"] <= pd.Timestamp(end)]
+    df["symbol"] = df["symbol"].astype(str)
+    if symbols is not None:
+        df = df[df["symbol"].isin(list(symbols))]
+    df = df.copy()
+    for col in columns:
+        if col not in ("symbol", "date"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    h = hashlib.md5()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return df, f"md5:{h.hexdigest()[:12]}", csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / verify columnar market data snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Convert a snapshot CSV into the columnar layout")
+    export.add_argument("csv", help="Path to the snapshot CSV (e.g. backups/20260304/daily_prices.csv)")
+    export.add_argument("--out", default=None, help="Output directory (default: <csv>.columnar next to the CSV)")
+    check = sub.add_parser("verify", help="Re-hash the column files against the manifest")
+    check.add_argument("snapshot_dir")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_csv(args.csv, args.out)
+        print(f"Exported {manifest['rows']:,} rows / {len(manifest['symbols'])} symbols / "
+              f"{len(manifest['partitions'])} years -> {args.out or columnar_path(args.csv)}")
+        print(f"content_hash: {manifest['content_hash']}")
+    else:
+        mismatched = verify(args.snapshot_dir)
+        if mismatched:
+            raise SystemExit(f"{len(mismatched)} file(s) changed since export: {', '.join(mismatched)}")
+        print(f"OK: {fingerprint(args.snapshot_dir, length=64)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,24 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import logging
 
+from engine_core.db_pool import pooled_connection
+
 logger = logging.getLogger(__name__)
 
 
 def get_connection():
     """
-    Get database connection - uses DATABASE_URL if set, otherwise falls back to local params.
+    Get a pooled database connection (see engine_core.db_pool).
+
+    ``conn.close()`` returns it to the process-wide pool, so callers use it
+    exactly like a fresh psycopg2 connection.
+    """
+    return pooled_connection("engine", _connect)
+
+
+def _connect():
+    """
+    Open a new database connection - uses DATABASE_URL if set, otherwise falls back to local params.
     """
     database_url = os.environ.get("DATABASE_URL", "")
 
@@ -94,52 +106,94 @@ def initialize_core_schema_v100():
 _get_raw_connection = get_connection
 
 
-def insert_index_prices(records):
-    """Bulk insert index price records into market_index_prices."""
+PRICE_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume"]
+PRICE_TABLES = ("daily_prices", "market_index_prices")
+
+
+def bulk_load_prices(table, records):
+    """
+    Merge OHLCV records into daily_prices or market_index_prices in one transaction.
+
+    Records are streamed with COPY into a session-local staging table (temp
+    tables skip the WAL just like UNLOGGED ones) and merged into the target with
+    a single INSERT ... ON CONFLICT DO NOTHING. Existing (symbol, date) rows are
+    left untouched, as with the old per-row inserts.
+
+    Returns {"staged": n, "inserted": n, "duplicates": n}.
+    """
+    import io
+    import pandas as pd
+
+    if table not in PRICE_TABLES:
+        raise ValueError(f"Unsupported price table: {table}")
+    counts = {"staged": 0, "inserted": 0, "duplicates": 0}
     if not records:
-        return
+        return counts
+
+    df = pd.DataFrame(list(records))
+    for col in PRICE_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[PRICE_COLUMNS].copy()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["symbol", "date"])
+    if df.empty:
+        return counts
+
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, date_format="%Y-%m-%d")
+    buf.seek(0)
+
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            from psycopg2.extras import execute_batch
-
-            execute_batch(
-                cur,
-                """INSERT INTO market_index_prices
-                   (symbol, date, open, high, low, close, volume)
-                   VALUES (%(symbol)s, %(date)s, %(open)s, %(high)s,
-                           %(low)s, %(close)s, %(volume)s)
-                   ON CONFLICT (symbol, date) DO NOTHING;""",
-                records,
-                page_size=1000,
+            cur.execute("""
+                CREATE TEMP TABLE price_staging (
+                    symbol  VARCHAR(20),
+                    date    DATE,
+                    open    NUMERIC,
+                    high    NUMERIC,
+                    low     NUMERIC,
+                    close   NUMERIC,
+                    volume  NUMERIC
+                ) ON COMMIT DROP
+            """)
+            cur.copy_expert(
+                f"COPY price_staging ({', '.join(PRICE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buf,
             )
-            conn.commit()
+            cur.execute(f"""
+                INSERT INTO {table} ({', '.join(PRICE_COLUMNS)})
+                SELECT DISTINCT ON (symbol, date) {', '.join(PRICE_COLUMNS)}
+                FROM price_staging
+                ORDER BY symbol, date
+                ON CONFLICT (symbol, date) DO NOTHING;
+            """)
+            counts["inserted"] = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         conn.close()
 
+    counts["staged"] = len(df)
+    counts["duplicates"] = counts["staged"] - counts["inserted"]
+    logger.info(
+        f"{table}: staged {counts['staged']} rows, inserted {counts['inserted']}, "
+        f"skipped {counts['duplicates']} duplicates"
+    )
+    return counts
+
+
+def insert_index_prices(records):
+    """Bulk insert index price records into market_index_prices. Skips duplicates."""
+    return bulk_load_prices("market_index_prices", records)
+
 
 def insert_daily_prices(records):
     """Bulk insert price records. Skips duplicates."""
-    if not records:
-        return
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            from psycopg2.extras import execute_batch
-
-            execute_batch(
-                cur,
-                """INSERT INTO daily_prices
-                   (symbol, date, open, high, low, close, volume)
-                   VALUES (%(symbol)s, %(date)s, %(open)s, %(high)s,
-                           %(low)s, %(close)s, %(volume)s)
-                   ON CONFLICT (symbol, date) DO NOTHING;""",
-                records,
-                page_size=1000,
-            )
-            conn.commit()
-    finally:
-        conn.close()
+    return bulk_load_prices("daily_prices", records)
 
 
 def test_connection():
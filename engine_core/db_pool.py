@@ -0,0 +1,381 @@
+"""
+Process-wide psycopg2 connection pooling.
+
+Every ``get_connection()`` / ``get_db()`` call used to pay a full TCP + TLS +
+auth handshake, which against Neon (``sslmode=require``) dominates the latency
+of light queries. Pools hand out ``PooledConnection`` wrappers instead: they
+behave like the underlying psycopg2 connection, but ``close()`` returns the
+connection to its pool, so existing ``conn = get_connection() ... conn.close()``
+call sites keep working unchanged.
+
+Tuning (environment variables, read when a pool is first created):
+
+    MRI_DB_POOL                      "0" disables pooling (plain connections)
+    MRI_DB_POOL_MIN                  idle connections kept warm (default 1)
+    MRI_DB_POOL_MAX                  max open connections per pool (default 10)
+    MRI_DB_POOL_TIMEOUT              seconds to wait for a free slot (default 30)
+    MRI_DB_POOL_MAX_LIFETIME         seconds before a connection is retired (default 1800)
+    MRI_DB_POOL_MAX_IDLE             seconds an idle connection above MIN is kept (default 300)
+    MRI_DB_POOL_HEALTH_CHECK_AFTER   idle seconds after which checkout pings with SELECT 1 (default 30)
+"""
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection became free within the pool timeout."""
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return float(default)
+
+
+class _Slot:
+    """A raw connection plus its bookkeeping timestamps."""
+
+    __slots__ = ("conn", "created_at", "last_used", "pid")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pid = os.getpid()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """
+    Proxy for a pooled psycopg2 connection.
+
+    Attribute access is forwarded to the real connection; ``close()`` hands it
+    back to the pool instead of closing it. A wrapper that is garbage collected
+    without being closed is returned as well, so leaked connections on error
+    paths do not pin pool slots.
+    """
+
+    def __init__(self, pool, slot):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_slot", slot)
+        object.__setattr__(self, "_cursor_factory", slot.conn.cursor_factory)
+
+    def _raw(self):
+        slot = self._slot
+        if slot is None:
+            raise psycopg2.InterfaceError("connection already closed")
+        return slot.conn
+
+    def __getattr__(self, name):
+        if name in ("_pool", "_slot", "_cursor_factory"):
+            raise AttributeError(name)
+        return getattr(self._raw(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw(), name, value)
+
+    @property
+    def closed(self):
+        slot = self._slot
+        return 1 if slot is None else slot.conn.closed
+
+    def close(self):
+        slot = self._slot
+        if slot is None:
+            return
+        object.__setattr__(self, "_slot", None)
+        # Undo per-checkout tweaks (e.g. email_service setting cursor_factory).
+        try:
+            if not slot.conn.closed:
+                slot.conn.cursor_factory = self._cursor_factory
+        except Exception:
+            pass
+        self._pool._release(slot)
+
+    def __enter__(self):
+        self._raw().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._raw().__exit__(exc_type, exc, tb)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe, fork-aware pool of psycopg2 connections built by ``connect``.
+
+    Checkout reuses the most recently returned idle connection, pinging it
+    first when it has sat idle longer than ``health_check_after``. Connections
+    older than ``max_lifetime`` or broken mid-use are discarded on return, and
+    idle connections beyond ``min_size`` are pruned after ``max_idle``.
+    """
+
+    def __init__(
+        self,
+        connect,
+        name="default",
+        min_size=1,
+        max_size=10,
+        timeout=30.0,
+        max_lifetime=1800.0,
+        max_idle=300.0,
+        health_check_after=30.0,
+    ):
+        self.connect = connect
+        self.name = name
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        # RLock: a wrapper's __del__ may release into the pool while this
+        # thread already holds the lock.
+        self._cond = threading.Condition(threading.RLock())
+        self._idle = []
+        self._open = 0
+        self._pid = os.getpid()
+        self._stats = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "reused": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "expired": 0,
+        }
+
+    @classmethod
+    def from_env(cls, connect, name="default"):
+        return cls(
+            connect,
+            name=name,
+            min_size=_env_float("MRI_DB_POOL_MIN", 1),
+            max_size=_env_float("MRI_DB_POOL_MAX", 10),
+            timeout=_env_float("MRI_DB_POOL_TIMEOUT", 30),
+            max_lifetime=_env_float("MRI_DB_POOL_MAX_LIFETIME", 1800),
+            max_idle=_env_float("MRI_DB_POOL_MAX_IDLE", 300),
+            health_check_after=_env_float("MRI_DB_POOL_HEALTH_CHECK_AFTER", 30),
+        )
+
+    # ── checkout / return ───────────────────────────────────
+    def getconn(self):
+        """Return a ``PooledConnection``; blocks up to ``timeout`` when the pool is full."""
+        self._check_fork()
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._stats["checkouts"] += 1
+        while True:
+            slot = None
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"DB pool '{self.name}' exhausted: {self._open} connections in use "
+                            f"after waiting {self.timeout:g}s"
+                        )
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                if self._idle:
+                    slot = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting outside the lock.
+                    self._open += 1
+
+            if slot is None:
+                try:
+                    slot = _Slot(self.connect())
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["connections_created"] += 1
+                return PooledConnection(self, slot)
+
+            if self._usable(slot):
+                with self._cond:
+                    self._stats["reused"] += 1
+                return PooledConnection(self, slot)
+            self._discard(slot)
+
+    def _usable(self, slot):
+        now = time.monotonic()
+        if slot.conn.closed:
+            return False
+        if now - slot.created_at > self.max_lifetime:
+            with self._cond:
+                self._stats["expired"] += 1
+            return False
+        if now - slot.last_used > self.health_check_after:
+            try:
+                with slot.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                slot.conn.rollback()
+            except Exception as exc:
+                logger.warning("DB pool '%s': dropping dead connection (%s)", self.name, exc)
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                return False
+        return True
+
+    def _release(self, slot):
+        self._check_fork()
+        if slot.pid != os.getpid():
+            # Connection belongs to the parent process; keep it referenced so
+            # it is never closed (and its socket shut down) from this one.
+            _inherited.append(slot)
+            return
+        conn = slot.conn
+        reusable = not conn.closed
+        if reusable:
+            try:
+                status = conn.get_transaction_status()
+                if status == TRANSACTION_STATUS_UNKNOWN:
+                    reusable = False
+                elif status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if reusable and conn.autocommit:
+                    conn.autocommit = False
+            except Exception:
+                reusable = False
+        if reusable and time.monotonic() - slot.created_at > self.max_lifetime:
+            with self._cond:
+                self._stats["expired"] += 1
+            reusable = False
+        if not reusable:
+            self._discard(slot)
+            return
+
+        slot.last_used = time.monotonic()
+        stale = []
+        with self._cond:
+            self._idle.append(slot)
+            # Oldest idle connections sit at the front of the list.
+            while len(self._idle) > self.min_size and slot.last_used - self._idle[0].last_used > self.max_idle:
+                stale.append(self._idle.pop(0))
+                self._open -= 1
+            self._cond.notify()
+        for old in stale:
+            self._close_raw(old)
+
+    def _discard(self, slot):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+        self._close_raw(slot)
+
+    def _close_raw(self, slot):
+        with self._cond:
+            self._stats["connections_closed"] += 1
+        try:
+            slot.conn.close()
+        except Exception:
+            pass
+
+    def _check_fork(self):
+        """Start from an empty pool in a forked child (e.g. ProcessPoolExecutor workers)."""
+        if os.getpid() == self._pid:
+            return
+        with self._cond:
+            if os.getpid() != self._pid:
+                # Never close the inherited sockets: they are still the parent's.
+                # Dropping the last reference would run PQfinish on them, so
+                # they are parked in _inherited for the life of the process.
+                _inherited.extend(self._idle)
+                self._idle = []
+                self._open = 0
+                self._pid = os.getpid()
+
+    # ── maintenance ─────────────────────────────────────────
+    def warm(self):
+        """Open connections up to ``min_size`` ahead of the first request."""
+        conns = []
+        try:
+            while len(conns) < self.min_size:
+                with self._cond:
+                    if len(self._idle) + len(conns) >= self.min_size:
+                        break
+                conns.append(self.getconn())
+        finally:
+            for conn in conns:
+                conn.close()
+
+    def close_all(self):
+        """Close every idle connection; checked-out ones close when returned."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for slot in idle:
+            self._close_raw(slot)
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_inherited = []  # parent-process slots seen in a forked child; never closed
+
+
+def pooling_enabled():
+    return os.environ.get("MRI_DB_POOL", "1").lower() not in ("0", "false", "off", "no")
+
+
+def get_pool(name, connect):
+    """Return the process-wide pool called ``name``, creating it with ``connect``."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = ConnectionPool.from_env(connect, name=name)
+                _pools[name] = pool
+    return pool
+
+
+def pooled_connection(name, connect):
+    """Check out a connection from pool ``name`` (or open a plain one when pooling is off)."""
+    if not pooling_enabled():
+        return connect()
+    return get_pool(name, connect).getconn()
+
+
+def pool_stats():
+    """Return {pool name: stats dict} for every pool created in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -1,12 +1,22 @@
 # Updated: 2026-04-24
+import io
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import numpy as np
 import pandas as pd
-from psycopg2.extras import execute_batch
 
 from engine_core.db import get_connection
 from engine_core.email_service import send_alert_email
+from engine_core.indicator_state import (
+    EMA_SPANS,
+    WINDOW_SIZES,
+    IndicatorState,
+    ensure_indicator_state_table,
+    load_indicator_states,
+    save_indicator_states,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +47,12 @@ INDICATOR_COLUMNS = (
 # PERSIST_ROWS=60 provides approx 3 months of buffer for the dashboard history.
 PERSIST_ROWS = 60
 
+# Incremental mode only reads the tail of each symbol's history: the widest
+# rolling window is rolling_high_6m (126 bars), RS looks back 90 sessions, and
+# the remainder is headroom for a few days of not-yet-computed bars.
+ROLLING_LOOKBACK_ROWS = 126
+INCREMENTAL_TAIL_ROWS = 150
+
 
 def add_indicator_columns_if_missing():
     """Ensure the indicator columns exist on daily_prices."""
@@ -59,6 +75,10 @@ def add_indicator_columns_if_missing():
                     END $$;
                     """
                 )
+            # Lets incremental scoring find rows whose indicators were rewritten.
+            cur.execute(
+                "ALTER TABLE daily_prices ADD COLUMN IF NOT EXISTS indicators_updated_at TIMESTAMPTZ;"
+            )
         conn.commit()
     finally:
         conn.close()
@@ -146,148 +166,519 @@ def fetch_data(symbols=None):
             )
             idx_rows = cur.fetchall()
 
-        if not rows:
-            return pd.DataFrame(), pd.DataFrame()
+        return _frames_from_rows(rows, idx_rows)
+    finally:
+        conn.close()
 
-        df = pd.DataFrame([dict(r) for r in rows])
-        df["date"] = pd.to_datetime(df["date"])
-        df["close"] = pd.to_numeric(df["close"])
-        df["high"] = pd.to_numeric(df["high"])
-        df["volume"] = pd.to_numeric(df["volume"])
 
-        for column in ("open", "high", "low", "close", "volume", "ema_10", "ema_20", "ema_50", "ema_200"):
-            if column in df.columns:
-                df[column] = pd.to_numeric(df[column], errors="coerce")
+def _frames_from_rows(rows, idx_rows):
+    """Build typed price and index frames from fetched cursor rows."""
+    if not rows:
+        return pd.DataFrame(), pd.DataFrame()
 
-        idx_df = pd.DataFrame([dict(r) for r in idx_rows]) if idx_rows else pd.DataFrame()
-        if not idx_df.empty:
-            idx_df["date"] = pd.to_datetime(idx_df["date"])
-            idx_df["idx_close"] = pd.to_numeric(idx_df["idx_close"])
+    df = pd.DataFrame([dict(r) for r in rows])
+    df["date"] = pd.to_datetime(df["date"])
+    df["close"] = pd.to_numeric(df["close"])
+    df["high"] = pd.to_numeric(df["high"])
+    df["volume"] = pd.to_numeric(df["volume"])
 
-        return df, idx_df
+    for column in ("open", "high", "low", "close", "volume", "ema_10", "ema_20", "ema_50", "ema_200"):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+
+    idx_df = pd.DataFrame([dict(r) for r in idx_rows]) if idx_rows else pd.DataFrame()
+    if not idx_df.empty:
+        idx_df["date"] = pd.to_datetime(idx_df["date"])
+        idx_df["idx_close"] = pd.to_numeric(idx_df["idx_close"])
+
+    return df, idx_df
+
+
+def fetch_symbols_pending_update():
+    """Return symbols whose latest bar has not had indicators computed yet."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT symbol
+                FROM (
+                    SELECT DISTINCT ON (symbol) symbol, ema_50
+                    FROM daily_prices
+                    ORDER BY symbol, date DESC
+                ) latest
+                WHERE ema_50 IS NULL
+                ORDER BY symbol
+                """
+            )
+            return [row["symbol"] for row in cur.fetchall()]
     finally:
         conn.close()
 
 
-def compute_indicators(df, idx_df):
-    """Compute all technical indicators and prepare row-level updates."""
-    if df.empty:
-        return []
-
-    updates = []
-    for symbol in df["symbol"].unique():
-        s_df = df[df["symbol"] == symbol].copy().sort_values("date")
-        if len(s_df) < 20:
-            logger.warning("Symbol %s has insufficient data: %d rows", symbol, len(s_df))
-            continue
-
-        s_df["ema_10"] = s_df["close"].ewm(span=10, adjust=False).mean()
-        s_df["ema_20"] = s_df["close"].ewm(span=20, adjust=False).mean()
-        s_df["ema_50"] = s_df["close"].ewm(span=50, adjust=False).mean()
-        s_df["ema_200"] = (
-            s_df["close"].ewm(span=200, adjust=False).mean()
-            if len(s_df) >= 200
-            else s_df["ema_50"]
-        )
+def fetch_tail_data(symbols, tail_rows=INCREMENTAL_TAIL_ROWS):
+    """Fetch only the last ``tail_rows`` bars per symbol plus the matching index window."""
+    if not symbols:
+        return pd.DataFrame(), pd.DataFrame()
 
-        s_df["ema_200_slope_20"] = s_df["ema_200"].diff(20)
-
-        delta = s_df["close"].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / (loss + 1e-9)
-        s_df["rsi_14"] = 100 - (100 / (1 + rs))
-
-        s_df["below_200ema"] = s_df["close"] < s_df["ema_200"]
-        s_df["rolling_high_6m"] = s_df["close"].rolling(window=126, min_periods=20).max()
-        s_df["avg_volume_20d"] = s_df["volume"].rolling(window=20).mean()
-
-        # STEE Indicators
-        s_df["high_10d"] = s_df["high"].rolling(window=10).max().shift(1)
-        s_df["low_5d"] = s_df["low"].rolling(window=5).min().shift(1)
-        
-        # ATR Calculation
-        tr1 = s_df["high"] - s_df["low"]
-        tr2 = (s_df["high"] - s_df["close"].shift(1)).abs()
-        tr3 = (s_df["low"] - s_df["close"].shift(1)).abs()
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        s_df["atr_14"] = tr.rolling(window=14).mean()
-
-        if not idx_df.empty:
-            merged = pd.merge(
-                s_df[["date", "close"]],
-                idx_df[["date", "idx_close"]],
-                on="date",
-                how="inner",
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT symbol, date, open, high, low, close, volume,
+                       ema_10, ema_20, ema_50, ema_200, history_rows
+                FROM (
+                    SELECT symbol, date, open, high, low, close, volume,
+                           ema_10, ema_20, ema_50, ema_200,
+                           ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS rn,
+                           COUNT(*) OVER (PARTITION BY symbol) AS history_rows
+                    FROM daily_prices
+                    WHERE symbol = ANY(%s)
+                ) tail
+                WHERE rn <= %s
+                ORDER BY symbol, date
+                """,
+                (symbols, tail_rows),
             )
-            if len(merged) > 90:
-                merged["stock_ret"] = merged["close"] / merged["close"].shift(90)
-                merged["idx_ret"] = merged["idx_close"] / merged["idx_close"].shift(90)
-                merged["rs_90d"] = (merged["stock_ret"] / merged["idx_ret"]) * 100
-                s_df = pd.merge(s_df, merged[["date", "rs_90d"]], on="date", how="left")
-
-        s_df = s_df.replace({np.nan: None})
-
-        for _, row in s_df.tail(PERSIST_ROWS).iterrows():
-            updates.append(
-                {
-                    "symbol": row["symbol"],
-                    "date": row["date"],
-                    "ema_10": row.get("ema_10"),
-                    "ema_20": row.get("ema_20"),
-                    "ema_50": row.get("ema_50"),
-                    "ema_200": row.get("ema_200"),
-                    "rsi_14": row.get("rsi_14") if row.get("rsi_14") is not None else 50,
-                    "below_200ema": bool(row.get("below_200ema", False)),
-                    "ema_200_slope_20": row.get("ema_200_slope_20"),
-                    "rolling_high_6m": row.get("rolling_high_6m"),
-                    "avg_volume_20d": row.get("avg_volume_20d"),
-                    "rs_90d": row.get("rs_90d"),
-                    "high_10d": row.get("high_10d"),
-                    "low_5d": row.get("low_5d"),
-                    "atr_14": row.get("atr_14"),
-                }
+            rows = cur.fetchall()
+            if not rows:
+                return pd.DataFrame(), pd.DataFrame()
+
+            cur.execute(
+                """
+                SELECT date, close AS idx_close
+                FROM market_index_prices
+                WHERE symbol = 'NIFTY50'
+                  AND date >= %s
+                ORDER BY date
+                """,
+                (min(r["date"] for r in rows),),
             )
+            idx_rows = cur.fetchall()
+
+        df, idx_df = _frames_from_rows(rows, idx_rows)
+        df["history_rows"] = pd.to_numeric(df["history_rows"])
+        return df, idx_df
+    finally:
+        conn.close()
+
+
+def _pivot_bars(codes, positions, values, shape):
+    """Scatter a long column into a (bar x symbol) matrix, NaN where a symbol has no bar."""
+    matrix = np.full(shape, np.nan)
+    matrix[positions, codes] = values
+    return pd.DataFrame(matrix)
+
+
+def _bar_layout(df):
+    """
+    Map each row of a (symbol, date)-sorted frame onto a shared bar axis.
+
+    Every symbol's history is right-aligned so its latest bar sits on the last
+    row of the matrix. Rolling windows and EMAs therefore run over each symbol's
+    own consecutive bars, exactly like the per-symbol Series path did, while the
+    whole batch is processed column-wise in a single call.
+    """
+    codes, symbols = pd.factorize(df["symbol"], sort=False)
+    lengths = np.bincount(codes, minlength=len(symbols))
+    n_bars = int(lengths.max()) if len(lengths) else 0
+    bar_in_symbol = df.groupby(codes, sort=False).cumcount().to_numpy()
+    positions = bar_in_symbol + (n_bars - lengths[codes])
+    return codes, positions, symbols, lengths, n_bars
+
+
+def _compute_rs_90d(df, idx_df):
+    """Relative strength vs NIFTY50 over 90 shared trading days, aligned to df rows."""
+    rs = np.full(len(df), np.nan)
+    if idx_df.empty:
+        return rs
+
+    idx_close = idx_df.drop_duplicates("date").set_index("date")["idx_close"]
+    on_index_day = df["date"].isin(idx_close.index).to_numpy()
+    shared = df.loc[on_index_day, ["symbol", "date", "close"]]
+    if shared.empty:
+        return rs
+
+    codes, positions, symbols, lengths, n_bars = _bar_layout(shared)
+    shape = (n_bars, len(symbols))
+    close = _pivot_bars(codes, positions, shared["close"].to_numpy(dtype=float), shape)
+    bench = _pivot_bars(
+        codes, positions, shared["date"].map(idx_close).to_numpy(dtype=float), shape
+    )
+
+    stock_ret = close / close.shift(90)
+    idx_ret = bench / bench.shift(90)
+    rs_matrix = ((stock_ret / idx_ret) * 100).to_numpy()
+
+    # Symbols with 90 or fewer shared sessions never received an RS value.
+    rs_matrix[:, lengths <= 90] = np.nan
+    rs[on_index_day] = rs_matrix[positions, codes]
+    return rs
+
+
+def compute_indicator_frame(df, idx_df, persist_rows=None):
+    """
+    Compute all technical indicators for a batch of symbols in one vectorized pass.
+
+    The batch is pivoted into (bar x symbol) matrices so EMA, RSI, ATR and the
+    rolling windows run once across every symbol instead of once per symbol.
+    Returns the last ``persist_rows`` rows per symbol (default PERSIST_ROWS)
+    with the indicator columns, ready to be written back to daily_prices.
+    """
+    columns = ["symbol", "date"] + [name for name, _ in INDICATOR_COLUMNS]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    persist_rows = PERSIST_ROWS if persist_rows is None else persist_rows
+    df = df.sort_values(["symbol", "date"], kind="mergesort").reset_index(drop=True)
+
+    counts = df["symbol"].value_counts(sort=False)
+    for symbol, count in counts[counts < 20].items():
+        logger.warning("Symbol %s has insufficient data: %d rows", symbol, count)
+    df = df[df["symbol"].map(counts).to_numpy() >= 20].reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    codes, positions, symbols, lengths, n_bars = _bar_layout(df)
+    shape = (n_bars, len(symbols))
+
+    def pivot(column):
+        return _pivot_bars(codes, positions, df[column].to_numpy(dtype=float), shape)
+
+    close = pivot("close")
+    high = pivot("high")
+    low = pivot("low")
+    volume = pivot("volume")
+    present = np.zeros(shape, dtype=bool)
+    present[positions, codes] = True
+
+    out = {}
+    out["ema_10"] = close.ewm(span=10, adjust=False).mean()
+    out["ema_20"] = close.ewm(span=20, adjust=False).mean()
+    out["ema_50"] = close.ewm(span=50, adjust=False).mean()
+    ema_200 = close.ewm(span=200, adjust=False).mean()
+    short_history = lengths < 200
+    ema_200.loc[:, short_history] = out["ema_50"].loc[:, short_history]
+    out["ema_200"] = ema_200
+
+    out["ema_200_slope_20"] = ema_200.diff(20)
+
+    # delta.where(...) maps the first bar (and any gap) to 0, not NaN; padding
+    # cells must stay NaN so they never complete a rolling window early.
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).where(present)
+    loss = (-delta.where(delta < 0, 0)).where(present)
+    rs = gain.rolling(window=14).mean() / (loss.rolling(window=14).mean() + 1e-9)
+    out["rsi_14"] = 100 - (100 / (1 + rs))
+
+    out["below_200ema"] = close < ema_200
+    out["rolling_high_6m"] = close.rolling(window=126, min_periods=20).max()
+    out["avg_volume_20d"] = volume.rolling(window=20).mean()
+
+    # STEE Indicators
+    out["high_10d"] = high.rolling(window=10).max().shift(1)
+    out["low_5d"] = low.rolling(window=5).min().shift(1)
+
+    # ATR Calculation (fmax skips NaN like DataFrame.max(axis=1) did)
+    prev_close = close.shift(1)
+    tr = np.fmax(
+        np.fmax(high - low, (high - prev_close).abs()),
+        (low - prev_close).abs(),
+    )
+    out["atr_14"] = tr.rolling(window=14).mean()
+
+    keep = positions >= n_bars - persist_rows
+    keep_pos, keep_codes = positions[keep], codes[keep]
+
+    frame = df.loc[keep, ["symbol", "date"]].reset_index(drop=True)
+    for name, _ in INDICATOR_COLUMNS:
+        if name == "rs_90d":
+            frame[name] = _compute_rs_90d(df, idx_df)[keep]
+        else:
+            frame[name] = out[name].to_numpy()[keep_pos, keep_codes]
+    return frame
+
+
+def _prepare_updates(frame):
+    """Apply the persistence defaults (neutral RSI, strict boolean flag)."""
+    frame["rsi_14"] = frame["rsi_14"].fillna(50)
+    frame["below_200ema"] = frame["below_200ema"].astype(bool)
+    return frame
+
+
+def compute_indicators(df, idx_df, persist_rows=None):
+    """Compute all technical indicators and prepare the columnar update frame."""
+    if df.empty:
+        return pd.DataFrame()
+
+    updates = _prepare_updates(compute_indicator_frame(df, idx_df, persist_rows=persist_rows))
 
     logger.info(
         "Prepared %d indicator updates across %d symbols (persisting last %d rows per symbol)",
         len(updates),
         df["symbol"].nunique(),
-        PERSIST_ROWS,
+        PERSIST_ROWS if persist_rows is None else persist_rows,
     )
     return updates
 
 
+def compute_incremental_indicator_frame(df, idx_df):
+    """
+    Advance indicators for bars added since the last persisted indicator row.
+
+    ``df`` holds the tail fetched by fetch_tail_data. Each symbol is seeded from
+    its latest row that already carries ema_10/20/50/200; EMAs are advanced
+    recursively from those stored values, while the window-based indicators
+    (RSI, ATR, rolling highs/lows, volume, RS) are recomputed from the tail,
+    which covers their full lookback. Only the not-yet-computed bars are
+    returned.
+
+    Returns ``(frame, fallback_symbols)``; symbols that cannot be advanced
+    safely (no seed row, under 200 bars of history, or more pending bars than
+    the tail can cover) are left for the full-history path.
+    """
+    empty = pd.DataFrame(columns=["symbol", "date"] + [name for name, _ in INDICATOR_COLUMNS])
+    if df.empty:
+        return empty, []
+
+    df = df.sort_values(["symbol", "date"], kind="mergesort").reset_index(drop=True)
+    ema_columns = list(EMA_SPANS)
+    seeded = df[ema_columns].notna().all(axis=1)
+
+    # Seed = last fully-populated EMA row; everything after it is pending.
+    row_in_symbol = df.groupby("symbol", sort=False).cumcount()
+    seed_row = row_in_symbol.where(seeded).groupby(df["symbol"], sort=False).transform("max")
+    tail_len = df.groupby("symbol", sort=False)["date"].transform("size")
+    pending_count = tail_len - 1 - seed_row
+
+    per_symbol = pd.DataFrame(
+        {
+            "seed_row": seed_row,
+            "pending": pending_count,
+            "tail_len": tail_len,
+            "history_rows": df["history_rows"],
+            "symbol": df["symbol"],
+        }
+    ).drop_duplicates("symbol").set_index("symbol")
+    fallback = per_symbol[
+        per_symbol["seed_row"].isna()
+        | (per_symbol["history_rows"] - per_symbol["pending"] < EMA_SPANS["ema_200"])
+        | (per_symbol["tail_len"] - per_symbol["pending"] < ROLLING_LOOKBACK_ROWS)
+    ].index
+    advance = per_symbol.index.difference(fallback)
+    advance = per_symbol.loc[advance][per_symbol.loc[advance, "pending"] > 0].index
+
+    df = df[df["symbol"].isin(advance)].reset_index(drop=True)
+    if df.empty:
+        return empty, list(fallback)
+
+    row_in_symbol = df.groupby("symbol", sort=False).cumcount()
+    seed_row = df["symbol"].map(per_symbol["seed_row"])
+    is_seed = (row_in_symbol == seed_row).to_numpy()
+    is_pending = (row_in_symbol > seed_row).to_numpy()
+
+    frame = compute_indicator_frame(df, idx_df, persist_rows=len(df))
+
+    # EMA recursion: feeding the stored EMA as the first observation makes
+    # ewm(adjust=False) continue exactly from the persisted state.
+    chain = df.loc[is_seed | is_pending].reset_index(drop=True)
+    codes, positions, symbols, _, n_bars = _bar_layout(chain)
+    chain_seed = is_seed[is_seed | is_pending]
+    for column, span in EMA_SPANS.items():
+        values = np.where(chain_seed, chain[column], chain["close"]).astype(float)
+        matrix = _pivot_bars(codes, positions, values, (n_bars, len(symbols)))
+        advanced = matrix.ewm(span=span, adjust=False).mean().to_numpy()[positions, codes]
+        frame.loc[is_pending, column] = advanced[~chain_seed]
+
+    # Slope needs ema_200 from 20 bars back, which is a stored value for all
+    # but the newest bars.
+    ema_200 = df["ema_200"].to_numpy(dtype=float).copy()
+    ema_200[is_pending] = frame.loc[is_pending, "ema_200"].to_numpy(dtype=float)
+    frame["ema_200_slope_20"] = pd.Series(ema_200).groupby(df["symbol"], sort=False).diff(20)
+    frame["below_200ema"] = df["close"].to_numpy(dtype=float) < ema_200
+
+    return frame.loc[is_pending].reset_index(drop=True), list(fallback)
+
+
+def build_indicator_states(df, idx_df):
+    """
+    Build each symbol's streaming IndicatorState as of its latest bar.
+
+    The windows are sliced straight from the fetched history and the EMA seeds
+    come from the same matrix pass as compute_indicator_frame, so no bar-by-bar
+    replay is needed. Symbols with fewer than 20 bars are skipped, matching the
+    full path.
+    """
+    if df.empty:
+        return {}
+
+    df = df.sort_values(["symbol", "date"], kind="mergesort").reset_index(drop=True)
+    counts = df["symbol"].value_counts(sort=False)
+    df = df[df["symbol"].map(counts).to_numpy() >= 20].reset_index(drop=True)
+    if df.empty:
+        return {}
+
+    codes, positions, symbols, lengths, n_bars = _bar_layout(df)
+    close_matrix = _pivot_bars(
+        codes, positions, df["close"].to_numpy(dtype=float), (n_bars, len(symbols))
+    )
+    # Raw EMAs: the state keeps the true EMA-200 even while it is still being
+    # reported as EMA-50 for short histories.
+    emas = {
+        column: close_matrix.ewm(span=span, adjust=False).mean().to_numpy()[positions, codes]
+        for column, span in EMA_SPANS.items()
+    }
+
+    idx_close = (
+        idx_df.drop_duplicates("date").set_index("date")["idx_close"]
+        if not idx_df.empty
+        else pd.Series(dtype=float)
+    )
+    bench = df["date"].map(idx_close).to_numpy(dtype=float)
+
+    close = df["close"].to_numpy(dtype=float)
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    volume = df["volume"].to_numpy(dtype=float)
+    dates = df["date"].dt.date.to_numpy()
+
+    states = {}
+    bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        c, h, l = close[start:end], high[start:end], low[start:end]
+        prev_c = np.r_[np.nan, c[:-1]]
+        delta = c - prev_c
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev_c)), np.abs(l - prev_c))
+        on_index_day = ~np.isnan(bench[start:end])
+
+        window_source = {
+            "ema_50_window": emas["ema_50"][start:end],
+            "ema_200_window": emas["ema_200"][start:end],
+            "gain_window": np.where(delta > 0, delta, 0.0),
+            "loss_window": np.where(delta < 0, -delta, 0.0),
+            "tr_window": tr,
+            "close_window": c,
+            "volume_window": volume[start:end],
+            "high_window": h,
+            "low_window": l,
+            "rs_close_window": c[on_index_day],
+            "rs_idx_window": bench[start:end][on_index_day],
+        }
+        symbol = df.at[start, "symbol"]
+        states[symbol] = IndicatorState(
+            symbol=symbol,
+            last_date=dates[end - 1],
+            bar_count=int(end - start),
+            last_close=float(c[-1]),
+            close_gap=_trailing_gap(c),
+            **{column: float(emas[column][end - 1]) for column in EMA_SPANS},
+            **{
+                name: window_source[name][-size:].tolist()
+                for name, size in WINDOW_SIZES.items()
+            },
+        )
+    return states
+
+
+def _trailing_gap(closes):
+    """Count missing closes after the last observed one (EMA weight decay state)."""
+    observed = np.flatnonzero(~np.isnan(closes))
+    return int(len(closes) - 1 - observed[-1]) if len(observed) else 0
+
+
+def refresh_indicator_states(df, idx_df):
+    """Rebuild and persist streaming state from a freshly recomputed history."""
+    states = build_indicator_states(df, idx_df)
+    save_indicator_states(list(states.values()))
+
+
+def fetch_bars_since_state(symbols=None):
+    """Fetch every daily_prices bar newer than its symbol's indicator_state.last_date."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT dp.symbol, dp.date, dp.high, dp.low, dp.close, dp.volume
+                FROM daily_prices dp
+                JOIN indicator_state s ON s.symbol = dp.symbol
+                WHERE dp.date > s.last_date
+                  AND (%(symbols)s::text[] IS NULL OR dp.symbol = ANY(%(symbols)s::text[]))
+                ORDER BY dp.symbol, dp.date
+                """,
+                {"symbols": list(symbols) if symbols is not None else None},
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return [], {}
+
+            cur.execute(
+                """
+                SELECT date, close
+                FROM market_index_prices
+                WHERE symbol = 'NIFTY50'
+                  AND date >= %s
+                """,
+                (min(r["date"] for r in rows),),
+            )
+            idx_closes = {r["date"]: float(r["close"]) for r in cur.fetchall() if r["close"] is not None}
+        return rows, idx_closes
+    finally:
+        conn.close()
+
+
+def fetch_symbols_without_state():
+    """Return symbols in daily_prices that have no indicator_state row yet."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT DISTINCT dp.symbol
+                FROM daily_prices dp
+                LEFT JOIN indicator_state s ON s.symbol = dp.symbol
+                WHERE s.symbol IS NULL
+                ORDER BY dp.symbol
+                """
+            )
+            return [row["symbol"] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
 def verify_updates_written(updates, sample_size=50):
     """Verify a sample of the updates actually made it into the database."""
-    if not updates:
+    if updates is None or updates.empty:
         raise IndicatorComputationError("No updates to verify")
 
+    sample_size = min(sample_size, len(updates))
+    sample = updates.iloc[np.random.choice(len(updates), sample_size, replace=False)]
+
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            sample_size = min(sample_size, len(updates))
-            sample_indices = np.random.choice(len(updates), sample_size, replace=False)
+            cur.execute(
+                """
+                SELECT s.symbol, s.date, dp.ema_50
+                FROM unnest(%s::text[], %s::date[]) AS s(symbol, date)
+                LEFT JOIN daily_prices dp
+                  ON dp.symbol = s.symbol AND dp.date = s.date
+                """,
+                (
+                    sample["symbol"].tolist(),
+                    [d.date() for d in pd.to_datetime(sample["date"])],
+                ),
+            )
             verified_count = 0
-
-            for idx in sample_indices:
-                update = updates[idx]
-                cur.execute(
-                    """
-                    SELECT ema_50
-                    FROM daily_prices
-                    WHERE symbol = %s AND date = %s
-                    """,
-                    (update["symbol"], update["date"]),
-                )
-                result = cur.fetchone()
-                if result and result["ema_50"] is not None:
+            for result in cur.fetchall():
+                if result["ema_50"] is not None:
                     verified_count += 1
                 else:
                     logger.warning(
                         "Update not verified for %s on %s",
-                        update["symbol"],
-                        update["date"],
+                        result["symbol"],
+                        result["date"],
                     )
 
             verification_rate = (verified_count / sample_size) * 100
@@ -306,34 +697,53 @@ def verify_updates_written(updates, sample_size=50):
         conn.close()
 
 
+def _copy_updates_to_temp_table(cur, updates):
+    """Stream the update frame into a transaction-scoped temp table via COPY."""
+    columns = ["symbol", "date"] + [name for name, _ in INDICATOR_COLUMNS]
+    column_defs = ",\n            ".join(
+        ["symbol TEXT", "date DATE"] + [f"{name} {col_type}" for name, col_type in INDICATOR_COLUMNS]
+    )
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE tmp_indicator_updates (
+            {column_defs}
+        ) ON COMMIT DROP
+        """
+    )
+
+    buffer = io.StringIO()
+    updates[columns].to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d")
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY tmp_indicator_updates ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
 def update_db_with_indicators(updates):
-    """Write computed indicators back to daily_prices."""
-    if not updates:
+    """Write computed indicators back to daily_prices with one COPY + UPDATE per batch."""
+    if updates is None or updates.empty:
         raise IndicatorComputationError("No indicator updates produced")
 
+    set_clause = ",\n                    ".join(
+        f"{name} = tmp.{name}" for name, _ in INDICATOR_COLUMNS
+    )
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            sql = """
-                UPDATE daily_prices
-                SET ema_10 = %(ema_10)s,
-                    ema_20 = %(ema_20)s,
-                    ema_50 = %(ema_50)s,
-                    ema_200 = %(ema_200)s,
-                    rsi_14 = %(rsi_14)s,
-                    below_200ema = %(below_200ema)s,
-                    ema_200_slope_20 = %(ema_200_slope_20)s,
-                    rolling_high_6m = %(rolling_high_6m)s,
-                    avg_volume_20d = %(avg_volume_20d)s,
-                    rs_90d = %(rs_90d)s,
-                    high_10d = %(high_10d)s,
-                    low_5d = %(low_5d)s,
-                    atr_14 = %(atr_14)s
-                WHERE symbol = %(symbol)s AND date = %(date)s
-            """
-            execute_batch(cur, sql, updates, page_size=2000)
+            _copy_updates_to_temp_table(cur, updates)
+            cur.execute(
+                f"""
+                UPDATE daily_prices dp
+                SET {set_clause},
+                    indicators_updated_at = NOW()
+                FROM tmp_indicator_updates tmp
+                WHERE dp.symbol = tmp.symbol AND dp.date = tmp.date
+                """
+            )
+            written = cur.rowcount
         conn.commit()
-        logger.info("Wrote %d indicator updates to DB", len(updates))
+        logger.info("Wrote %d indicator updates to DB (%d rows matched)", len(updates), written)
         verify_updates_written(updates)
     except Exception as exc:
         conn.rollback()
@@ -404,17 +814,81 @@ def compute_indicators_for_symbols(symbols: list):
     if not symbols:
         return
     add_indicator_columns_if_missing()
+    ensure_indicator_state_table()
     data_df, idx_df = fetch_data(symbols)
     updates = compute_indicators(data_df, idx_df)
     update_db_with_indicators(updates)
+    refresh_indicator_states(data_df, idx_df)
     validate_indicators_after_update()
 
 
-def compute_indicators_all(symbol_batch_size=25, max_batches=None):
-    """Recompute indicators for every symbol that still needs them."""
+def _process_symbol_batch(batch_num, symbol_batch):
+    """
+    Fetch, compute, write and verify one symbol batch; returns rows written.
+
+    Runs either inline or inside a worker process. Every step opens its own
+    connection, so workers never share one.
+    """
+    logger.info(
+        "Processing indicator batch %d (%d symbols)",
+        batch_num,
+        len(symbol_batch),
+    )
+
+    data_df, idx_df = fetch_data(symbol_batch)
+    updates = compute_indicators(data_df, idx_df)
+    if updates.empty:
+        logger.warning(
+            "Batch %d produced no updates for %d symbols",
+            batch_num,
+            len(symbol_batch),
+        )
+        return 0
+
+    update_db_with_indicators(updates)
+    refresh_indicator_states(data_df, idx_df)
+    return len(updates)
+
+
+def _run_batches_in_pool(batches, workers):
+    """Fan symbol batches out to worker processes; stop on the first failure."""
+    total_updates = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_process_symbol_batch, batch_num, symbol_batch): batch_num
+            for batch_num, symbol_batch in batches
+        }
+        try:
+            for future in as_completed(futures):
+                written = future.result()
+                total_updates += written
+                logger.info(
+                    "Completed batch %d: %d updates written; running total %d",
+                    futures[future],
+                    written,
+                    total_updates,
+                )
+        except BaseException:
+            for pending in futures:
+                pending.cancel()
+            raise
+    return total_updates
+
+
+def compute_indicators_all(symbol_batch_size=25, max_batches=None, workers=None):
+    """
+    Recompute indicators for every symbol that still needs them.
+
+    ``workers`` > 1 processes batches concurrently in separate processes, each
+    with its own DB connections (default: MRI_INDICATOR_WORKERS, else 1). A
+    failing batch still aborts the run with IndicatorComputationError.
+    """
     logger.info("Starting validated indicator recomputation")
+    if workers is None:
+        workers = int(os.environ.get("MRI_INDICATOR_WORKERS", "1"))
     try:
         add_indicator_columns_if_missing()
+        ensure_indicator_state_table()
         symbols = fetch_symbols_needing_repair()
 
         if not symbols:
@@ -424,51 +898,167 @@ def compute_indicators_all(symbol_batch_size=25, max_batches=None):
 
         logger.info("Found %d symbols with NULL indicators", len(symbols))
 
-        total_updates = 0
-        for batch_num, symbol_batch in enumerate(chunked(symbols, symbol_batch_size), start=1):
+        batches = list(enumerate(chunked(symbols, symbol_batch_size), start=1))
+        if max_batches is not None and len(batches) > max_batches:
             logger.info(
-                "Processing indicator batch %d (%d symbols)",
-                batch_num,
-                len(symbol_batch),
+                "Reached configured batch limit of %d; pausing recompute for this run",
+                max_batches,
             )
+            batches = batches[:max_batches]
+
+        if workers > 1 and len(batches) > 1:
+            logger.info("Running %d batches across %d worker processes", len(batches), workers)
+            total_updates = _run_batches_in_pool(batches, workers)
+        else:
+            total_updates = 0
+            for batch_num, symbol_batch in batches:
+                written = _process_symbol_batch(batch_num, symbol_batch)
+                total_updates += written
+                if written:
+                    logger.info(
+                        "Completed batch %d: %d updates written; running total %d",
+                        batch_num,
+                        written,
+                        total_updates,
+                    )
 
-            data_df, idx_df = fetch_data(symbol_batch)
-            updates = compute_indicators(data_df, idx_df)
-            if not updates:
-                logger.warning(
-                    "Batch %d produced no updates for %d symbols",
-                    batch_num,
-                    len(symbol_batch),
-                )
+        if total_updates == 0:
+            raise IndicatorComputationError("Indicator computation produced zero updates")
+
+        null_rate = validate_indicators_after_update()
+        logger.info(
+            "Indicator fix complete; NULL EMA-50 rate: %.1f%%; total updates written: %d",
+            null_rate,
+            total_updates,
+        )
+    except IndicatorComputationError:
+        logger.exception("Indicator computation failed validation")
+        raise
+    except Exception as exc:
+        logger.exception("Unexpected indicator engine error")
+        raise IndicatorComputationError(f"Unexpected error: {exc}") from exc
+
+
+def compute_indicators_incremental(symbol_batch_size=500):
+    """
+    Advance indicators only for bars ingested since the last run.
+
+    Reads the last INCREMENTAL_TAIL_ROWS bars per pending symbol instead of its
+    full history and writes just the new rows. Symbols that cannot be seeded
+    from stored state are recomputed through the full-history path.
+    """
+    logger.info("Starting incremental indicator update")
+    try:
+        add_indicator_columns_if_missing()
+        symbols = fetch_symbols_pending_update()
+        if not symbols:
+            logger.info("No symbols have pending indicator bars")
+            return 0
+
+        logger.info("Found %d symbols with pending indicator bars", len(symbols))
+
+        total_updates = 0
+        fallback_symbols = []
+        for batch_num, symbol_batch in enumerate(chunked(symbols, symbol_batch_size), start=1):
+            data_df, idx_df = fetch_tail_data(symbol_batch)
+            frame, fallback = compute_incremental_indicator_frame(data_df, idx_df)
+            fallback_symbols.extend(fallback)
+            if frame.empty:
                 continue
 
+            updates = _prepare_updates(frame)
             update_db_with_indicators(updates)
             total_updates += len(updates)
             logger.info(
-                "Completed batch %d: %d updates written; running total %d",
+                "Completed incremental batch %d: %d updates written; running total %d",
                 batch_num,
                 len(updates),
                 total_updates,
             )
 
-            if max_batches is not None and batch_num >= max_batches:
-                logger.info(
-                    "Reached configured batch limit of %d; pausing recompute for this run",
-                    max_batches,
+        if fallback_symbols:
+            logger.info(
+                "Recomputing %d symbols from full history (no usable seed state)",
+                len(fallback_symbols),
+            )
+            for symbol_batch in chunked(fallback_symbols, 25):
+                data_df, idx_df = fetch_data(symbol_batch)
+                updates = compute_indicators(data_df, idx_df)
+                if updates.empty:
+                    continue
+                update_db_with_indicators(updates)
+                total_updates += len(updates)
+
+        logger.info("Incremental indicator update complete; %d updates written", total_updates)
+        return total_updates
+    except IndicatorComputationError:
+        logger.exception("Incremental indicator update failed validation")
+        raise
+    except Exception as exc:
+        logger.exception("Unexpected indicator engine error")
+        raise IndicatorComputationError(f"Unexpected error: {exc}") from exc
+
+
+def compute_indicators_streaming(symbols=None, symbol_batch_size=25):
+    """
+    Advance indicators by the bars added since each symbol's stored state.
+
+    Symbols already in indicator_state are advanced one bar at a time without
+    reading their history; symbols without state are bootstrapped once from
+    their full history through the vectorized path. ``symbols`` limits the run
+    to a subset (default: the whole universe).
+    """
+    logger.info("Starting streaming indicator update")
+    try:
+        add_indicator_columns_if_missing()
+        ensure_indicator_state_table()
+
+        total_updates = 0
+        rows, idx_closes = fetch_bars_since_state(symbols)
+        if rows:
+            states = load_indicator_states({row["symbol"] for row in rows})
+            advanced = []
+            for row in rows:
+                state = states[row["symbol"]]
+                advanced.append(
+                    state.advance(
+                        pd.Timestamp(row["date"]),
+                        row["high"],
+                        row["low"],
+                        row["close"],
+                        row["volume"],
+                        idx_closes.get(row["date"]),
+                    )
                 )
-                break
 
-        if total_updates == 0:
-            raise IndicatorComputationError("Indicator computation produced zero updates")
+            updates = _prepare_updates(pd.DataFrame(advanced))
+            update_db_with_indicators(updates)
+            save_indicator_states(list(states.values()))
+            total_updates += len(updates)
+            logger.info(
+                "Advanced %d bars across %d symbols from stored state",
+                len(updates),
+                len(states),
+            )
 
-        null_rate = validate_indicators_after_update()
-        logger.info(
-            "Indicator fix complete; NULL EMA-50 rate: %.1f%%; total updates written: %d",
-            null_rate,
-            total_updates,
-        )
+        missing = fetch_symbols_without_state()
+        if symbols is not None:
+            wanted = set(symbols)
+            missing = [symbol for symbol in missing if symbol in wanted]
+        if missing:
+            logger.info("Bootstrapping indicator state for %d symbols", len(missing))
+        for symbol_batch in chunked(missing, symbol_batch_size):
+            data_df, idx_df = fetch_data(symbol_batch)
+            updates = compute_indicators(data_df, idx_df)
+            if not updates.empty:
+                update_db_with_indicators(updates)
+                total_updates += len(updates)
+            refresh_indicator_states(data_df, idx_df)
+
+        logger.info("Streaming indicator update complete; %d updates written", total_updates)
+        return total_updates
     except IndicatorComputationError:
-        logger.exception("Indicator computation failed validation")
+        logger.exception("Streaming indicator update failed validation")
         raise
     except Exception as exc:
         logger.exception("Unexpected indicator engine error")
@@ -476,8 +1066,16 @@ def compute_indicators_all(symbol_batch_size=25, max_batches=None):
 
 
 if __name__ == "__main__":
-    import os
-
     batch_limit_raw = os.environ.get("MRI_INDICATOR_MAX_BATCHES")
     batch_limit = int(batch_limit_raw) if batch_limit_raw else None
+    # "full" (default) only runs the repair pass, as before. Opt in with
+    # "streaming", which advances stored per-symbol state by the new bars, or
+    # "incremental", which reseeds from the stored EMA columns over a tail
+    # window. Every mode finishes with the repair pass so genuinely broken
+    # symbols are still recomputed from history.
+    mode = os.environ.get("MRI_INDICATOR_MODE", "full").lower()
+    if mode == "streaming":
+        compute_indicators_streaming()
+    elif mode == "incremental":
+        compute_indicators_incremental()
     compute_indicators_all(max_batches=batch_limit)
@@ -0,0 +1,314 @@
+"""
+Persisted per-symbol indicator state for one-bar-at-a-time advancement.
+
+Each ``indicator_state`` row carries everything the daily indicator set depends
+on: the running EMA values, the RSI gain/loss windows, the true-range window and
+ring buffers for the 126-bar closing high, 20-bar volume, 10-bar high, 5-bar low
+and the 90-session RS lookback. Advancing a symbol by one new ``daily_prices``
+row is then O(1) and never touches its older history.
+
+The windows reproduce the rolling semantics of
+``indicator_engine.compute_indicator_frame`` (same minimum periods, same NaN
+handling), so a streamed bar matches the full recompute.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass, field
+
+from psycopg2.extras import execute_batch
+
+from engine_core.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+EMA_SPANS = {"ema_10": 10, "ema_20": 20, "ema_50": 50, "ema_200": 200}
+
+# Ring-buffer lengths. The EMA windows keep 21 values so the 20-bar slope can
+# be taken as newest - oldest.
+WINDOW_SIZES = {
+    "ema_50_window": 21,
+    "ema_200_window": 21,
+    "gain_window": 14,
+    "loss_window": 14,
+    "tr_window": 14,
+    "close_window": 126,
+    "volume_window": 20,
+    "high_window": 10,
+    "low_window": 5,
+    "rs_close_window": 91,
+    "rs_idx_window": 91,
+}
+
+ROLLING_HIGH_MIN_PERIODS = 20
+
+
+def _nan():
+    return float("nan")
+
+
+def _is_num(value):
+    return value is not None and not math.isnan(value)
+
+
+def _full_mean(window):
+    """Mean of a full window with no missing values, else NaN (rolling(n).mean())."""
+    if len(window) < window.maxlen or not all(_is_num(v) for v in window):
+        return _nan()
+    return sum(window) / len(window)
+
+
+@dataclass
+class IndicatorState:
+    symbol: str
+    last_date: object = None
+    bar_count: int = 0
+    last_close: float = field(default_factory=_nan)
+    close_gap: int = 0
+    ema_10: float = field(default_factory=_nan)
+    ema_20: float = field(default_factory=_nan)
+    ema_50: float = field(default_factory=_nan)
+    ema_200: float = field(default_factory=_nan)
+    ema_50_window: deque = None
+    ema_200_window: deque = None
+    gain_window: deque = None
+    loss_window: deque = None
+    tr_window: deque = None
+    close_window: deque = None
+    volume_window: deque = None
+    high_window: deque = None
+    low_window: deque = None
+    rs_close_window: deque = None
+    rs_idx_window: deque = None
+
+    def __post_init__(self):
+        for name, size in WINDOW_SIZES.items():
+            setattr(self, name, deque(getattr(self, name) or (), maxlen=size))
+
+    def advance(self, date, high, low, close, volume, idx_close=None):
+        """
+        Advance the state by one bar in place and return that bar's indicators.
+
+        ``idx_close`` is the NIFTY50 close for ``date`` when the index traded
+        that day; RS is only defined on shared sessions.
+        """
+        high, low, close, volume = (
+            _nan() if v is None else float(v) for v in (high, low, close, volume)
+        )
+        prev_close = self.last_close
+        self.bar_count += 1
+
+        for column, span in EMA_SPANS.items():
+            previous = getattr(self, column)
+            if not _is_num(previous):
+                value = close
+            elif not _is_num(close):
+                value = previous
+            else:
+                # Same arithmetic as pandas ewm(adjust=False): a run of missing
+                # closes decays the previous weight once per skipped bar.
+                alpha = 2.0 / (span + 1)
+                old_wt = (1 - alpha) ** (self.close_gap + 1)
+                value = (old_wt * previous + alpha * close) / (old_wt + alpha)
+            setattr(self, column, value)
+        has_ema = _is_num(self.ema_10)
+        self.close_gap = self.close_gap + 1 if has_ema and not _is_num(close) else 0
+
+        self.ema_50_window.append(self.ema_50)
+        self.ema_200_window.append(self.ema_200)
+        # Histories shorter than 200 bars report EMA-50 in place of EMA-200.
+        # Unlike the full recompute, bars streamed before the 200th are not
+        # rewritten once it arrives.
+        if self.bar_count >= EMA_SPANS["ema_200"]:
+            ema_200, slope_window = self.ema_200, self.ema_200_window
+        else:
+            ema_200, slope_window = self.ema_50, self.ema_50_window
+        if len(slope_window) == slope_window.maxlen:
+            slope = slope_window[-1] - slope_window[0]
+        else:
+            slope = _nan()
+
+        delta = close - prev_close
+        self.gain_window.append(delta if delta > 0 else 0.0)
+        self.loss_window.append(-delta if delta < 0 else 0.0)
+        avg_gain = _full_mean(self.gain_window)
+        avg_loss = _full_mean(self.loss_window)
+        rsi = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-9)))
+
+        true_ranges = [
+            v for v in (high - low, abs(high - prev_close), abs(low - prev_close)) if _is_num(v)
+        ]
+        self.tr_window.append(max(true_ranges) if true_ranges else _nan())
+        atr = _full_mean(self.tr_window)
+
+        # high_10d / low_5d exclude the current bar (shift(1)).
+        high_10d = (
+            max(self.high_window)
+            if len(self.high_window) == self.high_window.maxlen
+            and all(_is_num(v) for v in self.high_window)
+            else _nan()
+        )
+        low_5d = (
+            min(self.low_window)
+            if len(self.low_window) == self.low_window.maxlen
+            and all(_is_num(v) for v in self.low_window)
+            else _nan()
+        )
+        self.high_window.append(high)
+        self.low_window.append(low)
+
+        self.close_window.append(close)
+        closes = [v for v in self.close_window if _is_num(v)]
+        rolling_high = max(closes) if len(closes) >= ROLLING_HIGH_MIN_PERIODS else _nan()
+
+        self.volume_window.append(volume)
+        avg_volume = _full_mean(self.volume_window)
+
+        rs_90d = _nan()
+        if idx_close is not None:
+            self.rs_close_window.append(close)
+            self.rs_idx_window.append(float(idx_close))
+            if len(self.rs_close_window) == self.rs_close_window.maxlen:
+                stock_ret = close / self.rs_close_window[0]
+                idx_ret = self.rs_idx_window[-1] / self.rs_idx_window[0]
+                rs_90d = (stock_ret / idx_ret) * 100
+
+        self.last_close = close
+        self.last_date = date
+
+        return {
+            "symbol": self.symbol,
+            "date": date,
+            "ema_10": self.ema_10,
+            "ema_20": self.ema_20,
+            "ema_50": self.ema_50,
+            "ema_200": ema_200,
+            "rsi_14": rsi,
+            "below_200ema": bool(close < ema_200),
+            "ema_200_slope_20": slope,
+            "rolling_high_6m": rolling_high,
+            "avg_volume_20d": avg_volume,
+            "rs_90d": rs_90d,
+            "high_10d": high_10d,
+            "low_5d": low_5d,
+            "atr_14": atr,
+        }
+
+    def to_record(self):
+        """Flatten the state into a row for the indicator_state table."""
+        record = {
+            "symbol": self.symbol,
+            "last_date": self.last_date,
+            "bar_count": self.bar_count,
+            "last_close": self.last_close,
+            "close_gap": self.close_gap,
+        }
+        for column in EMA_SPANS:
+            record[column] = getattr(self, column)
+        for name in WINDOW_SIZES:
+            record[name] = list(getattr(self, name))
+        return record
+
+    @classmethod
+    def from_record(cls, row):
+        """Rehydrate a state from an indicator_state row."""
+        kwargs = {
+            "symbol": row["symbol"],
+            "last_date": row["last_date"],
+            "bar_count": row["bar_count"],
+            "last_close": _nan() if row["last_close"] is None else float(row["last_close"]),
+            "close_gap": row["close_gap"] or 0,
+        }
+        for column in EMA_SPANS:
+            kwargs[column] = _nan() if row[column] is None else float(row[column])
+        for name in WINDOW_SIZES:
+            kwargs[name] = [float(v) for v in (row[name] or [])]
+        return cls(**kwargs)
+
+
+def ensure_indicator_state_table():
+    """Create the indicator_state table if it does not exist."""
+    window_columns = ",\n            ".join(f"{name} DOUBLE PRECISION[]" for name in WINDOW_SIZES)
+    ema_columns = ",\n            ".join(f"{name} DOUBLE PRECISION" for name in EMA_SPANS)
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS indicator_state (
+                    symbol      VARCHAR(20) PRIMARY KEY,
+                    last_date   DATE NOT NULL,
+                    bar_count   INT NOT NULL,
+                    last_close  DOUBLE PRECISION,
+                    close_gap   INT NOT NULL DEFAULT 0,
+                    {ema_columns},
+                    {window_columns},
+                    updated_at  TIMESTAMPTZ DEFAULT NOW()
+                )
+                """
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def load_indicator_states(symbols=None):
+    """Return {symbol: IndicatorState} for the requested symbols (all when None)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            if symbols is None:
+                cur.execute("SELECT * FROM indicator_state")
+            else:
+                cur.execute("SELECT * FROM indicator_state WHERE symbol = ANY(%s)", (list(symbols),))
+            return {row["symbol"]: IndicatorState.from_record(row) for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def fetch_indicator_state_dates(symbols):
+    """Return {symbol: last_date} for symbols that already have streamed state."""
+    if not symbols:
+        return {}
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT symbol, last_date FROM indicator_state WHERE symbol = ANY(%s)",
+                (list(symbols),),
+            )
+            return {row["symbol"]: row["last_date"] for row in cur.fetchall()}
+    except Exception as exc:
+        # The table is created lazily by the indicator engine; callers just
+        # fall back to a full download window when it is not there yet.
+        logger.warning("Could not read indicator_state dates: %s", exc)
+        return {}
+    finally:
+        conn.close()
+
+
+def save_indicator_states(states):
+    """Upsert the given IndicatorState objects."""
+    if not states:
+        return
+    columns = ["symbol", "last_date", "bar_count", "last_close", "close_gap"] + list(EMA_SPANS) + list(WINDOW_SIZES)
+    updates = ",\n                ".join(
+        f"{name} = EXCLUDED.{name}" for name in columns if name != "symbol"
+    )
+    sql = f"""
+        INSERT INTO indicator_state ({", ".join(columns)}, updated_at)
+        VALUES ({", ".join(f"%({name})s" for name in columns)}, NOW())
+        ON CONFLICT (symbol) DO UPDATE SET
+            {updates},
+            updated_at = NOW()
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            execute_batch(cur, sql, [state.to_record() for state in states], page_size=500)
+        conn.commit()
+        logger.info("Saved indicator state for %d symbols", len(states))
+    finally:
+        conn.close()
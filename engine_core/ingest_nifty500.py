@@ -11,15 +11,16 @@ Usage:
     source venv/bin/activate
     PYTHONPATH=. python3 src/ingest_nifty500.py
 
-Resumes from where it left off (ON CONFLICT DO NOTHING on existing rows).
-Estimated time: 30-60 minutes for 500 stocks × 22 years.
+Downloads are batched and rate-limited by engine_core.yahoo_scheduler
+(YAHOO_RATE_PER_SEC / YAHOO_BATCH_SIZE / YAHOO_MAX_WORKERS). Resumes from where
+it left off: symbols already inserted this run are recorded in
+outputs/nifty500_checkpoint.json, and existing rows are skipped
+(ON CONFLICT DO NOTHING).
 """
-import time
 import logging
 import io
 import requests
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
 from dotenv import load_dotenv
 import os
@@ -27,6 +28,7 @@ import os
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 from engine_core.db import get_connection, insert_daily_prices
+from engine_core.yahoo_scheduler import DownloadCheckpoint, DownloadJob, DownloadScheduler
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,8 +47,10 @@ END_DATE   = datetime.today().strftime("%Y-%m-%d")
 # NSE Nifty 500 constituent list (current)
 NIFTY500_URL = "https://archives.nseindia.com/content/indices/ind_nifty500list.csv"
 
-# Throttle: wait between stocks to avoid yfinance rate limiting
-SLEEP_BETWEEN_STOCKS = 0.5  # seconds
+CHECKPOINT_PATH = "outputs/nifty500_checkpoint.json"
+
+# Minimum rows for an exchange's history to count (else try the next suffix)
+MIN_HISTORY_ROWS = 50
 
 
 def fetch_nifty500_symbols() -> list[str]:
@@ -96,30 +100,6 @@ def flatten_yf_columns(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
     return df
 
 
-def download_stock(symbol: str) -> pd.DataFrame:
-    """Download full history for a symbol, trying NSE (.NS), then BSE (.BO)."""
-    for suffix in [".NS", ".BO"]:
-        ticker = f"{symbol}{suffix}"
-        try:
-            raw = yf.download(
-                ticker,
-                start=START_DATE,
-                end=END_DATE,
-                progress=False,
-                auto_adjust=True,
-            )
-            if raw is not None and not raw.empty:
-                df = flatten_yf_columns(raw, ticker)
-                if "close" in df.columns and len(df) > 50:
-                    logger.info(f"  ✓ {ticker}: {len(df)} rows")
-                    return df, ticker
-        except Exception as e:
-            logger.debug(f"  {ticker} failed: {e}")
-
-    logger.warning(f"  ✗ {symbol}: no data on NSE or BSE")
-    return pd.DataFrame(), None
-
-
 def prepare_records(df: pd.DataFrame, symbol: str) -> list[dict]:
     """Convert a yfinance DataFrame to a list of dicts for insert_daily_prices."""
     if "close" not in df.columns:
@@ -159,31 +139,44 @@ def run():
 
     logger.info(f"Symbols to ingest: {len(to_ingest)} (skipping {len(already_done)} already complete)")
 
-    failed = []
+    checkpoint = DownloadCheckpoint(CHECKPOINT_PATH, run_key=f"{START_DATE}:{END_DATE}")
+    scheduler = DownloadScheduler(checkpoint=checkpoint)
     total = len(to_ingest)
 
-    for i, symbol in enumerate(to_ingest, 1):
-        logger.info(f"[{i}/{total}] Processing {symbol}...")
-        try:
-            df, source_ticker = download_stock(symbol)
-            if df.empty:
-                failed.append(symbol)
-                continue
-
-            records = prepare_records(df, symbol)
-            if not records:
-                logger.warning(f"  {symbol}: no usable records after cleanup.")
-                failed.append(symbol)
-                continue
-
-            insert_daily_prices(records)
-            logger.info(f"  Inserted {len(records)} rows for {symbol}")
-
-        except Exception as e:
-            logger.error(f"  ERROR on {symbol}: {e}")
-            failed.append(symbol)
-
-        time.sleep(SLEEP_BETWEEN_STOCKS)
+    def insert_batch(frames):
+        """Insert one downloaded batch; returns the symbols that made it in."""
+        accepted = []
+        for symbol, raw in frames.items():
+            try:
+                df = flatten_yf_columns(raw, symbol)
+                if "close" not in df.columns or len(df) <= MIN_HISTORY_ROWS:
+                    continue
+                records = prepare_records(df, symbol)
+                if not records:
+                    logger.warning(f"  {symbol}: no usable records after cleanup.")
+                    continue
+                insert_daily_prices(records)
+                logger.info(f"  Inserted {len(records)} rows for {symbol}")
+                accepted.append(symbol)
+            except Exception as e:
+                logger.error(f"  ERROR on {symbol}: {e}")
+        return accepted
+
+    # Step 3: NSE first; whatever has no usable NSE history is retried on BSE
+    pending = to_ingest
+    for suffix in [".NS", ".BO"]:
+        if not pending:
+            break
+        jobs = [DownloadJob(s, f"{s}{suffix}", {"start": START_DATE, "end": END_DATE}) for s in pending]
+        report = scheduler.run(jobs, on_batch=insert_batch)
+        pending = report.missing + report.failed
+        logger.info(f"{suffix}: {len(report.accepted)} ingested, {len(pending)} without usable data")
+
+    failed = [s for s in to_ingest if s not in checkpoint.done]
+    for symbol in failed:
+        logger.warning(f"  ✗ {symbol}: no data on NSE or BSE")
+    if not failed:
+        checkpoint.clear()
 
     # Summary
     logger.info("=" * 60)
@@ -1,8 +1,10 @@
 import logging
 import yfinance as yf
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
-from engine_core.db import get_connection, insert_index_prices, initialize_core_schema_v100
+from datetime import timedelta
+from engine_core.db import insert_daily_prices, insert_index_prices, initialize_core_schema_v100
+from engine_core.indicator_state import fetch_indicator_state_dates
+from engine_core.yahoo_scheduler import DownloadJob, DownloadScheduler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,6 +14,7 @@ def load_indices():
     logger.info("📡 [engine_core] Ingesting Index Data...")
     initialize_core_schema_v100()
     tickers = ["^NSEI", "^BSESN"]
+    all_records = []
     for ticker in tickers:
         try:
             df = yf.download(ticker, period="300d", auto_adjust=True, progress=False).reset_index()
@@ -50,11 +53,14 @@ def load_indices():
             if not records:
                 logger.error(f"  ❌ {ticker}: Produced 0 records after filtering. Check columns: {df.columns.tolist()}")
             else:
-                insert_index_prices(records)
-                logger.info(f"  ✅ {final_df['symbol'].iloc[0]} synced ({len(records)} rows).")
+                all_records.extend(records)
+                logger.info(f"  ✅ {final_df['symbol'].iloc[0]} fetched ({len(records)} rows).")
         except Exception as e:
             logger.error(f"  ❌ {ticker} failed: {e}")
 
+    if all_records:
+        insert_index_prices(all_records)
+
 def validate_data(symbol, df):
     """
     Sanity check for Yahoo Finance data.
@@ -82,17 +88,33 @@ def validate_data(symbol, df):
             
     return True, "OK"
 
-def load_stocks(symbols):
-    """Full Stock Ingestion for CSV list (v100.4)."""
+def load_stocks(symbols, period="300d", scheduler=None):
+    """
+    Full Stock Ingestion for CSV list (v100.4).
+
+    Downloads go through the rate-limited batch scheduler
+    (engine_core.yahoo_scheduler); every symbol's rows are then merged into
+    daily_prices with one bulk load instead of a connection per symbol.
+    ``period`` is the download window for symbols without streamed state.
+    """
     if not symbols: return
     logger.info(f"📡 [engine_core] Processing {len(symbols)} stocks (CSV list)...")
-    
-    def fetch_stock(symbol):
+
+    # Symbols with streamed indicator state only need bars since their last
+    # processed date (a few days of overlap covers late corrections).
+    state_dates = fetch_indicator_state_dates(symbols)
+
+    def download_job(symbol):
+        # Suffix handle for NSE
+        ticker = symbol if symbol.endswith(".NS") or symbol.endswith(".BO") or "^" in symbol else f"{symbol}.NS"
+        last_date = state_dates.get(symbol)
+        window = {"start": last_date - timedelta(days=5)} if last_date else {"period": period}
+        return DownloadJob(symbol, ticker, window)
+
+    def prepare_stock(symbol, df):
         try:
-            # Suffix handle for NSE
-            ticker = symbol if symbol.endswith(".NS") or symbol.endswith(".BO") or "^" in symbol else f"{symbol}.NS"
-            df = yf.download(ticker, period="300d", auto_adjust=True, progress=False).reset_index()
-            
+            df = df.reset_index()
+
             # Normalize columns first
             if isinstance(df.columns, pd.MultiIndex):
                 df.columns = [
@@ -108,7 +130,7 @@ def load_stocks(symbols):
             is_valid, reason = validate_data(symbol, df)
             if not is_valid:
                 logger.warning(f"  ⚠️ {symbol} rejected by Audit: {reason}")
-                return False
+                return None
             
             df['symbol'] = symbol
             
@@ -118,23 +140,22 @@ def load_stocks(symbols):
                 if col in df.columns:
                     df[col] = df[col].fillna(df['close'])
 
-            records = df[['symbol', 'date', 'open', 'high', 'low', 'close', 'volume']].dropna(subset=['date', 'close']).to_dict('records')
-            
-            # Use dedicated stock insertion
-            conn = get_connection()
-            with conn.cursor() as cur:
-                # Target 'daily_prices' as per original schema
-                from psycopg2.extras import execute_batch
-                execute_batch(cur, "INSERT INTO daily_prices (symbol, date, open, high, low, close, volume) VALUES (%(symbol)s, %(date)s, %(open)s, %(high)s, %(low)s, %(close)s, %(volume)s) ON CONFLICT (symbol, date) DO NOTHING;", records)
-                conn.commit()
-            conn.close()
-            return True
+            return df[['symbol', 'date', 'open', 'high', 'low', 'close', 'volume']].dropna(subset=['date', 'close']).to_dict('records')
         except Exception as e:
             logger.error(f"  ❌ {symbol} failed: {e}")
-            return False
+            return None
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        results = list(executor.map(fetch_stock, symbols))
-    
-    success_count = sum(results)
-    logger.info(f"✅ CSV Ingestion Complete: {success_count}/{len(symbols)} symbols synced.")
+    scheduler = scheduler or DownloadScheduler()
+    report = scheduler.run([download_job(symbol) for symbol in symbols])
+    for symbol in report.missing:
+        logger.warning(f"  ⚠️ {symbol} rejected by Audit: Empty DataFrame")
+    for symbol in report.failed:
+        logger.error(f"  ❌ {symbol} failed: download retries exhausted")
+
+    fetched = [records for records in (prepare_stock(s, df) for s, df in report.frames.items()) if records is not None]
+    counts = insert_daily_prices([row for records in fetched for row in records])
+    logger.info(
+        f"✅ CSV Ingestion Complete: {len(fetched)}/{len(symbols)} symbols synced "
+        f"({counts['inserted']} new rows, {counts['duplicates']} duplicates)."
+    )
+    return counts
@@ -0,0 +1,110 @@
+"""
+latest_stock_state: one compact row per symbol with its newest price/indicator
+row from daily_prices and its newest stock_scores row.
+
+The scoring step refreshes the rows it touched inside its own transaction, so
+readers never see scores and latest state out of step. Reads are then a
+primary-key lookup per symbol instead of a ``DISTINCT ON (symbol) ... ORDER BY
+date DESC`` scan over the full price/score history.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+LATEST_STOCK_STATE_SQL = """
+    CREATE TABLE IF NOT EXISTS latest_stock_state (
+        symbol                   VARCHAR(20) PRIMARY KEY,
+        price_date               DATE,
+        close                    NUMERIC(12,4),
+        ema_50                   NUMERIC(12,4),
+        ema_200                  NUMERIC(12,4),
+        rs_90d                   NUMERIC(12,4),
+        avg_volume_20d           NUMERIC(20,4),
+        score_date               DATE,
+        total_score              INT,
+        condition_ema_50_200     BOOLEAN,
+        condition_ema_200_slope  BOOLEAN,
+        condition_6m_high        BOOLEAN,
+        condition_volume         BOOLEAN,
+        condition_rs             BOOLEAN,
+        updated_at               TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+_STATE_COLUMNS = [
+    "price_date", "close", "ema_50", "ema_200", "rs_90d", "avg_volume_20d",
+    "score_date", "total_score", "condition_ema_50_200", "condition_ema_200_slope",
+    "condition_6m_high", "condition_volume", "condition_rs",
+]
+
+_REFRESH_SQL = """
+    INSERT INTO latest_stock_state (symbol, {columns}, updated_at)
+    SELECT COALESCE(p.symbol, s.symbol),
+           p.date, p.close, p.ema_50, p.ema_200, p.rs_90d, p.avg_volume_20d,
+           s.date, s.total_score, s.condition_ema_50_200, s.condition_ema_200_slope,
+           s.condition_6m_high, s.condition_volume, s.condition_rs,
+           NOW()
+    FROM (
+        SELECT DISTINCT ON (symbol) symbol, date, close, ema_50, ema_200, rs_90d, avg_volume_20d
+        FROM daily_prices
+        {where}
+        ORDER BY symbol, date DESC
+    ) p
+    FULL OUTER JOIN (
+        SELECT DISTINCT ON (symbol) symbol, date, total_score,
+               condition_ema_50_200, condition_ema_200_slope,
+               condition_6m_high, condition_volume, condition_rs
+        FROM stock_scores
+        {where}
+        ORDER BY symbol, date DESC
+    ) s ON s.symbol = p.symbol
+    ON CONFLICT (symbol) DO UPDATE SET
+        {updates},
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def ensure_latest_stock_state_table(cur):
+    """Create latest_stock_state and seed it once from the history tables."""
+    cur.execute(LATEST_STOCK_STATE_SQL)
+    cur.execute("""
+        SELECT to_regclass('public.daily_prices') IS NOT NULL
+           AND to_regclass('public.stock_scores') IS NOT NULL AS ready,
+               EXISTS (SELECT 1 FROM latest_stock_state) AS seeded
+    """)
+    row = cur.fetchone()
+    ready, seeded = (row["ready"], row["seeded"]) if isinstance(row, dict) else row
+    if ready and not seeded:
+        refresh_latest_stock_state(cur)
+
+
+def refresh_latest_stock_state(cur, symbols=None):
+    """
+    Rebuild latest_stock_state rows for ``symbols`` (all symbols when None).
+
+    Runs on the caller's cursor and does not commit, so it lands in the same
+    transaction as the score writes. Returns the number of rows written.
+    """
+    params = {}
+    where = ""
+    if symbols is not None:
+        symbols = sorted({str(s).upper().strip() for s in symbols if str(s).strip()})
+        if not symbols:
+            return 0
+        where = "WHERE symbol = ANY(%(symbols)s)"
+        params["symbols"] = symbols
+    else:
+        # Full rebuild also drops symbols purged from the history tables.
+        cur.execute("DELETE FROM latest_stock_state")
+
+    cur.execute(
+        _REFRESH_SQL.format(
+            columns=", ".join(_STATE_COLUMNS),
+            where=where,
+            updates=",\n        ".join(f"{c} = EXCLUDED.{c}" for c in _STATE_COLUMNS),
+        ),
+        params,
+    )
+    written = cur.rowcount
+    logger.info(f"latest_stock_state refreshed for {written} symbols")
+    return written
@@ -0,0 +1,228 @@
+"""
+In-process cache of the "latest market snapshot" used by the read endpoints.
+
+The snapshot holds, per symbol, the newest stock_scores row and the newest
+daily_prices row (price + indicators), plus the current market_regime row.
+Readers get plain dictionary lookups instead of running
+``DISTINCT ON (symbol) ... ORDER BY date DESC`` scans on every request. It is
+loaded from the pipeline-maintained ``latest_stock_state`` table, falling back
+to the history tables until that table has been populated.
+
+Invalidation is versioned: the daily pipeline calls
+``publish_market_snapshot()`` after scoring / regime updates, which bumps a
+counter in ``market_snapshot_version``. Readers compare that counter (plus the
+latest score and regime dates, so a missed publish still refreshes) at most
+every ``MRI_SNAPSHOT_CHECK_SECONDS`` seconds and reload only when it moved.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from engine_core.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CHECK_SECONDS = float(os.environ.get("MRI_SNAPSHOT_CHECK_SECONDS", "30"))
+
+SNAPSHOT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS market_snapshot_version (
+        id            SMALLINT PRIMARY KEY DEFAULT 1,
+        version       BIGINT NOT NULL,
+        published_at  TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+
+@dataclass
+class MarketSnapshot:
+    version: tuple
+    regime: dict | None = None
+    scores: dict = field(default_factory=dict)
+    prices: dict = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def score(self, symbol):
+        return self.scores.get(symbol)
+
+    def price(self, symbol):
+        return self.prices.get(symbol)
+
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+def ensure_market_snapshot_table(cur):
+    cur.execute(SNAPSHOT_TABLE_SQL)
+
+
+def publish_market_snapshot():
+    """Bump the snapshot version so every process reloads on its next check."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            ensure_market_snapshot_table(cur)
+            cur.execute("""
+                INSERT INTO market_snapshot_version (id, version, published_at)
+                VALUES (1, 1, NOW())
+                ON CONFLICT (id) DO UPDATE SET
+                    version = market_snapshot_version.version + 1,
+                    published_at = NOW()
+            """)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Could not publish market snapshot version: {e}")
+    finally:
+        conn.close()
+    invalidate_market_snapshot()
+
+
+def invalidate_market_snapshot():
+    """Force the next reader in this process to re-check the version."""
+    global _checked_at
+    _checked_at = 0.0
+
+
+def _current_version(cur):
+    cur.execute("""
+        SELECT (SELECT MAX(date) FROM stock_scores) AS scores_date,
+               (SELECT MAX(date) FROM market_regime) AS regime_date
+    """)
+    row = cur.fetchone()
+    try:
+        cur.execute("SAVEPOINT snapshot_version")
+        cur.execute("SELECT version FROM market_snapshot_version WHERE id = 1")
+        published = cur.fetchone()
+        cur.execute("RELEASE SAVEPOINT snapshot_version")
+    except Exception:
+        # Table not created yet (no pipeline run since deploy): dates only.
+        cur.execute("ROLLBACK TO SAVEPOINT snapshot_version")
+        published = None
+    return (
+        published["version"] if published else None,
+        row["scores_date"],
+        row["regime_date"],
+    )
+
+
+def _load_latest_state(cur):
+    """Per-symbol rows from the pipeline-maintained latest_stock_state table."""
+    try:
+        cur.execute("SAVEPOINT snapshot_state")
+        cur.execute("SELECT * FROM latest_stock_state")
+        rows = cur.fetchall()
+        cur.execute("RELEASE SAVEPOINT snapshot_state")
+    except Exception:
+        cur.execute("ROLLBACK TO SAVEPOINT snapshot_state")
+        return {}, {}
+
+    scores, prices = {}, {}
+    for r in rows:
+        if r["score_date"] is not None:
+            scores[r["symbol"]] = {
+                "symbol": r["symbol"],
+                "total_score": r["total_score"],
+                "date": r["score_date"],
+                "condition_ema_50_200": r["condition_ema_50_200"],
+                "condition_ema_200_slope": r["condition_ema_200_slope"],
+                "condition_6m_high": r["condition_6m_high"],
+                "condition_volume": r["condition_volume"],
+                "condition_rs": r["condition_rs"],
+            }
+        if r["price_date"] is not None:
+            prices[r["symbol"]] = {
+                "symbol": r["symbol"],
+                "date": r["price_date"],
+                "close": r["close"],
+                "ema_50": r["ema_50"],
+                "ema_200": r["ema_200"],
+                "rs_90d": r["rs_90d"],
+                "avg_volume_20d": r["avg_volume_20d"],
+            }
+    return scores, prices
+
+
+def _load_from_history(cur):
+    """Fallback before latest_stock_state has been populated: scan the history tables."""
+    cur.execute("""
+        SELECT DISTINCT ON (symbol)
+               symbol, total_score, date,
+               condition_ema_50_200, condition_ema_200_slope,
+               condition_6m_high, condition_volume, condition_rs
+        FROM stock_scores
+        ORDER BY symbol, date DESC
+    """)
+    scores = {r["symbol"]: dict(r) for r in cur.fetchall()}
+
+    cur.execute("""
+        SELECT DISTINCT ON (symbol)
+               symbol, date, close, ema_50, ema_200, rs_90d, avg_volume_20d
+        FROM daily_prices
+        ORDER BY symbol, date DESC
+    """)
+    prices = {r["symbol"]: dict(r) for r in cur.fetchall()}
+    return scores, prices
+
+
+def _load(cur, version):
+    cur.execute("""
+        SELECT date, classification, sma_200, sma_200_slope_20
+        FROM market_regime ORDER BY date DESC LIMIT 1
+    """)
+    regime = cur.fetchone()
+
+    scores, prices = _load_latest_state(cur)
+    if not scores and not prices:
+        scores, prices = _load_from_history(cur)
+
+    return MarketSnapshot(
+        version=version,
+        regime=dict(regime) if regime else None,
+        scores=scores,
+        prices=prices,
+    )
+
+
+def get_market_snapshot(conn=None):
+    """
+    Return the cached MarketSnapshot, reloading it when a new version was published.
+
+    ``conn`` (optional) is used for the version check and reload; otherwise a
+    pooled engine connection is borrowed.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < SNAPSHOT_CHECK_SECONDS:
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and time.monotonic() - _checked_at < SNAPSHOT_CHECK_SECONDS:
+            return _snapshot
+
+        own_conn = conn is None
+        if own_conn:
+            conn = get_connection()
+        try:
+            from psycopg2.extras import RealDictCursor
+
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                version = _current_version(cur)
+                if _snapshot is None or _snapshot.version != version:
+                    started = time.monotonic()
+                    _snapshot = _load(cur, version)
+                    logger.info(
+                        f"Market snapshot loaded (version {version}): {len(_snapshot.scores)} scores, "
+                        f"{len(_snapshot.prices)} prices in {time.monotonic() - started:.2f}s"
+                    )
+            if own_conn:
+                conn.rollback()
+            _checked_at = time.monotonic()
+        finally:
+            if own_conn:
+                conn.close()
+        return _snapshot
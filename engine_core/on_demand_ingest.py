@@ -1,9 +1,10 @@
 import pandas as pd
 import yfinance as yf
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from engine_core.db import get_connection, insert_daily_prices
-from engine_core.indicator_engine import compute_indicators_for_symbols
+from engine_core.indicator_engine import compute_indicators_for_symbols, compute_indicators_streaming
+from engine_core.indicator_state import fetch_indicator_state_dates
 from engine_core.regime_engine import compute_stock_scores_for_symbols
 
 logging.basicConfig(level=logging.INFO)
@@ -33,13 +34,20 @@ def ingest_missing_symbols_sync(symbols, user_id='admin', user_email=None, user_
     pending_symbols = clean_symbols.copy()
     successful_symbols = []
 
+    # 2y period ensures we have enough data for EMA-200 / SMA-200. When every
+    # symbol already has streamed indicator state, only the recent bars are new.
+    state_dates = fetch_indicator_state_dates(clean_symbols)
+    if state_dates and len(state_dates) == len(clean_symbols):
+        download_window = {"start": min(state_dates.values()) - timedelta(days=5)}
+    else:
+        download_window = {"period": "2y"}
+
     # --- Tier 1: Bulk NSE (.NS) ---
     if pending_symbols:
         nse_tickers = [f"{s}.NS" for s in pending_symbols]
         try:
             logger.info(f"[INGEST] Strategy 1: Bulk NSE fetch for {len(nse_tickers)} symbols")
-            # 2y period ensures we have enough data for EMA-200 / SMA-200
-            data = yf.download(nse_tickers, period="2y", progress=False, auto_adjust=True, group_by='ticker')
+            data = yf.download(nse_tickers, **download_window, progress=False, auto_adjust=True, group_by='ticker')
             
             for sym in pending_symbols[:]:
                 ticker = f"{sym}.NS"
@@ -58,7 +66,7 @@ def ingest_missing_symbols_sync(symbols, user_id='admin', user_email=None, user_
         bse_tickers = [f"{s}.BO" for s in pending_symbols]
         try:
             logger.info(f"[INGEST] Strategy 2: Bulk BSE fetch for {len(bse_tickers)} symbols")
-            data = yf.download(bse_tickers, period="2y", progress=False, auto_adjust=True, group_by='ticker')
+            data = yf.download(bse_tickers, **download_window, progress=False, auto_adjust=True, group_by='ticker')
             
             for sym in pending_symbols[:]:
                 ticker = f"{sym}.BO"
@@ -89,7 +97,13 @@ def ingest_missing_symbols_sync(symbols, user_id='admin', user_email=None, user_
     # Step 2 & 3: Compute Indicators & Scores for all successful ingests
     if successful_symbols:
         logger.info(f"[INGEST] Computing indicators for successful set: {successful_symbols}")
-        compute_indicators_for_symbols(successful_symbols)
+        # Symbols with stored state only advance by their new bars.
+        streamed = [s for s in successful_symbols if s in state_dates]
+        recompute = [s for s in successful_symbols if s not in state_dates]
+        if streamed:
+            compute_indicators_streaming(streamed)
+        if recompute:
+            compute_indicators_for_symbols(recompute)
         logger.info(f"[INGEST] Generating MRI scores for successful set: {successful_symbols}")
         compute_stock_scores_for_symbols(successful_symbols)
     
@@ -1,8 +1,7 @@
 import pandas as pd
-import numpy as np
 import logging
 import os
-from engine_core.db import fetch_df, get_connection
+from engine_core.backtest_engine import BacktestRules, DbDataSource, run_backtest
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -16,171 +15,18 @@ def run_portfolio_simulation(start_date=None, end_date=None, tx_cost=0.004, outp
     logger.info(f"Starting Portfolio Simulation Engine ({start_date or 'BEGIN'} to {end_date or 'END'})")
     logger.info(f"Transaction Cost: {tx_cost*100:.2f}% | Output Prefix: '{output_prefix}'")
     
-    conn = get_connection()
-    
-    # 1. Fetch entire market regime history
-    logger.info("Loading market regime history...")
-    regime_df = fetch_df("SELECT date, classification FROM market_regime WHERE classification IS NOT NULL ORDER BY date")
-    regime_df["date"] = pd.to_datetime(regime_df["date"], errors="coerce").dt.date
-    
-    if start_date:
-        regime_df = regime_df[regime_df['date'] >= pd.to_datetime(start_date).date()]
-    if end_date:
-         regime_df = regime_df[regime_df['date'] <= pd.to_datetime(end_date).date()]
-         
-    regime_dict = dict(zip(regime_df['date'], regime_df['classification']))
-    dates = sorted(list(regime_df['date']))
-    
+    market = DbDataSource(start_date, end_date).load()
+    dates = market['dates']
+
     if not dates:
         logger.error("No dates found matching criteria!")
-        conn.close()
         return
-        
-    # 2. Fetch stock scores
-    logger.info("Loading stock scores...")
-    scores_query = "SELECT date, symbol, total_score FROM stock_scores WHERE total_score IS NOT NULL"
-    scores_df = fetch_df(scores_query)
-    scores_df["date"] = pd.to_datetime(scores_df["date"], errors="coerce").dt.date
-    scores_df["total_score"] = pd.to_numeric(scores_df["total_score"], errors="coerce")
-    
-    # 3. Fetch pricing (need both close for tracking and open for next-day execution)
-    logger.info("Loading price data...")
-    prices_query = "SELECT date, symbol, close, open FROM daily_prices"
-    prices_df = fetch_df(prices_query)
-    prices_df["date"] = pd.to_datetime(prices_df["date"], errors="coerce").dt.date
-    prices_df["close"] = pd.to_numeric(prices_df["close"], errors="coerce")
-    prices_df["open"] = pd.to_numeric(prices_df["open"], errors="coerce")
-    
-    conn.close()
-    
-    logger.info("Pre-processing data arrays for fast simulation...")
-    # Map data for fast daily traversal
-    # To save memory and time, we create nested dicts: date -> symbol -> value
-    # E.g., price_map[date][symbol] = close
-    
-    logger.info("Building nested dictionaries...")
-    # This acts as O(1) daily lookups
-    prices_close_nested = prices_df.groupby('date').apply(lambda x: dict(zip(x.symbol, x.close))).to_dict()
-    prices_open_nested = prices_df.groupby('date').apply(lambda x: dict(zip(x.symbol, x.open))).to_dict()
-    scores_nested = scores_df.groupby('date').apply(lambda x: dict(zip(x.symbol, x.total_score))).to_dict()
-    
-    capital = INITIAL_CAPITAL
-    positions = {} # dict of symbol -> {'shares': int, 'entry_price': float, 'highest_price': float, 'entry_date': date}
-    trade_log = []
-    equity_curve = []
-    
-    logger.info(f"Running day-by-day simulation over {len(dates)} days...")
-    
-    for i, current_date in enumerate(dates):
-        regime = regime_dict.get(current_date, 'NEUTRAL')
-        
-        today_prices_close = prices_close_nested.get(current_date, {})
-        today_scores = scores_nested.get(current_date, {})
-        
-        # Get next day's open prices for execution
-        next_date = dates[i+1] if i + 1 < len(dates) else None
-        next_prices_open = prices_open_nested.get(next_date, {}) if next_date else {}
-        
-        if not today_prices_close:
-            # Market holiday or no data
-            continue
-            
-        # 1. EVALUATE EXITS
-        symbols_to_exit = []
-        for sym, pos_data in positions.items():
-            current_close = today_prices_close.get(sym)
-            if current_close is None:
-                continue # No price today, hold
-                
-            # Update trailing stop high water mark based on today's close
-            if current_close > pos_data['highest_price']:
-                pos_data['highest_price'] = current_close
-                
-            current_score = today_scores.get(sym, 0)
-            
-            exit_reason = None
-            if regime == 'BEAR':
-                exit_reason = 'REGIME_BEAR'
-            elif current_score <= 2:
-                exit_reason = 'SCORE_LOW'
-            elif current_close <= pos_data['highest_price'] * 0.8:
-                exit_reason = 'TRAILING_STOP_20'
-                
-            if exit_reason:
-                # If exiting, we use tomorrow's open price to sell. 
-                # If tomorrow's open is missing (e.g., delisted overnight), fallback to today's close
-                exit_price = next_prices_open.get(sym, current_close)
-                if exit_price is None or pd.isna(exit_price):
-                    exit_price = current_close
-                symbols_to_exit.append((sym, exit_price, exit_reason))
-                
-        # Process Exits
-        for sym, exit_price, reason in symbols_to_exit:
-            pos_data = positions.pop(sym)
-            shares = pos_data['shares']
-            
-            gross_proceeds = shares * exit_price
-            cost = gross_proceeds * tx_cost
-            net_proceeds = gross_proceeds - cost
-            
-            pnl = net_proceeds - (shares * pos_data['entry_price'])
-            capital += net_proceeds
-            
-            trade_log.append({
-                'symbol': sym,
-                'entry_date': pos_data['entry_date'],
-                'exit_date': current_date,
-                'entry_price': pos_data['entry_price'],
-                'exit_price': exit_price,
-                'shares': shares,
-                'pnl': pnl,
-                'exit_reason': reason
-            })
-            
-        # 2. EVALUATE ENTRIES
-        # Entry requires BULL regime, Score >= 4, and equal weight 10% positions.
-        if regime == 'BULL' and len(positions) < 10:
-            slots_available = 10 - len(positions)
-            
-            # Find eligible symbols that we have price data for today AND tomorrow
-            eligible_symbols = [s for s, score in today_scores.items() if score >= 4 and s not in positions and s in today_prices_close and s in next_prices_open]
-            
-            if eligible_symbols:
-                # Sort eligible by score descending
-                eligible_symbols.sort(key=lambda s: today_scores[s], reverse=True)
-                to_buy_symbols = eligible_symbols[:slots_available]
-                
-                # Calculate current equity to determine position sizing (using today's close for valuation)
-                current_equity = capital + sum([pos_data['shares'] * today_prices_close.get(s, pos_data['entry_price']) for s, pos_data in positions.items()])
-                allocation_per_slot = current_equity * 0.10
-                
-                for sym in to_buy_symbols:
-                    # Buy at tomorrow's open
-                    buy_price = next_prices_open.get(sym)
-                    if buy_price and pd.notna(buy_price) and buy_price > 0 and capital > 0:
-                        invest_amount = min(allocation_per_slot, capital)
-                        post_fees_amount = invest_amount / (1 + tx_cost)
-                        shares = int(post_fees_amount // buy_price)
-                        
-                        cost = (shares * buy_price) * (1 + tx_cost)
-                        if shares > 0 and capital >= cost:
-                            capital -= cost
-                            positions[sym] = {
-                                'shares': shares,
-                                'entry_price': buy_price,
-                                'highest_price': buy_price,
-                                'entry_date': current_date
-                            }
-                            
-        # 3. RECORD EOD EQUITY
-        # Equity is valued at today's close
-        eod_equity = capital + sum([pos_data['shares'] * today_prices_close.get(s, pos_data['entry_price']) for s, pos_data in positions.items()])
-        equity_curve.append({
-            'date': current_date, 
-            'equity': eod_equity,
-            'cash': capital,
-            'open_positions': len(positions)
-        })
+
+    # Signals on day T's close, filled at T+1's open and booked on T
+    logger.info(f"Running simulation over {len(dates)} days...")
+    trade_log, equity_curve = run_backtest(
+        market, execution="signal_day_next_open", rules=BacktestRules(tx_cost=tx_cost)
+    )
 
     logger.info("Simulation complete. Writing state...")
     os.makedirs('outputs', exist_ok=True)
@@ -4,11 +4,14 @@ Portfolio Review Engine — evaluates any portfolio against MRI stock scores + m
 User submits holdings [{symbol, quantity, avg_cost}] →
 Engine returns per-holding MRI analysis + aggregate risk level (Low/Moderate/High/Extreme).
 
-Uses existing tables: market_regime, stock_scores, daily_prices. No new tables needed.
+Uses existing tables: market_regime, stock_scores, daily_prices, plus the shared
+sector map (engine_core.sector_reference) to tag each holding's sector. No new tables needed.
 """
 import logging
 from datetime import date
 from engine_core.db import get_connection
+from engine_core.market_snapshot import get_market_snapshot
+from engine_core.sector_reference import get_sector_map
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -83,9 +86,7 @@ def analyze_portfolio(holdings, conn=None):
 
 def _analyze(holdings, conn):
     """Core analysis logic."""
-    from psycopg2.extras import RealDictCursor
     from decimal import Decimal
-    cur = conn.cursor(cursor_factory=RealDictCursor)
 
     def _to_float(v, default: float = 0.0) -> float:
         if v is None:
@@ -107,43 +108,17 @@ def _analyze(holdings, conn):
             "analyzed_date": str(date.today()),
         }
 
-    # 1. Current market regime
-    cur.execute("""
-        SELECT date, classification, sma_200, sma_200_slope_20
-        FROM market_regime ORDER BY date DESC LIMIT 1
-    """)
-    regime_row = cur.fetchone()
+    # 1-4. Current regime plus latest scores and prices/indicators per symbol,
+    # served from the shared in-process snapshot (dictionary lookups).
+    snapshot = get_market_snapshot(conn)
+    regime_row = snapshot.regime
     regime = regime_row["classification"] if regime_row else "NEUTRAL"
     regime_date = str(regime_row["date"]) if regime_row else None
 
-    # 2. Collect symbols (de-duplicated)
     symbols = list(set([h["symbol"].upper().strip() for h in holdings]))
-    symbol_tuple = tuple(symbols)
-
-    # 3. Latest stock scores for submitted symbols
-    cur.execute("""
-        SELECT DISTINCT ON (ss.symbol) 
-               ss.symbol, ss.total_score, ss.date,
-               ss.condition_ema_50_200, ss.condition_ema_200_slope,
-               ss.condition_6m_high, ss.condition_volume, ss.condition_rs
-        FROM stock_scores ss
-        WHERE ss.symbol IN %s
-        ORDER BY ss.symbol, ss.date DESC
-    """, (symbol_tuple,))
-    scores_by_symbol = {r["symbol"]: r for r in cur.fetchall()}
-
-    # 4. Latest prices + indicators
-    cur.execute("""
-        SELECT DISTINCT ON (dp.symbol) 
-               dp.symbol, dp.close, dp.ema_50, dp.ema_200, dp.rs_90d,
-               dp.avg_volume_20d, dp.date
-        FROM daily_prices dp
-        WHERE dp.symbol IN %s
-        ORDER BY dp.symbol, dp.date DESC
-    """, (symbol_tuple,))
-    prices_by_symbol = {r["symbol"]: r for r in cur.fetchall()}
-
-    cur.close()
+    scores_by_symbol = {s: snapshot.scores[s] for s in symbols if s in snapshot.scores}
+    prices_by_symbol = {s: snapshot.prices[s] for s in symbols if s in snapshot.prices}
+    sectors = get_sector_map(conn)
 
     # 5. Per-holding analysis
     analyzed_holdings = []
@@ -211,6 +186,7 @@ def _analyze(holdings, conn):
 
         holding_result = {
             "symbol": sym,
+            "sector": sectors.sector(sym),
             "quantity": float(qty),
             "avg_cost": float(avg_cost),
             "current_price": float(current_price) if current_price else None,
@@ -338,6 +314,7 @@ def analyze_single_stock(symbol, conn=None):
         result = {
             "symbol": sym,
             "found": True,
+            "sector": get_sector_map(conn).sector(sym),
             "regime": regime,
             "score": score,
             "close": current_price,
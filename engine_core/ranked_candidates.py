@@ -0,0 +1,123 @@
+"""
+daily_ranked_candidates: the day's ranked BUY candidate list, shared by all clients.
+
+The signal generator ranks the liquid, priced, high-score stocks once per
+signal date, tags each with its sector and whether it clears the regime's BUY
+threshold, and persists the list. Each client's BUY selection is then a merge
+of that list against its holdings (``select_buys``), and API endpoints or
+emails read the same rows instead of re-running the ranking.
+"""
+import logging
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+RANKED_CANDIDATES_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_ranked_candidates (
+        signal_date    DATE NOT NULL,
+        rank           INT NOT NULL,
+        symbol         VARCHAR(20) NOT NULL,
+        total_score    INT,
+        rs_90d         NUMERIC(12,4),
+        adtv           NUMERIC(20,2),
+        sector         VARCHAR(100),
+        close          NUMERIC(12,4),
+        regime         VARCHAR(20),
+        eligible       BOOLEAN NOT NULL,
+        created_at     TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (signal_date, symbol)
+    )
+"""
+
+
+def ensure_ranked_candidates_table(cur):
+    cur.execute(RANKED_CANDIDATES_SQL)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ranked_candidates_date_rank ON daily_ranked_candidates(signal_date, rank)")
+
+
+def buy_threshold(regime, min_buy_score):
+    """Score needed for a BUY in ``regime`` (None = no new entries)."""
+    if regime == "BULL":
+        return min_buy_score
+    if regime == "NEUTRAL":
+        return 85
+    return None
+
+
+def rank_candidates(scores, prices, regime, sector_of, min_buy_score, min_absolute_score):
+    """
+    Ranked candidate list from ``scores`` (already ordered by score, then RS).
+
+    Keeps stocks scoring at least ``min_buy_score`` that have a price and pass
+    the ``min_absolute_score`` cash toggle; ``eligible`` marks the ones that
+    clear today's regime threshold.
+    """
+    threshold = buy_threshold(regime, min_buy_score)
+    candidates = []
+    for stock in scores:
+        if stock["total_score"] < min_buy_score or stock["symbol"] not in prices:
+            continue
+        # Cash toggle: skip if score below absolute momentum threshold
+        if stock["total_score"] < min_absolute_score:
+            logger.info(f"  Cash toggle: skipping {stock['symbol']} (score={stock['total_score']} < {min_absolute_score})")
+            continue
+        candidates.append({
+            "rank": len(candidates) + 1,
+            "symbol": stock["symbol"],
+            "total_score": stock["total_score"],
+            "rs_90d": stock.get("rs_90d", 0),
+            "adtv": stock.get("adtv", 0),
+            "sector": sector_of(stock["symbol"]),
+            "close": prices[stock["symbol"]].get("close"),
+            "regime": regime,
+            "eligible": threshold is not None and stock["total_score"] >= threshold,
+        })
+    return candidates
+
+
+def select_buys(candidates, holdings, slots, max_per_sector):
+    """Walk the eligible candidates in rank order, skipping ``holdings``, with a per-sector cap."""
+    sector_count = {}  # sector -> count of stocks
+    picks = []
+    for cand in candidates:
+        if len(picks) >= slots:
+            break
+        if not cand["eligible"] or cand["symbol"] in holdings:
+            continue
+        current_sector_count = sector_count.get(cand["sector"], 0)
+        if current_sector_count >= max_per_sector:
+            logger.debug(f"  Sector cap: skipping {cand['symbol']} (sector={cand['sector']}, already {current_sector_count} stocks)")
+            continue
+        sector_count[cand["sector"]] = current_sector_count + 1
+        picks.append(cand)
+    return picks
+
+
+def save_ranked_candidates(cur, signal_date, candidates):
+    """Replace the stored list for ``signal_date``; does not commit."""
+    ensure_ranked_candidates_table(cur)
+    cur.execute("DELETE FROM daily_ranked_candidates WHERE signal_date = %s", (signal_date,))
+    if candidates:
+        execute_values(cur, """
+            INSERT INTO daily_ranked_candidates
+                (signal_date, rank, symbol, total_score, rs_90d, adtv, sector, close, regime, eligible)
+            VALUES %s
+        """, [
+            (signal_date, c["rank"], c["symbol"], c["total_score"], c["rs_90d"], c["adtv"],
+             c["sector"], c["close"], c["regime"], c["eligible"])
+            for c in candidates
+        ], page_size=1000)
+    logger.info(f"Saved {len(candidates)} ranked candidates for {signal_date}")
+
+
+def load_ranked_candidates(cur, signal_date=None, eligible_only=False):
+    """Stored list for ``signal_date`` (latest stored date when None), in rank order."""
+    cur.execute("""
+        SELECT signal_date, rank, symbol, total_score, rs_90d, adtv, sector, close, regime, eligible
+        FROM daily_ranked_candidates
+        WHERE signal_date = COALESCE(%s, (SELECT MAX(signal_date) FROM daily_ranked_candidates))
+          AND (eligible OR NOT %s)
+        ORDER BY rank
+    """, (signal_date, eligible_only))
+    return cur.fetchall()
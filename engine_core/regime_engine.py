@@ -4,9 +4,11 @@ import numpy as np
 print("DEBUG: LOADING engine_core/regime_engine.py VERSION 100.5")
 import psycopg2
 from psycopg2.extras import execute_batch
-from scipy.stats import linregress
 import logging
 from engine_core.db import get_connection
+from engine_core.latest_state import ensure_latest_stock_state_table, refresh_latest_stock_state
+from engine_core.market_snapshot import publish_market_snapshot
+from engine_core.rolling_ols import rolling_slope_frame
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,109 +38,286 @@ def create_market_regime_and_scores_tables():
             PRIMARY KEY (date, symbol)
         );
         
+        CREATE TABLE IF NOT EXISTS market_index_regime (
+            symbol VARCHAR(20),
+            date DATE,
+            ema_50 NUMERIC(12,4),
+            ema_200 NUMERIC(12,4),
+            classification VARCHAR(20),
+            PRIMARY KEY (symbol, date)
+        );
+
+        ALTER TABLE stock_scores ADD COLUMN IF NOT EXISTS scored_at TIMESTAMPTZ DEFAULT NOW();
+        ALTER TABLE daily_prices ADD COLUMN IF NOT EXISTS indicators_updated_at TIMESTAMPTZ;
+
         CREATE INDEX IF NOT EXISTS idx_stock_scores_date ON stock_scores(date);
+        CREATE INDEX IF NOT EXISTS idx_stock_scores_scored_at ON stock_scores(scored_at);
         CREATE INDEX IF NOT EXISTS idx_stock_scores_symbol_date ON stock_scores(symbol, date DESC);
     """)
+    ensure_latest_stock_state_table(cur)
     conn.commit()
     cur.close()
     conn.close()
     logger.info("Market regime and stock scores tables ready.")
 
-def calc_slope(s):
+def calc_slope(s, window=20):
     """Calculate 20-day linear regression slope with safety for NaNs."""
-    result = np.full(len(s), np.nan)
-    s_values = s.values
-    x = np.arange(20)
-    for i in range(19, len(s)):
-        y = s_values[i-19:i+1]
-        if not np.isnan(y).any():
-            slope, _, _, _, _ = linregress(x, y)
-            result[i] = slope
-    return pd.Series(result, index=s.index)
-
-def compute_market_regime():
-    """Calculates market regime (NIFTY 50) incrementally."""
-    logger.info("Computing Market Regime based on Nifty 50...")
-    conn = get_connection()
-    
-    # Direct fetch to avoid pd.read_sql / RealDictCursor incompatibility
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT date, close 
-            FROM public.market_index_prices 
-            WHERE symbol = 'NIFTY50' 
-            ORDER BY date
-        """)
-        rows = cur.fetchall()
-    
-    if not rows:
-        logger.warning("No index data found in public.market_index_prices for NIFTY50.")
-        conn.close()
-        return
-        
-    idx_df = pd.DataFrame([dict(r) for r in rows])
-    
-    # Force numeric conversion for pandas
-    idx_df['close'] = pd.to_numeric(idx_df['close'], errors='coerce')
-    idx_df = idx_df.dropna(subset=['close'])
+    return rolling_slope_frame(s, window)
+
+# Benchmarks with their own regime history. NIFTY50 also feeds market_regime,
+# which every reader (signals, emails, STEE, portfolio review) uses.
+REGIME_INDICES = ("NIFTY50", "SENSEX")
+PRIMARY_REGIME_INDEX = "NIFTY50"
 
-    # Force numeric conversion for pandas
+
+def classify_regime(idx_df):
+    """Add EMA-50/200 and the BULLISH/BEARISH/SIDEWAYS/NEUTRAL label to an index close series."""
+    idx_df = idx_df.copy()
     idx_df['close'] = pd.to_numeric(idx_df['close'], errors='coerce')
     idx_df = idx_df.dropna(subset=['close'])
 
     # EMA logic as per STEE PRD
     idx_df['ema_50'] = idx_df['close'].ewm(span=50, adjust=False).mean()
     idx_df['ema_200'] = idx_df['close'].ewm(span=200, adjust=False).mean()
-    
-    def classify(row):
-        close = float(row['close'])
-        ema_50 = float(row['ema_50'])
-        ema_200 = float(row['ema_200'])
-        
-        # 1. BULLISH: Close > EMA 200 AND EMA 50 > EMA 200
-        if close > ema_200 and ema_50 > ema_200:
-            return 'BULLISH'
-        # 2. BEARISH: Close < EMA 200 AND EMA 50 < EMA 200
-        elif close < ema_200 and ema_50 < ema_200:
-            return 'BEARISH'
-        # 3. SIDEWAYS: Price around EMA 200 (+/- 2%)
-        elif abs(close - ema_200) / ema_200 <= 0.02:
-            return 'SIDEWAYS'
+
+    close = idx_df['close'].astype(float)
+    ema_50 = idx_df['ema_50']
+    ema_200 = idx_df['ema_200']
+    idx_df['classification'] = np.select(
+        [
+            # 1. BULLISH: Close > EMA 200 AND EMA 50 > EMA 200
+            (close > ema_200) & (ema_50 > ema_200),
+            # 2. BEARISH: Close < EMA 200 AND EMA 50 < EMA 200
+            (close < ema_200) & (ema_50 < ema_200),
+            # 3. SIDEWAYS: Price around EMA 200 (+/- 2%)
+            (close - ema_200).abs() / ema_200 <= 0.02,
+        ],
+        ['BULLISH', 'BEARISH', 'SIDEWAYS'],
         # 4. NEUTRAL: Fallback
-        else:
-            return 'NEUTRAL'
-            
-    idx_df['classification'] = idx_df.apply(classify, axis=1)
+        default='NEUTRAL',
+    )
     idx_df['ema_50'] = idx_df['ema_50'].round(4)
     idx_df['ema_200'] = idx_df['ema_200'].round(4)
+    return idx_df
+
+
+def _upsert_regime_rows(cur, regime_df, index_symbol, incremental):
+    """Write regime rows for one benchmark; incremental mode skips dates already stored."""
+    rows = regime_df[['date', 'ema_50', 'ema_200', 'classification']].copy()
+    rows['symbol'] = index_symbol
+
+    if incremental:
+        cur.execute("SELECT MAX(date) AS max_date FROM market_index_regime WHERE symbol = %s", (index_symbol,))
+        last_date = cur.fetchone()['max_date']
+        if last_date is not None:
+            rows = rows[rows['date'] > last_date]
+
+    update_data = rows.replace({np.nan: None}).to_dict('records')
+    if update_data:
+        execute_batch(cur, """
+            INSERT INTO market_index_regime (symbol, date, ema_50, ema_200, classification)
+            VALUES (%(symbol)s, %(date)s, %(ema_50)s, %(ema_200)s, %(classification)s)
+            ON CONFLICT (symbol, date) DO UPDATE SET
+                ema_50 = EXCLUDED.ema_50,
+                ema_200 = EXCLUDED.ema_200,
+                classification = EXCLUDED.classification;
+        """, update_data, page_size=500)
+
+    if index_symbol != PRIMARY_REGIME_INDEX:
+        return len(update_data)
+
+    primary = regime_df[['date', 'ema_50', 'ema_200', 'classification']]
+    if incremental:
+        cur.execute("SELECT MAX(date) AS max_date FROM public.market_regime")
+        last_date = cur.fetchone()['max_date']
+        if last_date is not None:
+            primary = primary[primary['date'] > last_date]
+
+    primary_data = primary.replace({np.nan: None}).to_dict('records')
+    if primary_data:
+        execute_batch(cur, """
+            INSERT INTO public.market_regime (date, ema_50, ema_200, classification)
+            VALUES (%(date)s, %(ema_50)s, %(ema_200)s, %(classification)s)
+            ON CONFLICT (date) DO UPDATE SET 
+                ema_50 = EXCLUDED.ema_50,
+                ema_200 = EXCLUDED.ema_200,
+                classification = EXCLUDED.classification;
+        """, primary_data, page_size=500)
+    return len(primary_data)
+
+
+def compute_market_regime(incremental=True, indices=REGIME_INDICES):
+    """
+    Calculates market regime per benchmark (NIFTY50 also feeds market_regime).
+
+    The EMAs are always rebuilt from the full index history (a few thousand
+    rows), but in incremental mode only dates newer than the latest stored
+    regime row are upserted.
+    """
+    conn = get_connection()
+    try:
+        for index_symbol in indices:
+            logger.info(f"Computing Market Regime based on {index_symbol}...")
+
+            # Direct fetch to avoid pd.read_sql / RealDictCursor incompatibility
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT date, close 
+                    FROM public.market_index_prices 
+                    WHERE symbol = %s 
+                    ORDER BY date
+                """, (index_symbol,))
+                rows = cur.fetchall()
+
+            if not rows:
+                logger.warning(f"No index data found in public.market_index_prices for {index_symbol}.")
+                continue
+
+            regime_df = classify_regime(pd.DataFrame([dict(r) for r in rows]))
+            if regime_df.empty:
+                logger.warning(f"No regime data to write for {index_symbol}.")
+                continue
+
+            with conn.cursor() as cur:
+                written = _upsert_regime_rows(cur, regime_df, index_symbol, incremental)
+            conn.commit()
+            logger.info(f"✅ Wrote {written} new regime rows for {index_symbol}.")
+
+            # Health check: log what we computed
+            latest = regime_df.iloc[-1]
+            logger.info(f"✅ Regime updated through {latest['date']} -> {latest['classification']}")
+    finally:
+        conn.close()
+    publish_market_snapshot()
+
+SCORE_COLUMNS = [
+    'date', 'symbol', 'total_score', 'condition_ema_50_200',
+    'condition_ema_200_slope', 'condition_6m_high',
+    'condition_volume', 'condition_rs',
+]
+
+SCORE_INPUT_COLUMNS = """
+    dp.symbol, dp.date, dp.close, dp.volume, dp.ema_50, dp.ema_200,
+    dp.ema_200_slope_20, dp.rolling_high_6m, dp.avg_volume_20d, dp.rs_90d
+"""
+
+
+def _score_input_frame(rows):
+    """Type and clean daily_prices rows fetched for scoring."""
+    df = pd.DataFrame([dict(r) for r in rows])
+    if df.empty:
+        return df
+
+    df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
+    df = df[df["date"].notna()].copy()
+    df["symbol"] = df["symbol"].astype(str)
+    df = df[df["symbol"].str.lower() != "symbol"].copy()
+
+    numeric_cols = [
+        "high",
+        "low",
+        "close",
+        "volume",
+        "ema_50",
+        "ema_200",
+        "ema_200_slope_20",
+        "rolling_high_6m",
+        "avg_volume_20d",
+        "rs_90d",
+    ]
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def _check_latest_indicator_health(df):
+    """Warn when most rows on the latest date still lack indicators; returns that date."""
+    # HEALTH CHECK: Detect when indicators are mostly NULL
+    # This catches the case where ingestion ran but indicators didn't compute
+    latest_date = df['date'].max()
+    latest_rows = df[df['date'] == latest_date]
+    null_ema_count = latest_rows['ema_50'].isna().sum()
+    total_latest = len(latest_rows)
     
-    # Update the entire range from the fetched data
-    update_data = idx_df[['date', 'ema_50', 'ema_200', 'classification']].replace({np.nan: None}).to_dict('records')
+    if total_latest > 0 and null_ema_count / total_latest > 0.5:
+        logger.warning(
+            f"⚠️ HEALTH CHECK: {null_ema_count}/{total_latest} symbols have NULL ema_50 "
+            f"on {latest_date}. Indicators may not have been computed yet!"
+        )
+    return latest_date
 
-    if not update_data:
-        logger.warning("No regime data to write.")
-        return
+
+def score_frame(df):
+    """
+    Apply the MRI conditions and weights to a frame of daily_prices rows.
+
+    Every condition only looks at its own row, so any subset of (symbol, date)
+    rows scores exactly as it would inside a full-universe run.
+    """
+    df = df.copy()
+
+    # 2. Safety: Fill NaNs to avoid the '>=' TypeError crash
+    df['rolling_high_6m'] = df['rolling_high_6m'].fillna(df['close'])
+    df['ema_50'] = df['ema_50'].fillna(df['close'])  # Fallback to close
+    df['ema_200'] = df['ema_200'].fillna(df['ema_50'])  # Fallback trend
+    df['ema_200_slope_20'] = df['ema_200_slope_20'].fillna(0)
+    df['avg_volume_20d'] = df['avg_volume_20d'].fillna(df['volume'])
+    df['rs_90d'] = df['rs_90d'].fillna(0)
+
+    # 3. Calculate MRI Conditions & Weighted Scores
+    df['condition_ema_50_200'] = (df['ema_50'] >= df['ema_200']).astype(bool)
+    df['condition_ema_200_slope'] = (df['ema_200_slope_20'] >= 0).astype(bool)
+    df['condition_6m_high'] = (df['close'] >= df['rolling_high_6m'] * 0.99).astype(bool)
+    df['condition_volume'] = (df['volume'] > (1.3 * df['avg_volume_20d'])).astype(bool)
+    df['condition_rs'] = (df['rs_90d'] > 0).astype(bool)
+
+    # Apply Weights (Total = 100)
+    df['total_score'] = (
+        df['condition_ema_50_200'].astype(int) * 25 +
+        df['condition_ema_200_slope'].astype(int) * 25 +
+        df['condition_rs'].astype(int) * 20 +
+        df['condition_6m_high'].astype(int) * 20 +
+        df['condition_volume'].astype(int) * 10
+    )
+    return df
+
+
+def _write_scores(conn, df, latest_date):
+    """Upsert scored rows into stock_scores and log the top names for latest_date."""
+    # 4. Write back to DB
+    df = df.replace({np.nan: None})
+    update_data = df[SCORE_COLUMNS].to_dict('records')
+
+    # Log Top 5 stocks for latest date to debug Golden Path
+    latest_scored = df[df['date'] == latest_date].sort_values('total_score', ascending=False).head(10)
+    logger.info(f"Top 10 scores for {latest_date}:")
+    for _, r in latest_scored.iterrows():
+        logger.info(f"  {r['symbol']}: {r['total_score']} (EMA:{r['condition_ema_50_200']}, Slope:{r['condition_ema_200_slope']}, RS:{r['condition_rs']}, High:{r['condition_6m_high']}, Vol:{r['condition_volume']})")
 
     cur = conn.cursor()
-    sql = """
-        INSERT INTO public.market_regime (date, ema_50, ema_200, classification)
-        VALUES (%(date)s, %(ema_50)s, %(ema_200)s, %(classification)s)
-        ON CONFLICT (date) DO UPDATE SET 
-            ema_50 = EXCLUDED.ema_50,
-            ema_200 = EXCLUDED.ema_200,
-            classification = EXCLUDED.classification;
+    insert_sql = """
+        INSERT INTO stock_scores (date, symbol, total_score, condition_ema_50_200,
+            condition_ema_200_slope, condition_6m_high, condition_volume, condition_rs, scored_at
+        ) VALUES (
+            %(date)s, %(symbol)s, %(total_score)s, %(condition_ema_50_200)s,
+            %(condition_ema_200_slope)s, %(condition_6m_high)s, %(condition_volume)s, %(condition_rs)s, NOW()
+        ) ON CONFLICT (date, symbol) DO UPDATE SET
+            total_score = EXCLUDED.total_score,
+            condition_ema_50_200 = EXCLUDED.condition_ema_50_200,
+            condition_ema_200_slope = EXCLUDED.condition_ema_200_slope,
+            condition_6m_high = EXCLUDED.condition_6m_high,
+            condition_volume = EXCLUDED.condition_volume,
+            condition_rs = EXCLUDED.condition_rs,
+            scored_at = EXCLUDED.scored_at;
     """
-    execute_batch(cur, sql, update_data, page_size=100)
+    execute_batch(cur, insert_sql, update_data, page_size=5000)
+    # Same transaction: latest_stock_state never lags the scores it summarises.
+    refresh_latest_stock_state(cur, df['symbol'].unique())
     conn.commit()
-    logger.info(f"✅ Wrote {len(update_data)} rows to public.market_regime.")
-    
-    # Health check: log what we computed
-    latest = idx_df.iloc[-1] if not idx_df.empty else None
-    if latest is not None:
-        logger.info(f"✅ Regime updated through {latest['date']} -> {latest['classification']}")
-    
     cur.close()
-    conn.close()
+    return len(update_data)
+
 
 def compute_stock_scores_for_symbols(symbols: list[str]):
     """
@@ -154,9 +333,8 @@ def compute_stock_scores_for_symbols(symbols: list[str]):
     
     try:
         # 1. Fetch data - use a long enough window to compute ADX/RSI and score components
-        sql = """
-            SELECT dp.symbol, dp.date, dp.close, dp.volume, dp.ema_50, dp.ema_200,
-                   dp.ema_200_slope_20, dp.rolling_high_6m, dp.avg_volume_20d, dp.rs_90d
+        sql = f"""
+            SELECT {SCORE_INPUT_COLUMNS}
             FROM daily_prices dp
             WHERE dp.symbol = ANY(%s)
             AND dp.date >= (SELECT MAX(date) FROM daily_prices) - INTERVAL '255 days'
@@ -165,107 +343,204 @@ def compute_stock_scores_for_symbols(symbols: list[str]):
         with conn.cursor() as cur:
             cur.execute(sql, (symbols_clean,))
             rows = cur.fetchall()
-        df = pd.DataFrame([dict(r) for r in rows])
+        df = _score_input_frame(rows)
 
         if df.empty:
             logger.warning("⚠️ No rows found for targeted scoring.")
             return
 
-        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
-        df = df[df["date"].notna()].copy()
-        df["symbol"] = df["symbol"].astype(str)
-        df = df[df["symbol"].str.lower() != "symbol"].copy()
-
-        numeric_cols = [
-            "high",
-            "low",
-            "close",
-            "volume",
-            "ema_50",
-            "ema_200",
-            "ema_200_slope_20",
-            "rolling_high_6m",
-            "avg_volume_20d",
-            "rs_90d",
-        ]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # HEALTH CHECK: Detect when indicators are mostly NULL
-        # This catches the case where ingestion ran but indicators didn't compute
-        latest_date = df['date'].max()
-        latest_rows = df[df['date'] == latest_date]
-        null_ema_count = latest_rows['ema_50'].isna().sum()
-        total_latest = len(latest_rows)
-        
-        if total_latest > 0 and null_ema_count / total_latest > 0.5:
-            logger.warning(
-                f"⚠️ HEALTH CHECK: {null_ema_count}/{total_latest} symbols have NULL ema_50 "
-                f"on {latest_date}. Indicators may not have been computed yet!"
-            )
-
-        # 2. Safety: Fill NaNs to avoid the '>=' TypeError crash
-        df['rolling_high_6m'] = df['rolling_high_6m'].fillna(df['close'])
-        df['ema_50'] = df['ema_50'].fillna(df['close'])  # Fallback to close
-        df['ema_200'] = df['ema_200'].fillna(df['ema_50'])  # Fallback trend
-        df['ema_200_slope_20'] = df['ema_200_slope_20'].fillna(0)
-        df['avg_volume_20d'] = df['avg_volume_20d'].fillna(df['volume'])
-        df['rs_90d'] = df['rs_90d'].fillna(0)
-
-        # 3. Calculate MRI Conditions & Weighted Scores
-        df['condition_ema_50_200'] = (df['ema_50'] >= df['ema_200']).astype(bool)
-        df['condition_ema_200_slope'] = (df['ema_200_slope_20'] >= 0).astype(bool)
-        df['condition_6m_high'] = (df['close'] >= df['rolling_high_6m'] * 0.99).astype(bool)
-        df['condition_volume'] = (df['volume'] > (1.3 * df['avg_volume_20d'])).astype(bool)
-        df['condition_rs'] = (df['rs_90d'] > 0).astype(bool)
-
-        # Apply Weights (Total = 100)
-        df['total_score'] = (
-            df['condition_ema_50_200'].astype(int) * 25 +
-            df['condition_ema_200_slope'].astype(int) * 25 +
-            df['condition_rs'].astype(int) * 20 +
-            df['condition_6m_high'].astype(int) * 20 +
-            df['condition_volume'].astype(int) * 10
-        )
+        latest_date = _check_latest_indicator_health(df)
+        written = _write_scores(conn, score_frame(df), latest_date)
+        logger.info(f"✅ Scoring complete: {written} score rows written for {len(symbols_clean)} symbols")
+
+    finally:
+        conn.close()
+    publish_market_snapshot()
 
-        # 4. Write back to DB
-        df = df.replace({np.nan: None})
-        update_data = df[['date', 'symbol', 'total_score', 'condition_ema_50_200', 
-                          'condition_ema_200_slope', 'condition_6m_high', 
-                          'condition_volume', 'condition_rs']].to_dict('records')
 
-        # Log Top 5 stocks for latest date to debug Golden Path
-        latest_scored = df[df['date'] == latest_date].sort_values('total_score', ascending=False).head(10)
-        logger.info(f"Top 10 scores for {latest_date}:")
-        for _, r in latest_scored.iterrows():
-            logger.info(f"  {r['symbol']}: {r['total_score']} (EMA:{r['condition_ema_50_200']}, Slope:{r['condition_ema_200_slope']}, RS:{r['condition_rs']}, High:{r['condition_6m_high']}, Vol:{r['condition_volume']})")
+# Pending rows for incremental scoring, compared per (symbol, date): never
+# scored, or indicators rewritten after the row's own scored_at.
+SQL_INCREMENTAL_JOIN = """LEFT JOIN stock_scores ss ON ss.symbol = dp.symbol AND ss.date = dp.date"""
+SQL_INCREMENTAL_FILTER = """AND (ss.symbol IS NULL OR dp.indicators_updated_at > ss.scored_at)"""
 
-        cur = conn.cursor()
-        insert_sql = """
-            INSERT INTO stock_scores (date, symbol, total_score, condition_ema_50_200,
-                condition_ema_200_slope, condition_6m_high, condition_volume, condition_rs
-            ) VALUES (
-                %(date)s, %(symbol)s, %(total_score)s, %(condition_ema_50_200)s,
-                %(condition_ema_200_slope)s, %(condition_6m_high)s, %(condition_volume)s, %(condition_rs)s
-            ) ON CONFLICT (date, symbol) DO UPDATE SET
-                total_score = EXCLUDED.total_score,
-                condition_ema_50_200 = EXCLUDED.condition_ema_50_200,
-                condition_ema_200_slope = EXCLUDED.condition_ema_200_slope,
-                condition_6m_high = EXCLUDED.condition_6m_high,
-                condition_volume = EXCLUDED.condition_volume,
-                condition_rs = EXCLUDED.condition_rs;
+
+def compute_stock_scores_incremental():
+    """
+    Score only rows that changed since the last scoring run.
+
+    A daily_prices row is pending when it has no stock_scores row yet or its
+    indicators were rewritten (indicators_updated_at) after that row was
+    scored. The check is per (symbol, date): a targeted run for a few symbols
+    (compute_stock_scores_for_symbols) must not move a watermark for the rest.
+    """
+    create_market_regime_and_scores_tables()
+    conn = get_connection()
+    try:
+        sql = f"""
+            SELECT {SCORE_INPUT_COLUMNS}
+            FROM daily_prices dp
+            {SQL_INCREMENTAL_JOIN}
+            WHERE dp.date >= (SELECT MAX(date) FROM daily_prices) - INTERVAL '255 days'
+              {SQL_INCREMENTAL_FILTER}
+            ORDER BY dp.symbol, dp.date
         """
-        execute_batch(cur, insert_sql, update_data, page_size=5000)
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            rows = cur.fetchall()
+        df = _score_input_frame(rows)
+
+        if df.empty:
+            logger.info("No new or re-computed rows to score.")
+            return 0
+
+        latest_date = _check_latest_indicator_health(df)
+        written = _write_scores(conn, score_frame(df), latest_date)
+        logger.info(
+            f"✅ Incremental scoring complete: {written} score rows written "
+            f"for {df['symbol'].nunique()} symbols"
+        )
+    finally:
+        conn.close()
+    publish_market_snapshot()
+    return written
+
+
+# Set-based equivalent of score_frame: COALESCE mirrors the fillna fallbacks and
+# NULL comparisons collapse to FALSE like NaN comparisons do in pandas.
+SQL_SCORE_SELECT = """
+    WITH filled AS (
+        SELECT dp.date, dp.symbol, dp.close, dp.volume,
+               COALESCE(dp.ema_50, dp.close) AS ema_50,
+               COALESCE(dp.ema_200, dp.ema_50, dp.close) AS ema_200,
+               COALESCE(dp.ema_200_slope_20, 0) AS ema_200_slope_20,
+               COALESCE(dp.rolling_high_6m, dp.close) AS rolling_high_6m,
+               COALESCE(dp.avg_volume_20d, dp.volume) AS avg_volume_20d,
+               COALESCE(dp.rs_90d, 0) AS rs_90d
+        {source}
+    ),
+    conditions AS (
+        SELECT date, symbol,
+               COALESCE(ema_50 >= ema_200, FALSE) AS condition_ema_50_200,
+               ema_200_slope_20 >= 0 AS condition_ema_200_slope,
+               COALESCE(close >= rolling_high_6m * 0.99, FALSE) AS condition_6m_high,
+               COALESCE(volume > 1.3 * avg_volume_20d, FALSE) AS condition_volume,
+               rs_90d > 0 AS condition_rs
+        FROM filled
+    )
+    SELECT date, symbol,
+           condition_ema_50_200::int * 25 +
+           condition_ema_200_slope::int * 25 +
+           condition_rs::int * 20 +
+           condition_6m_high::int * 20 +
+           condition_volume::int * 10 AS total_score,
+           condition_ema_50_200, condition_ema_200_slope, condition_6m_high,
+           condition_volume, condition_rs
+    FROM conditions
+"""
+
+
+def _sql_score_source(symbols=None, incremental=False):
+    """Build the daily_prices FROM/WHERE clause and params for the rows to score."""
+    source = f"""FROM daily_prices dp
+        {SQL_INCREMENTAL_JOIN if incremental else ""}
+        WHERE dp.date >= (SELECT MAX(date) FROM daily_prices) - INTERVAL '255 days'
+          AND lower(dp.symbol) <> 'symbol'
+    """
+    params = {}
+    if symbols is not None:
+        source += "      AND dp.symbol = ANY(%(symbols)s)\n"
+        params["symbols"] = [str(s).upper().strip() for s in symbols if str(s).strip()]
+    if incremental:
+        source += f"      {SQL_INCREMENTAL_FILTER}\n"
+    return source, params
+
+
+def compute_stock_scores_sql(symbols=None, incremental=False):
+    """
+    Score and upsert stock_scores in a single INSERT ... SELECT inside Postgres.
+
+    Produces the same rows as the pandas path without shipping the scoring
+    window to Python and back.
+    """
+    create_market_regime_and_scores_tables()
+    source, params = _sql_score_source(symbols, incremental)
+    select_sql = SQL_SCORE_SELECT.format(source=source)
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO stock_scores (date, symbol, total_score, condition_ema_50_200,
+                    condition_ema_200_slope, condition_6m_high, condition_volume, condition_rs, scored_at
+                )
+                SELECT scored.*, NOW()
+                FROM ({select_sql}) scored
+                ON CONFLICT (date, symbol) DO UPDATE SET
+                    total_score = EXCLUDED.total_score,
+                    condition_ema_50_200 = EXCLUDED.condition_ema_50_200,
+                    condition_ema_200_slope = EXCLUDED.condition_ema_200_slope,
+                    condition_6m_high = EXCLUDED.condition_6m_high,
+                    condition_volume = EXCLUDED.condition_volume,
+                    condition_rs = EXCLUDED.condition_rs,
+                    scored_at = EXCLUDED.scored_at
+                RETURNING symbol;
+            """, params)
+            written = cur.rowcount
+            refresh_latest_stock_state(cur, {r["symbol"] for r in cur.fetchall()})
         conn.commit()
-        cur.close()
-        logger.info(f"✅ Scoring complete: {len(update_data)} score rows written for {len(symbols_clean)} symbols")
+        logger.info(f"✅ SQL scoring complete: {written} score rows written")
+    finally:
+        conn.close()
+    publish_market_snapshot()
+    return written
+
 
+def verify_sql_scoring(symbols=None, incremental=False):
+    """
+    Compare the SQL scoring backend with the pandas path over the same rows.
+
+    Nothing is written. Returns the list of (symbol, date) pairs whose scores
+    differ; an empty list means the backends agree.
+    """
+    source, params = _sql_score_source(symbols, incremental)
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SQL_SCORE_SELECT.format(source=source), params)
+            sql_rows = cur.fetchall()
+            cur.execute(f"SELECT {SCORE_INPUT_COLUMNS} {source}", params)
+            input_rows = cur.fetchall()
     finally:
         conn.close()
 
-def compute_stock_scores():
-    """Aggressive daily scoring: ensures all symbols get graded for the newest data."""
+    sql_df = pd.DataFrame([dict(r) for r in sql_rows])
+    input_df = _score_input_frame(input_rows)
+    if sql_df.empty or input_df.empty:
+        logger.info("Nothing to verify: %d SQL rows, %d pandas rows", len(sql_df), len(input_df))
+        return []
+
+    pandas_df = score_frame(input_df)[SCORE_COLUMNS]
+    merged = pandas_df.merge(sql_df, on=['date', 'symbol'], how='outer', suffixes=('_pd', '_sql'), indicator=True)
+    mismatch = merged['_merge'] != 'both'
+    for col in SCORE_COLUMNS[2:]:
+        mismatch |= merged[f"{col}_pd"].astype(object) != merged[f"{col}_sql"].astype(object)
+
+    diffs = list(merged.loc[mismatch, ['symbol', 'date']].itertuples(index=False, name=None))
+    logger.info(f"SQL vs pandas scoring: {len(merged)} rows compared, {len(diffs)} mismatches")
+    return diffs
+
+
+def compute_stock_scores(incremental=False, backend="pandas"):
+    """
+    Aggressive daily scoring: ensures all symbols get graded for the newest data.
+
+    ``backend="sql"`` scores inside Postgres with one statement instead of
+    round-tripping the rows through pandas.
+    """
+    if backend == "sql":
+        return compute_stock_scores_sql(incremental=incremental)
+    if incremental:
+        return compute_stock_scores_incremental()
+
     create_market_regime_and_scores_tables()
     conn = get_connection()
     try:
@@ -285,6 +560,11 @@ def compute_stock_scores():
         conn.close()
 
 if __name__ == "__main__":
+    import os
+
     create_market_regime_and_scores_tables()
-    compute_market_regime()
-    compute_stock_scores()
+    compute_market_regime(incremental=os.environ.get("MRI_REGIME_MODE", "incremental").lower() != "full")
+    compute_stock_scores(
+        incremental=os.environ.get("MRI_SCORING_MODE", "incremental").lower() != "full",
+        backend=os.environ.get("MRI_SCORING_BACKEND", "pandas").lower(),
+    )
@@ -0,0 +1,39 @@
+"""
+Vectorized rolling least-squares helpers.
+
+``rolling_slope`` computes the OLS slope of every trailing window in one array
+operation instead of calling ``scipy.stats.linregress`` per window. It accepts a
+single series or a (time x series) matrix, so a whole universe of EMA or index
+series can be processed in one call.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_slope(values, window=20):
+    """
+    Trailing ``window``-bar linear-regression slope against x = 0..window-1.
+
+    Works on 1-D arrays or 2-D (time x series) arrays along axis 0. Rows before
+    the first full window, and any window containing a NaN, are NaN.
+    """
+    arr = np.asarray(values, dtype=float)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[0] < window:
+        return out
+
+    # With x centred on its mean, slope = sum(x_c * y) / sum(x_c ** 2); a NaN
+    # anywhere in the window propagates through the dot product.
+    x = np.arange(window, dtype=float) - (window - 1) / 2.0
+    windows = sliding_window_view(arr, window, axis=0)
+    out[window - 1 :] = windows @ x / (x @ x)
+    return out
+
+
+def rolling_slope_frame(data, window=20):
+    """pandas wrapper for rolling_slope that keeps the Series/DataFrame index."""
+    result = rolling_slope(data.to_numpy(dtype=float), window)
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(result, index=data.index, columns=data.columns)
+    return pd.Series(result, index=data.index, name=data.name)
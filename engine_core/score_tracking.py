@@ -0,0 +1,177 @@
+"""
+Hall of Fame (top_score_tracking) and strategy shadow portfolio upkeep.
+
+Both trackers are maintained with one set-based upsert per run
+(``execute_values`` into ``INSERT ... ON CONFLICT``). In snapshot mode each run
+also records the day's rows -- price, score and performance since first
+appearance -- in ``top_score_tracking_daily`` / ``strategy_shadow_daily``, so
+performance over time is a plain range query instead of a replay of signal
+history.
+"""
+import logging
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+HALL_OF_FAME_MIN_SCORE = 75
+SHADOW_PORTFOLIO_SIZE = 10
+
+TRACKING_SNAPSHOT_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS public.top_score_tracking_daily (
+        snapshot_date        DATE NOT NULL,
+        symbol               VARCHAR(20) NOT NULL,
+        score                INT,
+        price                NUMERIC(12,4),
+        first_appeared_date  DATE,
+        entry_price          NUMERIC(12,4),
+        perf_pct             NUMERIC(10,2),
+        PRIMARY KEY (snapshot_date, symbol)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_top_score_tracking_daily_symbol ON public.top_score_tracking_daily(symbol, snapshot_date)",
+    """
+    CREATE TABLE IF NOT EXISTS public.strategy_shadow_daily (
+        snapshot_date     DATE NOT NULL,
+        symbol            VARCHAR(20) NOT NULL,
+        rank              INT,
+        score             INT,
+        price             NUMERIC(12,4),
+        first_entry_date  DATE,
+        entry_price       NUMERIC(12,4),
+        perf_pct          NUMERIC(10,2),
+        PRIMARY KEY (snapshot_date, symbol)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_strategy_shadow_daily_symbol ON public.strategy_shadow_daily(symbol, snapshot_date)",
+]
+
+
+def ensure_tracking_snapshot_tables(cur):
+    for sql in TRACKING_SNAPSHOT_SQL:
+        cur.execute(sql)
+
+
+def _unique_by_symbol(rows):
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement
+    seen = set()
+    return [r for r in rows if not (r[0] in seen or seen.add(r[0]))]
+
+
+def update_top_score_tracking(cur, scores, prices, signal_date, snapshot=True):
+    """
+    Update the Hall of Fame table.
+    Stocks with score >= 75 are tracked to monitor long-term performance.
+    """
+    top_performers = [s for s in scores if s["total_score"] >= HALL_OF_FAME_MIN_SCORE]
+    if not top_performers:
+        return
+
+    rows = _unique_by_symbol([
+        (s["symbol"], s["total_score"], prices[s["symbol"]]["close"])
+        for s in top_performers
+        if prices.get(s["symbol"], {}).get("close") is not None
+    ])
+    if not rows:
+        return
+
+    # Upsert logic:
+    # If new: set first_appeared_date, entry_price, entry_score.
+    # If exists: update latest_price, max_score, last_seen_date.
+    execute_values(cur, """
+        INSERT INTO public.top_score_tracking (
+            symbol, first_appeared_date, entry_price, entry_score,
+            latest_price, max_score, last_seen_date, updated_at
+        )
+        VALUES %s
+        ON CONFLICT (symbol) DO UPDATE SET
+            latest_price = EXCLUDED.latest_price,
+            max_score = GREATEST(top_score_tracking.max_score, EXCLUDED.max_score),
+            last_seen_date = EXCLUDED.last_seen_date,
+            updated_at = NOW()
+    """, [(sym, signal_date, price, score, price, score, signal_date) for sym, score, price in rows],
+        template="(%s, %s, %s, %s, %s, %s, %s, NOW())", page_size=1000)
+
+    if snapshot:
+        ensure_tracking_snapshot_tables(cur)
+        execute_values(cur, """
+            INSERT INTO public.top_score_tracking_daily (
+                snapshot_date, symbol, score, price, first_appeared_date, entry_price, perf_pct
+            )
+            SELECT v.snapshot_date, v.symbol, v.score, v.price, t.first_appeared_date, t.entry_price,
+                   ROUND(((v.price - t.entry_price) / NULLIF(t.entry_price, 0)) * 100, 2)
+            FROM (VALUES %s) AS v(snapshot_date, symbol, score, price)
+            JOIN public.top_score_tracking t ON t.symbol = v.symbol
+            ON CONFLICT (snapshot_date, symbol) DO UPDATE SET
+                score = EXCLUDED.score,
+                price = EXCLUDED.price,
+                first_appeared_date = EXCLUDED.first_appeared_date,
+                entry_price = EXCLUDED.entry_price,
+                perf_pct = EXCLUDED.perf_pct
+        """, [(signal_date, sym, score, price) for sym, score, price in rows],
+            template="(%s::date, %s, %s::int, %s::numeric)", page_size=1000)
+
+    logger.info(f"Updated Hall of Fame tracking for {len(top_performers)} top-scoring stocks.")
+
+
+def update_strategy_shadow_tracking(cur, scores, prices, signal_date, snapshot=True):
+    """
+    Update the Strategy Shadow Portfolio.
+    Tracks the Top 10 stocks by score regardless of market regime.
+    This helps audit if the regime filter is saving money or skipping alpha.
+    """
+    # Top 10 purely by score and liquidity (same as strategy, but ignoring regime)
+    top_10 = scores[:SHADOW_PORTFOLIO_SIZE]
+    if not top_10:
+        return
+
+    # 1. Mark existing stocks as inactive if they are no longer in the Top 10
+    cur.execute("""
+        UPDATE public.strategy_shadow_portfolio
+        SET is_active = FALSE
+        WHERE is_active = TRUE AND NOT (symbol = ANY(%s))
+    """, ([s["symbol"] for s in top_10],))
+
+    # 2. Add or Update the current Top 10
+    rows = _unique_by_symbol([
+        (s["symbol"], rank, s["total_score"], prices[s["symbol"]]["close"])
+        for rank, s in enumerate(top_10, start=1)
+        if prices.get(s["symbol"], {}).get("close") is not None
+    ])
+    if rows:
+        execute_values(cur, """
+            INSERT INTO public.strategy_shadow_portfolio (
+                symbol, first_entry_date, entry_price,
+                latest_price, is_active, last_seen_date, updated_at
+            )
+            VALUES %s
+            ON CONFLICT (symbol) DO UPDATE SET
+                latest_price = EXCLUDED.latest_price,
+                is_active = TRUE,
+                last_seen_date = EXCLUDED.last_seen_date,
+                updated_at = NOW()
+        """, [(sym, signal_date, price, price, signal_date) for sym, _, _, price in rows],
+            template="(%s, %s, %s, %s, TRUE, %s, NOW())")
+
+    if snapshot and rows:
+        ensure_tracking_snapshot_tables(cur)
+        execute_values(cur, """
+            INSERT INTO public.strategy_shadow_daily (
+                snapshot_date, symbol, rank, score, price, first_entry_date, entry_price, perf_pct
+            )
+            SELECT v.snapshot_date, v.symbol, v.rank, v.score, v.price, p.first_entry_date, p.entry_price,
+                   ROUND(((v.price - p.entry_price) / NULLIF(p.entry_price, 0)) * 100, 2)
+            FROM (VALUES %s) AS v(snapshot_date, symbol, rank, score, price)
+            JOIN public.strategy_shadow_portfolio p ON p.symbol = v.symbol
+            ON CONFLICT (snapshot_date, symbol) DO UPDATE SET
+                rank = EXCLUDED.rank,
+                score = EXCLUDED.score,
+                price = EXCLUDED.price,
+                first_entry_date = EXCLUDED.first_entry_date,
+                entry_price = EXCLUDED.entry_price,
+                perf_pct = EXCLUDED.perf_pct
+        """, [(signal_date, sym, rank, score, price) for sym, rank, score, price in rows],
+            template="(%s::date, %s, %s::int, %s::int, %s::numeric)")
+
+    logger.info(f"Updated Strategy Shadow Tracker for {len(top_10)} current candidates.")
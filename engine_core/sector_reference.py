@@ -0,0 +1,153 @@
+"""
+Symbol -> sector / industry reference data shared by signal generation, STEE
+and portfolio review.
+
+The map comes from one classification source: the first of these, in
+priority order, that exists and has rows (a missing table is skipped):
+
+* ``stock_sectors.industry``          NSE Nifty 500 industry classification
+* ``universe.sector``                 sector from the loaded universe file
+* ``prde_companies.sector/industry``  PRDE fundamentals import
+
+Sources are not merged: each uses its own label set, and the signal
+generator's sector cap only limits concentration when every symbol is
+bucketed by the same taxonomy. Symbols the source does not cover are
+``UNKNOWN``.
+
+It is loaded once per process into an immutable ``SectorMap`` and reloaded
+after ``MRI_SECTOR_TTL_SECONDS`` (default 1h), so long-lived API workers pick
+up new classifications. A failed load keeps serving the previous map and is
+retried after ``MRI_SECTOR_RETRY_SECONDS`` instead of caching the failure.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from engine_core.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+SECTOR_TTL_SECONDS = float(os.environ.get("MRI_SECTOR_TTL_SECONDS", "3600"))
+SECTOR_RETRY_SECONDS = float(os.environ.get("MRI_SECTOR_RETRY_SECONDS", "60"))
+UNKNOWN_SECTOR = "UNKNOWN"
+
+# (name, query) in priority order; each row is (symbol, sector, industry)
+_SOURCES = [
+    ("stock_sectors", "SELECT symbol, industry AS sector, industry FROM stock_sectors"),
+    ("universe", "SELECT symbol, sector, NULL AS industry FROM universe"),
+    ("prde_companies", "SELECT ticker AS symbol, sector, industry FROM prde_companies"),
+]
+
+
+def _normalize(symbol):
+    symbol = str(symbol or "").upper().strip()
+    for suffix in (".NS", ".BO"):
+        if symbol.endswith(suffix):
+            return symbol[: -len(suffix)]
+    return symbol
+
+
+@dataclass(frozen=True)
+class SectorMap:
+    sectors: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    industries: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    source: str = None  # table the labels came from
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def sector(self, symbol):
+        return self.sectors.get(symbol, UNKNOWN_SECTOR)
+
+    def industry(self, symbol):
+        return self.industries.get(symbol, UNKNOWN_SECTOR)
+
+    def __len__(self):
+        return len(self.sectors)
+
+
+_lock = threading.Lock()
+_sector_map = None
+_expires_at = 0.0
+
+
+def _load(cur):
+    """SectorMap from the first source with rows, or None if none has any."""
+    for name, query in _SOURCES:
+        try:
+            cur.execute(f"SAVEPOINT sector_{name}")
+            cur.execute(query)
+            rows = cur.fetchall()
+            cur.execute(f"RELEASE SAVEPOINT sector_{name}")
+        except Exception as e:
+            cur.execute(f"ROLLBACK TO SAVEPOINT sector_{name}")
+            logger.info(f"Sector source {name} unavailable: {e}")
+            continue
+        if not rows:
+            continue
+        sectors, industries = {}, {}
+        for r in rows:
+            symbol = _normalize(r["symbol"])
+            if not symbol:
+                continue
+            if r["sector"] and symbol not in sectors:
+                sectors[symbol] = r["sector"]
+            if r["industry"] and symbol not in industries:
+                industries[symbol] = r["industry"]
+        return SectorMap(
+            sectors=MappingProxyType(sectors),
+            industries=MappingProxyType(industries),
+            source=name,
+        )
+    return None
+
+
+def invalidate_sector_map():
+    """Force the next caller in this process to reload."""
+    global _expires_at
+    _expires_at = 0.0
+
+
+def get_sector_map(conn=None):
+    """
+    Return the cached SectorMap, reloading it once the TTL has passed.
+
+    ``conn`` (optional) is used for the reload (inside savepoints, so the
+    caller's transaction is left intact); otherwise a pooled engine
+    connection is borrowed.
+    """
+    global _sector_map, _expires_at
+    sector_map = _sector_map
+    if sector_map is not None and time.monotonic() < _expires_at:
+        return sector_map
+
+    with _lock:
+        if _sector_map is not None and time.monotonic() < _expires_at:
+            return _sector_map
+
+        own_conn = conn is None
+        try:
+            if own_conn:
+                conn = get_connection()
+            from psycopg2.extras import RealDictCursor
+
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                loaded = _load(cur)
+            if own_conn:
+                conn.rollback()
+        except Exception as e:
+            logger.warning(f"Sector map load failed, keeping previous map: {e}")
+            loaded = None
+        finally:
+            if own_conn and conn is not None:
+                conn.close()
+
+        if loaded is not None:
+            _sector_map = loaded
+            _expires_at = time.monotonic() + SECTOR_TTL_SECONDS
+            logger.info(f"Sector map loaded: {len(loaded)} symbols from {loaded.source}")
+        else:
+            _sector_map = _sector_map or SectorMap()
+            _expires_at = time.monotonic() + SECTOR_RETRY_SECONDS
+        return _sector_map
@@ -3,11 +3,14 @@ Daily Signal Generator — runs after engine pipeline completes.
 Generates BUY/SELL signals for each active client based on latest scores and regime.
 """
 import psycopg2
-from psycopg2.extras import RealDictCursor, execute_batch
+from psycopg2.extras import RealDictCursor, execute_values
 import logging
 import os
 from datetime import date
 from engine_core.db import get_connection as _get_raw_connection
+from engine_core.ranked_candidates import rank_candidates, save_ranked_candidates, select_buys
+from engine_core.score_tracking import update_strategy_shadow_tracking, update_top_score_tracking
+from engine_core.sector_reference import get_sector_map
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -34,31 +37,6 @@ def get_latest_regime(cur):
     return row["classification"] if row else "NEUTRAL"
 
 
-# Cache for sector lookups (populated once per run)
-_sector_cache = {}
-
-
-def _get_sector_proxy(cur, symbol):
-    """Get sector/industry for a stock.
-    Uses NSE Nifty 500 industry classification cached in memory.
-    Falls back to 'UNKNOWN' if not available.
-    """
-    global _sector_cache
-    if not _sector_cache:
-        # Try to load from a sector mapping table if it exists
-        try:
-            cur.execute("""
-                SELECT symbol, industry FROM stock_sectors
-            """)
-            rows = cur.fetchall()
-            _sector_cache = {r["symbol"]: r["industry"] for r in rows}
-        except Exception:
-            # Table doesn't exist yet — use empty cache
-            _sector_cache = {"_initialized": True}
-
-    return _sector_cache.get(symbol, "UNKNOWN")
-
-
 def get_latest_scores(cur, min_score=0):
     """Get the most recent stock scores with RS for ranking.
     Applies ₹10 Cr ADTV liquidity gate to filter illiquid stocks.
@@ -89,18 +67,59 @@ def get_next_day_open_prices(cur):
     return {r["symbol"]: {"open": r["open"], "close": r["close"]} for r in rows}
 
 
-def get_client_open_positions(cur, client_id):
-    """Get symbols the client currently holds."""
+def get_open_positions_by_client(cur):
+    """Open symbols of every active client in one query: {client_id: {symbol, ...}}."""
     cur.execute("""
-        SELECT symbol FROM client_portfolio
-        WHERE client_id = %s AND is_open = true
-    """, (client_id,))
-    return {r["symbol"] for r in cur.fetchall()}
+        SELECT cp.client_id, cp.symbol
+        FROM client_portfolio cp
+        JOIN clients c ON c.id = cp.client_id
+        WHERE c.is_active = true AND cp.is_open = true
+    """)
+    positions = {}
+    for r in cur.fetchall():
+        positions.setdefault(str(r["client_id"]), set()).add(r["symbol"])
+    return positions
 
 
-def generate_signals_for_client(cur, client_id, regime, scores, prices, signal_date):
-    """Generate BUY/SELL signals for one client."""
-    open_positions = get_client_open_positions(cur, client_id)
+def build_signal_context(cur, regime, scores, prices):
+    """
+    Per-run state shared by every client: scores indexed by symbol and the
+    day's ranked candidate list (see engine_core.ranked_candidates), so each
+    client only has to merge it against what it holds.
+    """
+    score_map = {}
+    for s in scores:
+        score_map.setdefault(s["symbol"], s["total_score"])
+
+    candidates = rank_candidates(
+        scores, prices, regime,
+        sector_of=get_sector_map(cur.connection).sector,
+        min_buy_score=MIN_BUY_SCORE,
+        min_absolute_score=MIN_ABSOLUTE_SCORE,
+    )
+    return {
+        "regime": regime,
+        "score_map": score_map,
+        "candidates": candidates,
+        "has_buys": any(c["eligible"] for c in candidates),
+        "picks": {},
+    }
+
+
+def _select_buys(context, open_positions, slots):
+    """BUY picks for a holding set, memoized: clients holding the same symbols get the same picks."""
+    key = (frozenset(open_positions), slots)
+    picks = context["picks"].get(key)
+    if picks is None:
+        picks = select_buys(context["candidates"], open_positions, slots, MAX_SECTOR_STOCKS)
+        context["picks"][key] = picks
+    return picks
+
+
+def generate_signals_for_client(client_id, open_positions, context, prices, signal_date):
+    """Generate BUY/SELL signals for one client from its open positions and the shared context."""
+    regime = context["regime"]
+    score_map = context["score_map"]
     signals = []
 
     # ── SELL SIGNALS ──
@@ -114,13 +133,12 @@ def generate_signals_for_client(cur, client_id, regime, scores, prices, signal_d
                 "symbol": sym,
                 "action": "SELL",
                 "recommended_price": price_data.get("close"),
-                "score": next((s["total_score"] for s in scores if s["symbol"] == sym), None),
+                "score": score_map.get(sym),
                 "regime": regime,
                 "reason": "REGIME_BEAR: Market in bearish regime, exit all positions",
             })
     else:
         # Check individual scores for SELL
-        score_map = {s["symbol"]: s["total_score"] for s in scores}
         for sym in open_positions:
             score = score_map.get(sym, 0)
             price_data = prices.get(sym, {})
@@ -137,46 +155,12 @@ def generate_signals_for_client(cur, client_id, regime, scores, prices, signal_d
                 })
 
     # ── BUY SIGNALS ──
-    pending_sells = {s["symbol"] for s in signals if s["action"] == "SELL"}
+    pending_sells = {s["symbol"] for s in signals}
     effective_positions = len(open_positions - pending_sells)
 
-    if (regime == "BULL" or regime == "NEUTRAL") and effective_positions < MAX_POSITIONS:
+    if context["has_buys"] and effective_positions < MAX_POSITIONS:
         slots = MAX_POSITIONS - effective_positions
-        # Top scoring stocks not already held, passing liquidity gate
-        # In NEUTRAL regime, we require score >= 85
-        current_threshold = MIN_BUY_SCORE if regime == "BULL" else 85
-        eligible = [
-            s for s in scores
-            if s["total_score"] >= current_threshold
-            and s["symbol"] not in open_positions
-            and s["symbol"] in prices
-        ]
-
-        # Track sector concentration for this client's portfolio+new picks
-        sector_count = {}  # sector -> count of stocks
-        selected = []
-
-        for stock in eligible:
-            if len(selected) >= slots:
-                break
-
-            # Cash toggle: skip if score below absolute momentum threshold
-            if stock["total_score"] < MIN_ABSOLUTE_SCORE:
-                logger.info(f"  Cash toggle: skipping {stock['symbol']} (score={stock['total_score']} < {MIN_ABSOLUTE_SCORE})")
-                continue
-
-            # Sector concentration cap (use first letter of symbol as proxy
-            # until sector data is available; future: use actual GICS sector)
-            sector = _get_sector_proxy(cur, stock["symbol"])
-            current_sector_count = sector_count.get(sector, 0)
-            if current_sector_count >= MAX_SECTOR_STOCKS:
-                logger.info(f"  Sector cap: skipping {stock['symbol']} (sector={sector}, already {current_sector_count} stocks)")
-                continue
-
-            sector_count[sector] = current_sector_count + 1
-            selected.append(stock)
-
-        for stock in selected:
+        for stock in _select_buys(context, open_positions, slots):
             price_data = prices.get(stock["symbol"], {})
             adtv_cr = stock.get("adtv", 0) / 10_000_000  # Convert to Cr
             signals.append({
@@ -193,85 +177,29 @@ def generate_signals_for_client(cur, client_id, regime, scores, prices, signal_d
     return signals
 
 
-def update_top_score_tracking(cur, scores, prices, signal_date):
-    """
-    Update the Hall of Fame table. 
-    Stocks with score >= 75 are tracked to monitor long-term performance.
-    """
-    top_performers = [s for s in scores if s["total_score"] >= 75]
-    if not top_performers:
-        return
-
-    for s in top_performers:
-        sym = s["symbol"]
-        score = s["total_score"]
-        price_data = prices.get(sym, {})
-        current_price = price_data.get("close")
-        
-        if current_price is None:
-            continue
-
-        # Upsert logic:
-        # If new: set first_appeared_date, entry_price, entry_score.
-        # If exists: update latest_price, max_score, last_seen_date.
-        cur.execute("""
-            INSERT INTO public.top_score_tracking (
-                symbol, first_appeared_date, entry_price, entry_score, 
-                latest_price, max_score, last_seen_date, updated_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
-            ON CONFLICT (symbol) DO UPDATE SET
-                latest_price = EXCLUDED.latest_price,
-                max_score = GREATEST(top_score_tracking.max_score, EXCLUDED.max_score),
-                last_seen_date = EXCLUDED.last_seen_date,
-                updated_at = NOW();
-        """, (sym, signal_date, current_price, score, current_price, score, signal_date))
-
-    logger.info(f"Updated Hall of Fame tracking for {len(top_performers)} top-scoring stocks.")
-
-
-def update_strategy_shadow_tracking(cur, scores, prices, signal_date):
-    """
-    Update the Strategy Shadow Portfolio.
-    Tracks the Top 10 stocks by score regardless of market regime.
-    This helps audit if the regime filter is saving money or skipping alpha.
-    """
-    # Top 10 purely by score and liquidity (same as strategy, but ignoring regime)
-    top_10 = scores[:10]
-    if not top_10:
-        return
+def generate_all_signals(cur, client_ids, context, prices, signal_date):
+    """BUY/SELL signals for every client in one pass (one positions query, shared candidate list)."""
+    positions = get_open_positions_by_client(cur)
+    signals = []
+    for client_id in client_ids:
+        client_signals = generate_signals_for_client(client_id, positions.get(client_id, set()), context, prices, signal_date)
+        if client_signals:
+            logger.debug(f"  Client {client_id[:8]}...: {len(client_signals)} signals")
+        signals.extend(client_signals)
+    return signals
 
-    top_symbols = [s["symbol"] for s in top_10]
 
-    # 1. Mark existing stocks as inactive if they are no longer in the Top 10
-    cur.execute("""
-        UPDATE public.strategy_shadow_portfolio 
-        SET is_active = FALSE 
-        WHERE symbol NOT IN %s AND is_active = TRUE
-    """, (tuple(top_symbols),))
-
-    # 2. Add or Update the current Top 10
-    for s in top_10:
-        sym = s["symbol"]
-        price_data = prices.get(sym, {})
-        current_price = price_data.get("close")
-        if current_price is None:
-            continue
-
-        cur.execute("""
-            INSERT INTO public.strategy_shadow_portfolio (
-                symbol, first_entry_date, entry_price, 
-                latest_price, is_active, last_seen_date, updated_at
-            )
-            VALUES (%s, %s, %s, %s, TRUE, %s, NOW())
-            ON CONFLICT (symbol) DO UPDATE SET
-                latest_price = EXCLUDED.latest_price,
-                is_active = TRUE,
-                last_seen_date = EXCLUDED.last_seen_date,
-                updated_at = NOW();
-        """, (sym, signal_date, current_price, current_price, signal_date))
-
-    logger.info(f"Updated Strategy Shadow Tracker for {len(top_10)} current candidates.")
+def insert_signals(cur, signals):
+    """Write all signals with multi-row INSERTs."""
+    if not signals:
+        return
+    execute_values(cur, """
+        INSERT INTO client_signals (client_id, date, symbol, action, recommended_price, score, regime, reason)
+        VALUES %s
+        ON CONFLICT (client_id, date, symbol, action) DO NOTHING
+    """, signals,
+        template="(%(client_id)s, %(date)s, %(symbol)s, %(action)s, %(recommended_price)s, %(score)s, %(regime)s, %(reason)s)",
+        page_size=1000)
 
 
 def run_signal_generator():
@@ -300,6 +228,10 @@ def run_signal_generator():
         logger.error(f"Failed to update Tracking Tables: {e}")
         conn.rollback()
 
+    # Rank today's candidates once and persist them for the API / emails
+    context = build_signal_context(cur, regime, scores, prices)
+    save_ranked_candidates(cur, signal_date, context["candidates"])
+
     # Get all active clients
     cur.execute("SELECT id FROM clients WHERE is_active = true")
     clients = cur.fetchall()
@@ -307,23 +239,15 @@ def run_signal_generator():
 
     if not clients:
         logger.warning("No active clients. Nothing to do.")
+        conn.commit()
         conn.close()
         return
 
-    total_signals = 0
-    for client in clients:
-        client_id = str(client["id"])
-        signals = generate_signals_for_client(cur, client_id, regime, scores, prices, signal_date)
-
-        if signals:
-            sql = """
-                INSERT INTO client_signals (client_id, date, symbol, action, recommended_price, score, regime, reason)
-                VALUES (%(client_id)s, %(date)s, %(symbol)s, %(action)s, %(recommended_price)s, %(score)s, %(regime)s, %(reason)s)
-                ON CONFLICT (client_id, date, symbol, action) DO NOTHING
-            """
-            execute_batch(cur, sql, signals, page_size=100)
-            total_signals += len(signals)
-            logger.info(f"  Client {client_id[:8]}...: {len(signals)} signals ({sum(1 for s in signals if s['action']=='BUY')} BUY, {sum(1 for s in signals if s['action']=='SELL')} SELL)")
+    signals = generate_all_signals(cur, [str(c["id"]) for c in clients], context, prices, signal_date)
+    insert_signals(cur, signals)
+    total_signals = len(signals)
+    buys = sum(1 for s in signals if s["action"] == "BUY")
+    logger.info(f"  {buys} BUY, {total_signals - buys} SELL across {len({s['client_id'] for s in signals})} clients")
 
     conn.commit()
     cur.close()
@@ -0,0 +1,288 @@
+"""
+Array-based STEE (momentum swing) backtest.
+
+Indicators are computed once per symbol with grouped rolling/ewm kernels and
+pivoted into dense (date x symbol) arrays. The entry filters -- 10-day
+breakout, volume surge, candle strength, EMA-200 trend and, optionally, the
+live engine's gap-up and ATR-extension filters -- are evaluated as whole-array
+masks. Open trades live in slot arrays (kept in entry order), exits are one
+vectorized scan per day and the portfolio is valued once per day, with the
+running total carried through the day's entries for 1%-risk sizing.
+
+The arrays do not depend on the rules, so one ``build_stee_arrays`` call can
+back many ``run_stee`` runs (e.g. sweeps over ``max_gap_up_pct`` /
+``max_atr_mult``).
+"""
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Live-engine no-trade filters, shared with swing_execution_engine
+MAX_GAP_UP_PCT = 4.0       # 4% max gap on breakout
+MAX_ATR_MULT = 2.0         # 2.0x ATR max candle range
+
+
+@dataclass
+class SteeRules:
+    initial_capital: float = 100000.0
+    tx_cost: float = 0.002
+    risk_per_trade: float = 0.01
+    volume_mult: float = 1.5
+    min_close_strength: float = 0.7  # close in the top 30% of the day's range
+    sideways_size: float = 0.5
+    max_gap_up_pct: float = None     # None = off; live engine: MAX_GAP_UP_PCT
+    max_atr_mult: float = None       # None = off; live engine: MAX_ATR_MULT
+
+
+# ---------------------------------------------------------------------------
+# Indicators
+# ---------------------------------------------------------------------------
+def compute_indicators(df):
+    """
+    Add the STEE indicator columns to a long (symbol, date) price frame.
+
+    Same definitions as the per-symbol ``transform(lambda ...)`` versions, but
+    using pandas' grouped rolling/ewm kernels and whole-column shifts.
+    """
+    df = df.sort_values(["symbol", "date"]).reset_index(drop=True)
+    by_symbol = df.groupby("symbol", sort=False)
+    first_row = df["symbol"].ne(df["symbol"].shift())
+
+    def _ungroup(result):
+        return result.reset_index(level=0, drop=True).sort_index()
+
+    def _lag(series):
+        return series.shift(1).mask(first_row)
+
+    for span in (10, 50, 200):
+        df[f"ema_{span}"] = _ungroup(by_symbol["close"].ewm(span=span, adjust=False).mean())
+    df["high_10d"] = _lag(_ungroup(by_symbol["high"].rolling(10).max()))
+    df["low_5d"] = _lag(_ungroup(by_symbol["low"].rolling(5).min()))
+    df["avg_vol_20"] = _ungroup(by_symbol["volume"].rolling(20).mean())
+
+    df["prev_close"] = _lag(df["close"])
+    true_range = np.fmax(
+        df["high"] - df["low"],
+        np.fmax((df["high"] - df["prev_close"]).abs(), (df["low"] - df["prev_close"]).abs()),
+    )
+    df["atr_14"] = _ungroup(true_range.groupby(df["symbol"], sort=False).rolling(14).mean())
+    return df
+
+
+def index_regime(idx):
+    """BULLISH / BEARISH / SIDEWAYS / NEUTRAL per index date from its EMA-50/200 structure."""
+    idx = idx.sort_values("date").copy()
+    ema_50 = idx["close"].ewm(span=50, adjust=False).mean()
+    ema_200 = idx["close"].ewm(span=200, adjust=False).mean()
+    regime = pd.Series("NEUTRAL", index=idx.index)
+    regime[(idx["close"] > ema_200) & (ema_50 > ema_200)] = "BULLISH"
+    regime[(idx["close"] < ema_200) & (ema_50 < ema_200)] = "BEARISH"
+    regime[(regime == "NEUTRAL") & ((idx["close"] - ema_200).abs() / ema_200 <= 0.02)] = "SIDEWAYS"
+    return dict(zip(idx["date"], regime))
+
+
+# ---------------------------------------------------------------------------
+# Dense arrays
+# ---------------------------------------------------------------------------
+_FIELDS = ["open", "high", "low", "close", "volume", "prev_close",
+           "ema_10", "ema_200", "high_10d", "low_5d", "avg_vol_20", "atr_14"]
+
+
+def build_stee_arrays(df, regime_map, start_date=None, end_date=None):
+    """
+    Pivot an indicator frame (from ``compute_indicators``) into (date x symbol) arrays.
+
+    Trading days are the dates with price rows in ``[start_date, end_date]``;
+    symbols are sorted, matching the row order of the old per-date frames.
+    ``present`` marks the (date, symbol) cells that had a row.
+    """
+    window = df
+    if start_date is not None:
+        window = window[window["date"] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        window = window[window["date"] <= pd.Timestamp(end_date)]
+
+    d, dates = pd.factorize(window["date"], sort=True)
+    s, symbols = pd.factorize(window["symbol"], sort=True)
+    shape = (len(dates), len(symbols))
+
+    m = {
+        "dates": list(dates),
+        "symbols": np.asarray(symbols, dtype=object),
+        "regime": np.array([regime_map.get(day, "NEUTRAL") for day in dates], dtype=object),
+        "present": np.zeros(shape, dtype=bool),
+    }
+    m["present"][d, s] = True
+    for col in _FIELDS:
+        values = np.full(shape, np.nan)
+        values[d, s] = window[col].to_numpy(dtype=float)
+        m[col] = values
+    return m
+
+
+def entry_signals(m, rules):
+    """(date x symbol) mask of STEE entry candidates under ``rules``."""
+    close, high, low = m["close"], m["high"], m["low"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        signal = (
+            m["present"]
+            & (close > m["high_10d"])                                            # breakout
+            & (m["volume"] > rules.volume_mult * m["avg_vol_20"])                # volume
+            & ((close - low) / (high - low) >= rules.min_close_strength)         # strength
+            & (close > m["ema_200"])                                             # trend
+        )
+        if rules.max_gap_up_pct is not None:
+            gap_pct = (m["open"] - m["prev_close"]) / m["prev_close"] * 100
+            signal &= ~(gap_pct > rules.max_gap_up_pct)
+        if rules.max_atr_mult is not None:
+            atr = m["atr_14"]
+            signal &= ~((atr > 0) & (high - low > rules.max_atr_mult * atr))
+    return signal
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+class _Trades:
+    """Open trades in slot arrays (entry order); grows as needed."""
+
+    _COLUMNS = {
+        "sym": np.int64, "entry_day": np.int64, "shares": np.int64,
+        "entry_price": float, "stop_loss": float, "target_2r": float,
+        "initial_risk": float, "cost": float, "partial_exit_price": float,
+        "partial": bool,
+    }
+
+    def __init__(self, n_symbols, capacity=64):
+        self.n = 0
+        self.held = np.zeros(n_symbols, dtype=bool)
+        for name, dtype in self._COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def add(self, **values):
+        if self.n == len(self.sym):
+            for name in self._COLUMNS:
+                arr = getattr(self, name)
+                setattr(self, name, np.concatenate([arr, np.zeros_like(arr)]))
+        for name, value in values.items():
+            getattr(self, name)[self.n] = value
+        self.partial[self.n] = False
+        self.held[values["sym"]] = True
+        self.n += 1
+
+    def drop(self, slots):
+        if not slots:
+            return
+        keep = np.ones(self.n, dtype=bool)
+        keep[slots] = False
+        self.held[self.sym[slots]] = False
+        n_keep = int(keep.sum())
+        for name in self._COLUMNS:
+            arr = getattr(self, name)
+            arr[:n_keep] = arr[:self.n][keep]
+        self.n = n_keep
+
+    def record(self, m, k, day, price, reason, final_val):
+        trade = {
+            "symbol": m["symbols"][self.sym[k]],
+            "entry_date": m["dates"][self.entry_day[k]],
+            "entry_price": float(self.entry_price[k]),
+            "stop_loss": float(self.stop_loss[k]),
+            "target_2r": float(self.target_2r[k]),
+            "shares": int(self.shares[k]),
+            "initial_risk": float(self.initial_risk[k]),
+            "status": "PARTIAL" if self.partial[k] else "OPEN",
+            "cost": float(self.cost[k]),
+        }
+        if self.partial[k]:
+            trade["partial_exit_price"] = float(self.partial_exit_price[k])
+        trade.update({"exit_date": m["dates"][day], "exit_price": price, "reason": reason, "final_val": final_val})
+        return trade
+
+
+def run_stee(m, rules=None):
+    """
+    Run the STEE rules over ``m`` (from ``build_stee_arrays``).
+
+    Exits (checked at the close, in entry order): 5-day-low stop; half the
+    position at 2R; the rest when the close drops below EMA-10. Entries risk
+    ``risk_per_trade`` of current equity per trade (``sideways_size`` of that in
+    SIDEWAYS), none in BEARISH. Returns ``(trade_log, equity_curve)``.
+    """
+    rules = rules or SteeRules()
+    tx_cost = rules.tx_cost
+    signals = entry_signals(m, rules)
+    trades = _Trades(len(m["symbols"]))
+    cash = rules.initial_capital
+    trade_log, equity_curve = [], []
+
+    for i, today in enumerate(m["dates"]):
+        present, close = m["present"][i], m["close"][i]
+
+        # A. Exits
+        if trades.n:
+            n = trades.n
+            sym = trades.sym[:n]
+            live = present[sym]
+            price = close[sym]
+            stop_hit = live & (price <= trades.stop_loss[:n])
+            take_profit = live & ~stop_hit & ~trades.partial[:n] & (price >= trades.target_2r[:n])
+            trailing = live & ~stop_hit & (price < m["ema_10"][i, sym])
+
+            closed = []
+            for k in np.flatnonzero(stop_hit | take_profit | trailing):
+                p = float(price[k])
+                if stop_hit[k]:
+                    exit_val = int(trades.shares[k]) * p * (1 - tx_cost)
+                    cash += exit_val
+                    trade_log.append(trades.record(m, k, i, p, "STOP_LOSS", exit_val))
+                    closed.append(k)
+                    continue
+                if take_profit[k]:
+                    sell_shares = int(trades.shares[k]) // 2
+                    cash += sell_shares * p * (1 - tx_cost)
+                    trades.shares[k] -= sell_shares
+                    trades.partial[k] = True
+                    trades.partial_exit_price[k] = p
+                if trailing[k]:
+                    exit_val = int(trades.shares[k]) * p * (1 - tx_cost)
+                    cash += exit_val
+                    trade_log.append(trades.record(m, k, i, p, "EMA10_TRAILING", exit_val))
+                    closed.append(k)
+            trades.drop(closed)
+
+        # Marked value of open trades with a row today; extended left to right
+        # as entries are added, i.e. the same running sum as a per-trade loop.
+        n = trades.n
+        live = present[trades.sym[:n]]
+        holdings = np.cumsum(trades.shares[:n][live] * close[trades.sym[:n][live]])[-1] if live.any() else 0
+
+        # B. Entries
+        regime = m["regime"][i]
+        if regime != "BEARISH":
+            size_mod = rules.sideways_size if regime == "SIDEWAYS" else 1.0
+            for s in np.flatnonzero(signals[i] & ~trades.held):
+                price = float(close[s])
+                stop_loss = float(m["low_5d"][i, s])
+                risk_per_share = price - stop_loss
+                if not risk_per_share > 0:
+                    continue
+                risk_amt = (cash + holdings) * rules.risk_per_trade * size_mod
+                shares = int(risk_amt / risk_per_share)
+                cost = shares * price * (1 + tx_cost)
+                if shares > 0 and cash >= cost:
+                    cash -= cost
+                    trades.add(
+                        sym=s, entry_day=i, shares=shares, entry_price=price, stop_loss=stop_loss,
+                        target_2r=price + (2 * risk_per_share), initial_risk=risk_amt, cost=cost,
+                    )
+                    holdings = holdings + shares * price
+
+        # C. Equity
+        equity_curve.append({"date": today, "equity": cash + holdings})
+
+    return trade_log, equity_curve
@@ -2,6 +2,7 @@
 Momentum Swing Trading Execution Engine (STEE)
 Implements rule-based breakout entry and hybrid exit management.
 """
+import json
 import logging
 import os
 import sys
@@ -14,6 +15,8 @@ from psycopg2.extras import execute_batch
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from engine_core.db import get_connection
+from engine_core.sector_reference import get_sector_map
+from engine_core.stee_backtest import MAX_ATR_MULT, MAX_GAP_UP_PCT
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("stee")
@@ -21,8 +24,6 @@ logger = logging.getLogger("stee")
 # CONFIG
 RISK_PER_TRADE_PCT = 0.01  # 1% risk
 MIN_ADTV = 100_000_000     # ₹10 Cr
-MAX_GAP_UP_PCT = 4.0       # 4% max gap on breakout
-MAX_ATR_MULT = 2.0         # 2.0x ATR max candle range
 
 def get_latest_regime(cur):
     cur.execute("SELECT classification, ema_200 FROM market_regime ORDER BY date DESC LIMIT 1")
@@ -55,24 +56,49 @@ def get_qualified_watchlist(cur):
 
 def log_audit_event(cur, event_type, severity, message, metadata=None):
     """Log an audit event to the system_audit_logs table."""
+    log_audit_events(cur, [(event_type, severity, message, metadata)])
+
+def log_audit_events(cur, events):
+    """Bulk-insert ``(event_type, severity, message, metadata)`` audit events in order."""
+    if not events:
+        return
     try:
-        import json
-        cur.execute("""
+        execute_batch(cur, """
             INSERT INTO system_audit_logs (event_type, severity, message, metadata)
             VALUES (%s, %s, %s, %s)
-        """, (event_type, severity, message, json.dumps(metadata or {})))
+        """, [(t, sev, msg, json.dumps(meta or {}, default=str)) for t, sev, msg, meta in events])
     except Exception as e:
         logger.error(f"Failed to log audit event: {e}")
 
-def process_entries(cur, regime_row, watchlist, clients):
-    regime = regime_row["classification"]
-    if regime == "BEARISH":
-        logger.info("Regime is BEARISH. Skipping all new entries.")
-        return
+def get_previous_closes(cur, watchlist):
+    """Close of the last trading day before each watchlist row's date, in one query."""
+    if not watchlist:
+        return {}
+    cur.execute("""
+        SELECT w.symbol, p.close
+        FROM unnest(%s::text[], %s::date[]) AS w(symbol, date)
+        CROSS JOIN LATERAL (
+            SELECT close FROM daily_prices
+            WHERE symbol = w.symbol AND date < w.date
+            ORDER BY date DESC LIMIT 1
+        ) p
+    """, ([s["symbol"] for s in watchlist], [s["date"] for s in watchlist]))
+    return {r["symbol"]: r["close"] for r in cur.fetchall()}
 
-    # Position size modifier for SIDEWAYS regime
-    size_modifier = 0.5 if regime == "SIDEWAYS" else 1.0
-    
+def get_open_positions(cur):
+    """(client_id, symbol) pairs with a trade that is not CLOSED."""
+    cur.execute("SELECT client_id, symbol FROM swing_trades WHERE status != 'CLOSED'")
+    return {(str(r["client_id"]), r["symbol"]) for r in cur.fetchall()}
+
+def select_entry_candidates(watchlist, prev_closes, sector_of=None):
+    """
+    Apply the per-stock STEE entry rules (breakout, volume, candle strength,
+    gap-up and ATR filters) and derive stop / 2R target for the survivors.
+    Each candidate carries its sector and the audit events raised while
+    pricing it.
+    """
+    sector_of = sector_of or get_sector_map().sector
+    candidates = []
     for stock in watchlist:
         sym = stock["symbol"]
         close = float(stock["close"])
@@ -103,10 +129,9 @@ def process_entries(cur, regime_row, watchlist, clients):
 
         # 4. No-Trade Filters
         # Gap-up > 4%
-        cur.execute("SELECT close FROM daily_prices WHERE symbol = %s AND date < %s ORDER BY date DESC LIMIT 1", (sym, stock["date"]))
-        prev_close_row = cur.fetchone()
-        if prev_close_row:
-            prev_close = float(prev_close_row["close"])
+        prev_close = prev_closes.get(sym)
+        if prev_close:
+            prev_close = float(prev_close)
             gap = (open_p - prev_close) / prev_close * 100
             if gap > MAX_GAP_UP_PCT:
                 logger.info(f"  Skipping {sym}: Gap up {gap:.1f}% > {MAX_GAP_UP_PCT}%")
@@ -117,57 +142,90 @@ def process_entries(cur, regime_row, watchlist, clients):
             logger.info(f"  Skipping {sym}: Overextended candle ({candle_range:.2f} > {MAX_ATR_MULT} * ATR)")
             continue
 
-        # 5. Generate Signal for each client
         # Stop Loss = Lowest Low of last 5 candles (low_5d)
         stop_loss = float(stock["low_5d"] or low)
         
         # Ensure SL is valid (below entry)
+        audit = []
         if stop_loss >= close:
-            log_audit_event(cur, 'SIGNAL_REJECTED', 'WARNING', 
-                           f"Stop Loss ({stop_loss:.2f}) >= Entry ({close:.2f}) for {sym}. Data anomaly?",
-                           {'symbol': sym, 'close': close, 'stop_loss': stop_loss})
+            audit.append(('SIGNAL_REJECTED', 'WARNING',
+                          f"Stop Loss ({stop_loss:.2f}) >= Entry ({close:.2f}) for {sym}. Data anomaly?",
+                          {'symbol': sym, 'close': close, 'stop_loss': stop_loss}))
             stop_loss = close * 0.95 # Fallback to 5% SL
             
         risk_per_share = close - stop_loss
-        target_2r = close + (2 * risk_per_share)
+        candidates.append({
+            "symbol": sym,
+            "sector": sector_of(sym),
+            "date": stock["date"],
+            "close": close,
+            "stop_loss": stop_loss,
+            "risk_per_share": risk_per_share,
+            "target_2r": close + (2 * risk_per_share),
+            "audit": audit,
+        })
+    return candidates
+
+def process_entries(cur, regime_row, watchlist, clients):
+    """
+    Open trades for every (client x candidate) pair in one pass.
 
-        for client in clients:
+    Previous closes and open positions are prefetched with one query each,
+    quantities come from a client x candidate matrix and the trades plus
+    their audit events are written with batched INSERTs.
+    """
+    regime = regime_row["classification"]
+    if regime == "BEARISH":
+        logger.info("Regime is BEARISH. Skipping all new entries.")
+        return
+
+    # Position size modifier for SIDEWAYS regime
+    size_modifier = 0.5 if regime == "SIDEWAYS" else 1.0
+
+    sector_of = get_sector_map(cur.connection).sector
+    candidates = select_entry_candidates(watchlist, get_previous_closes(cur, watchlist), sector_of)
+    audit = []
+
+    # Generate Signal for each client: risk amount = 1% of capital * size_modifier
+    capital = np.array([float(c["initial_capital"] or 100000) for c in clients])
+    risk_per_share = np.array([c["risk_per_share"] for c in candidates])
+    risk_amount = capital * RISK_PER_TRADE_PCT * size_modifier
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quantity = np.where(risk_per_share > 0, risk_amount[:, None] / risk_per_share, 0)
+    quantity = np.trunc(quantity).astype(np.int64)   # clients x candidates
+
+    open_positions = get_open_positions(cur)
+    trades = []
+    for c, cand in enumerate(candidates):
+        sym = cand["symbol"]
+        audit.extend(cand["audit"])
+        for k, client in enumerate(clients):
             client_id = client["id"]
-            capital = float(client["initial_capital"] or 100000)
-            
-            # Risk amount = 1% of capital * size_modifier
-            risk_amount = capital * RISK_PER_TRADE_PCT * size_modifier
-            quantity = int(risk_amount / risk_per_share) if risk_per_share > 0 else 0
-            
-            if quantity <= 0:
+            qty = int(quantity[k, c])
+            if qty <= 0 or (str(client_id), sym) in open_positions:
                 continue
 
-            # Check if already in trade
-            cur.execute("SELECT id FROM swing_trades WHERE client_id = %s AND symbol = %s AND status != 'CLOSED'", (client_id, sym))
-            if cur.fetchone():
+            # COMPLIANCE AUDIT: risk hard limit before execution
+            if risk_amount[k] > (capital[k] * 0.015): # 1.5% hard limit audit
+                audit.append(('RISK_VIOLATION', 'CRITICAL',
+                              f"Risk amount {risk_amount[k]:.2f} exceeds 1.5% limit for client {client_id}",
+                              {'symbol': sym, 'risk': float(risk_amount[k]), 'capital': float(capital[k])}))
                 continue
 
-            # COMPLIANCE AUDIT: Double check regime and risk before execution
-            if regime == "BEARISH":
-                log_audit_event(cur, 'COMPLIANCE_VIOLATION', 'CRITICAL', 
-                               f"Attempted to entry {sym} in BEARISH regime for client {client_id}",
-                               {'symbol': sym, 'client_id': client_id})
-                continue
-            
-            if risk_amount > (capital * 0.015): # 1.5% hard limit audit
-                 log_audit_event(cur, 'RISK_VIOLATION', 'CRITICAL', 
-                               f"Risk amount {risk_amount:.2f} exceeds 1.5% limit for client {client_id}",
-                               {'symbol': sym, 'risk': risk_amount, 'capital': capital})
-                 continue
+            trades.append((client_id, sym, cand["date"], cand["close"], cand["stop_loss"],
+                           cand["target_2r"], qty, float(risk_amount[k])))
+            open_positions.add((str(client_id), sym))
+            logger.info(f"🚀 BUY SIGNAL: {sym} for Client {str(client_id)[:8]} (Qty: {qty}, SL: {cand['stop_loss']:.2f}, 2R: {cand['target_2r']:.2f})")
+            audit.append(('TRADE_ENTRY', 'INFO', f"STEE Entry for {sym}", {'client_id': client_id, 'qty': qty, 'sector': cand["sector"]}))
 
-            # Record Trade Entry
-            cur.execute("""
-                INSERT INTO swing_trades (client_id, symbol, entry_date, entry_price, stop_loss, take_profit_2r, quantity, risk_amount, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'OPEN')
-            """, (client_id, sym, stock["date"], close, stop_loss, target_2r, quantity, risk_amount))
-            
-            logger.info(f"🚀 BUY SIGNAL: {sym} for Client {str(client_id)[:8]} (Qty: {quantity}, SL: {stop_loss:.2f}, 2R: {target_2r:.2f})")
-            log_audit_event(cur, 'TRADE_ENTRY', 'INFO', f"STEE Entry for {sym}", {'client_id': client_id, 'qty': quantity})
+    # Record Trade Entries
+    if trades:
+        execute_batch(cur, """
+            INSERT INTO swing_trades (client_id, symbol, entry_date, entry_price, stop_loss, take_profit_2r, quantity, risk_amount, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'OPEN')
+        """, trades)
+    log_audit_events(cur, audit)
+    logger.info(f"STEE entries: {len(trades)} trades for {len(candidates)} candidates x {len(clients)} clients")
 
 def process_exits(cur, latest_prices):
     """
@@ -175,10 +233,14 @@ def process_exits(cur, latest_prices):
     1. Hard Stop: Close < Stop Loss
     2. Partial Profit: 50% exit at 2R
     3. Trailing Stop: Close < EMA 10
+
+    Decisions are made in memory; closes, partial exits and audit events are
+    written in one batch each.
     """
     cur.execute("SELECT * FROM swing_trades WHERE status IN ('OPEN', 'PARTIAL_EXIT')")
     open_trades = cur.fetchall()
     
+    closes, partials, audit = [], [], []
     for trade in open_trades:
         sym = trade["symbol"]
         if sym not in latest_prices:
@@ -190,35 +252,37 @@ def process_exits(cur, latest_prices):
         
         # 1. Hard Stop Loss
         if curr_price <= float(trade["stop_loss"]):
-            cur.execute("""
-                UPDATE swing_trades 
-                SET status = 'CLOSED', exit_date = %s, exit_price = %s, exit_reason = 'STOP_LOSS'
-                WHERE id = %s
-            """, (curr_date, curr_price, trade["id"]))
+            closes.append((curr_date, curr_price, 'STOP_LOSS', trade["id"]))
             logger.info(f"🛑 STOP LOSS: {sym} closed at {curr_price:.2f}")
-            log_audit_event(cur, 'TRADE_EXIT', 'INFO', f"Stop Loss hit for {sym}", {'id': trade['id'], 'price': curr_price})
+            audit.append(('TRADE_EXIT', 'INFO', f"Stop Loss hit for {sym}", {'id': trade['id'], 'price': curr_price}))
             continue
 
         # 2. Partial Profit (at 2R)
         if trade["status"] == 'OPEN' and curr_price >= float(trade["take_profit_2r"]):
-            cur.execute("""
-                UPDATE swing_trades 
-                SET status = 'PARTIAL_EXIT', quantity = quantity / 2
-                WHERE id = %s
-            """, (trade["id"],))
+            partials.append(trade["id"])
             logger.info(f"💰 PARTIAL PROFIT: {sym} 50% sold at {curr_price:.2f}")
-            log_audit_event(cur, 'TRADE_EXIT', 'INFO', f"Partial exit (2R) for {sym}", {'id': trade['id'], 'price': curr_price})
+            audit.append(('TRADE_EXIT', 'INFO', f"Partial exit (2R) for {sym}", {'id': trade['id'], 'price': curr_price}))
             continue
 
         # 3. Trailing Stop (EMA 10)
         if curr_price < curr_ema10:
-            cur.execute("""
-                UPDATE swing_trades 
-                SET status = 'CLOSED', exit_date = %s, exit_price = %s, exit_reason = 'TRAILING_STOP_EMA10'
-                WHERE id = %s
-            """, (curr_date, curr_price, trade["id"]))
+            closes.append((curr_date, curr_price, 'TRAILING_STOP_EMA10', trade["id"]))
             logger.info(f"📉 TRAILING EXIT: {sym} closed at {curr_price:.2f} (Below EMA-10)")
-            log_audit_event(cur, 'TRADE_EXIT', 'INFO', f"Trailing exit for {sym}", {'id': trade['id'], 'price': curr_price})
+            audit.append(('TRADE_EXIT', 'INFO', f"Trailing exit for {sym}", {'id': trade['id'], 'price': curr_price}))
+
+    if closes:
+        execute_batch(cur, """
+            UPDATE swing_trades 
+            SET status = 'CLOSED', exit_date = %s, exit_price = %s, exit_reason = %s
+            WHERE id = %s
+        """, closes)
+    if partials:
+        cur.execute("""
+            UPDATE swing_trades 
+            SET status = 'PARTIAL_EXIT', quantity = quantity / 2
+            WHERE id = ANY(%s)
+        """, (partials,))
+    log_audit_events(cur, audit)
 
 def run_stee():
     conn = get_connection()
@@ -0,0 +1,373 @@
+"""
+Rate-limited, adaptive download scheduler for Yahoo Finance price history.
+
+Symbols are grouped by download window (``start``/``end``/``period``) and
+fetched ``batch_size`` tickers per provider call. Requests are paced by a
+token bucket charged one token per ticker (Yahoo serves one chart request per
+ticker), and the number of batches in flight adapts AIMD style: it grows by
+one after a full window of clean batches and halves on throttling. Throttled
+or failed batches are retried with exponential backoff and full jitter, with
+their slot released while they wait; a throttled batch that had already
+fetched some tickers retries only the rest.
+
+A ``DownloadCheckpoint`` records symbols whose batch has been handled, so an
+interrupted full-universe ingest resumes where it stopped.
+
+The provider is any callable ``provider(tickers, **window) -> DataFrame`` that
+returns ``yf.download(..., group_by="ticker")`` shaped frames; it defaults to
+``yahoo_download`` and can be swapped for a local fake (see
+scripts/check_yahoo_scheduler.py). ``yahoo_download`` deliberately does not
+call ``yf.download``: that resets and reads the module-global
+``yfinance.shared._DFS`` / ``_ERRORS`` tables, so concurrent batches would
+overwrite each other's results.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+YAHOO_RATE_PER_SEC = float(os.getenv("YAHOO_RATE_PER_SEC", "4"))
+YAHOO_BATCH_SIZE = int(os.getenv("YAHOO_BATCH_SIZE", "25"))
+YAHOO_MAX_WORKERS = int(os.getenv("YAHOO_MAX_WORKERS", "6"))
+
+_THROTTLE_MARKERS = ("rate limit", "too many requests", "429")
+
+
+class YahooThrottled(Exception):
+    """
+    Provider signalled rate limiting; the batch is retried after backoff.
+
+    ``done`` lists tickers already handled before the throttle (fetched or
+    found to have no data) and ``partial`` holds their batch-shaped frame, so
+    the retry only requests the remaining tickers.
+    """
+
+    def __init__(self, message="", done=(), partial=None):
+        super().__init__(message)
+        self.done = list(done)
+        self.partial = partial
+
+
+def _is_throttle(exc):
+    if isinstance(exc, YahooThrottled) or type(exc).__name__ == "YFRateLimitError":
+        return True
+    return any(marker in str(exc).lower() for marker in _THROTTLE_MARKERS)
+
+
+def yahoo_download(tickers, **window):
+    """
+    One batch via per-ticker ``Ticker.history`` calls, in ``yf.download(group_by="ticker")`` shape.
+
+    Safe to run from several scheduler workers at once. Tickers Yahoo has no
+    prices for are left out; rate limiting raises YahooThrottled carrying the
+    tickers fetched so far, and any other error fails the batch, so neither
+    looks like missing data.
+    """
+    import yfinance as yf
+    from yfinance.exceptions import YFTickerMissingError
+
+    frames, done = {}, []
+    for ticker in tickers:
+        try:
+            df = yf.Ticker(ticker).history(**window, auto_adjust=True, actions=False, raise_errors=True)
+        except YFTickerMissingError:
+            done.append(ticker)
+            continue
+        except Exception as e:
+            if _is_throttle(e):
+                raise YahooThrottled(f"{ticker}: {e}", done=done, partial=_combine(frames)) from e
+            raise
+        done.append(ticker)
+        if df is None or df.empty:
+            continue
+        # Match yf.download's daily output: exchange-local, tz-naive dates
+        if getattr(df.index, "tz", None) is not None:
+            df.index = df.index.tz_localize(None)
+        df.index.name = "Date"
+        frames[ticker] = df
+    return _combine(frames)
+
+
+def _combine(frames):
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+
+
+def split_batch(raw, tickers):
+    """Per-ticker frames (single-ticker yfinance layout) from a batched download."""
+    empty = pd.DataFrame()
+    if raw is None or raw.empty:
+        return {t: empty for t in tickers}
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return {t: (raw.dropna(how="all") if i == 0 else empty) for i, t in enumerate(tickers)}
+
+    level = 0 if set(tickers) & set(raw.columns.get_level_values(0)) else 1
+    present = set(raw.columns.get_level_values(level))
+    return {
+        t: raw.xs(t, axis=1, level=level).dropna(how="all") if t in present else empty
+        for t in tickers
+    }
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens/sec, up to ``capacity`` banked."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._clock, self._sleep = clock, sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        # Requests larger than the bucket are admitted once it is full
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class _AdaptiveGate:
+    """Concurrency limit that grows additively and halves on throttling."""
+
+    def __init__(self, initial, lo, hi):
+        self.lo, self.hi = lo, hi
+        self.limit = max(lo, min(hi, initial))
+        self.active = 0
+        self.peak = self.limit
+        self._clean = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self._clean += 1
+            if self._clean >= self.limit and self.limit < self.hi:
+                self.limit += 1
+                self.peak = max(self.peak, self.limit)
+                self._clean = 0
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.lo, self.limit // 2)
+            self._clean = 0
+
+
+class DownloadCheckpoint:
+    """JSON record of symbols already handled; ``run_key`` mismatch starts afresh."""
+
+    def __init__(self, path, run_key=None):
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+        self.done = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+                if state.get("run_key") == run_key:
+                    self.done = set(state.get("done", []))
+                else:
+                    logger.info(f"Checkpoint {path} is for another run, starting fresh.")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+
+    def mark_done(self, symbols):
+        with self._lock:
+            self.done.update(symbols)
+            if not self.path:
+                return
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"run_key": self.run_key, "done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+    def clear(self):
+        with self._lock:
+            self.done = set()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+@dataclass(frozen=True)
+class DownloadJob:
+    symbol: str
+    ticker: str
+    window: dict = field(default_factory=dict)  # start/end/period history kwargs
+
+
+@dataclass
+class DownloadReport:
+    frames: dict = field(default_factory=dict)   # symbol -> frame (only without on_batch)
+    accepted: list = field(default_factory=list)
+    missing: list = field(default_factory=list)  # no data, or rejected by on_batch
+    failed: list = field(default_factory=list)   # batch still failing after retries
+    skipped: list = field(default_factory=list)  # already in the checkpoint
+    requests: int = 0
+    throttled: int = 0
+    peak_workers: int = 0
+    elapsed: float = 0.0
+
+
+class DownloadScheduler:
+    def __init__(
+        self,
+        provider=None,
+        batch_size=YAHOO_BATCH_SIZE,
+        rate=YAHOO_RATE_PER_SEC,
+        burst=None,
+        min_workers=1,
+        max_workers=YAHOO_MAX_WORKERS,
+        initial_workers=2,
+        max_retries=5,
+        backoff_base=1.0,
+        backoff_max=60.0,
+        checkpoint=None,
+        sleep=time.sleep,
+    ):
+        self.provider = provider or yahoo_download
+        self.batch_size = max(1, int(batch_size))
+        self.bucket = TokenBucket(rate, burst if burst is not None else max(rate, self.batch_size), sleep=sleep)
+        self.gate = _AdaptiveGate(initial_workers, max(1, min_workers), max(1, max_workers))
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint = checkpoint
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _batches(self, jobs):
+        groups = {}
+        for job in jobs:
+            key = tuple(sorted((k, str(v)) for k, v in job.window.items()))
+            groups.setdefault(key, []).append(job)
+        for group in groups.values():
+            for i in range(0, len(group), self.batch_size):
+                yield group[i:i + self.batch_size]
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _fetch(self, batch, report):
+        """``{ticker: frame}`` for the batch; tickers still failing after retries map to None."""
+        tickers = [job.ticker for job in batch]
+        frames = dict.fromkeys(tickers)
+        remaining = tickers
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.gate:
+                    self.bucket.acquire(len(remaining))
+                    with self._lock:
+                        report.requests += 1
+                    raw = self.provider(remaining, **batch[0].window)
+                self.gate.on_success()
+                frames.update(split_batch(raw, remaining))
+                return frames
+            except Exception as e:
+                if isinstance(e, YahooThrottled) and e.done:
+                    # Keep what was fetched before the throttle; retry the rest
+                    frames.update(split_batch(e.partial, e.done))
+                    done = set(e.done)
+                    remaining = [t for t in remaining if t not in done]
+                if _is_throttle(e):
+                    self.gate.on_throttle()
+                    with self._lock:
+                        report.throttled += 1
+                    reason = f"throttled, workers -> {self.gate.limit}"
+                else:
+                    reason = f"{type(e).__name__}: {e}"
+                if not remaining:
+                    return frames
+                if attempt == self.max_retries:
+                    logger.error(f"  ❌ Batch of {len(remaining)} ({remaining[0]}...) failed after {attempt + 1} attempts: {reason}")
+                    return frames
+                delay = self._backoff(attempt)
+                logger.warning(f"  Batch of {len(remaining)} ({remaining[0]}...) {reason}; retrying in {delay:.1f}s")
+                self._sleep(delay)
+
+    def run(self, jobs, on_batch=None):
+        """
+        Download every job not already in the checkpoint.
+
+        ``on_batch(frames)`` receives ``{symbol: frame}`` for each batch's
+        non-empty results (calls are serialized) and may return the symbols
+        it accepted; those -- or every non-empty symbol when it returns None
+        -- are checkpointed. Without ``on_batch`` the frames are collected in
+        the report.
+        """
+        start = time.monotonic()
+        report = DownloadReport()
+        done = self.checkpoint.done if self.checkpoint else set()
+        report.skipped = [job.symbol for job in jobs if job.symbol in done]
+        pending = [job for job in jobs if job.symbol not in done]
+        callback_lock = threading.Lock()
+
+        def work(batch):
+            frames = self._fetch(batch, report)
+            failed = [job.symbol for job in batch if frames[job.ticker] is None]
+            if failed:
+                with self._lock:
+                    report.failed.extend(failed)
+            batch = [job for job in batch if frames[job.ticker] is not None]
+            got = {job.symbol: frames[job.ticker] for job in batch if not frames[job.ticker].empty}
+            with callback_lock:
+                if on_batch is not None:
+                    accepted = on_batch(got) if got else None
+                    accepted = set(got) if accepted is None else set(accepted)
+                else:
+                    accepted = set(got)
+                    report.frames.update(got)
+                if self.checkpoint and accepted:
+                    self.checkpoint.mark_done(accepted)
+                report.accepted.extend(job.symbol for job in batch if job.symbol in accepted)
+                report.missing.extend(job.symbol for job in batch if job.symbol not in accepted)
+
+        batches = list(self._batches(pending))
+        logger.info(f"📡 Downloading {len(pending)} symbols in {len(batches)} batches "
+                    f"({len(report.skipped)} already checkpointed)")
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # Surface exceptions from on_batch (e.g. a DB error) to the caller;
+            # batches not started yet are dropped and stay out of the checkpoint.
+            for future in [executor.submit(work, batch) for batch in batches]:
+                future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        report.peak_workers = self.gate.peak
+        report.elapsed = time.monotonic() - start
+        logger.info(
+            f"✅ Downloads done in {report.elapsed:.1f}s: {len(report.accepted)} ok, "
+            f"{len(report.missing)} without data, {len(report.failed)} failed, "
+            f"{report.requests} requests, {report.throttled} throttled, peak {report.peak_workers} workers"
+        )
+        return report
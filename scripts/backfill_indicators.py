@@ -26,7 +26,7 @@ logger = logging.getLogger(__name__)
 # Force writing a full year of history to erase NULL gaps
 BACKFILL_ROWS = 255
 
-def run_backfill(batch_size=20):
+def run_backfill(batch_size=100):
     """Effectively recomputes and writes history for all active symbols."""
     conn = get_connection()
     try:
@@ -42,32 +42,23 @@ def run_backfill(batch_size=20):
 
     logger.info(f"Starting backfill for {len(symbols)} symbols ({BACKFILL_ROWS} rows each)...")
 
-    # Temporarily override PERSIST_ROWS in indicator_engine module
-    import engine_core.indicator_engine
-    original_persist = engine_core.indicator_engine.PERSIST_ROWS
-    engine_core.indicator_engine.PERSIST_ROWS = BACKFILL_ROWS
+    for i, symbol_batch in enumerate(chunked(symbols, batch_size), 1):
+        logger.info(f"Processing batch {i} ({len(symbol_batch)} symbols)...")
 
-    try:
-        for i, symbol_batch in enumerate(chunked(symbols, batch_size), 1):
-            logger.info(f"Processing batch {i} ({len(symbol_batch)} symbols)...")
-            
-            # 1. Fetch history
-            df, idx_df = fetch_data(symbols=symbol_batch)
-            if df.empty:
-                continue
-                
-            # 2. Compute indicators
-            updates = compute_indicators(df, idx_df)
-            if not updates:
-                continue
-                
-            # 3. Write to DB
-            update_db_with_indicators(updates)
-            
-            logger.info(f"Batch {i} complete.")
-    finally:
-        # Restore original setting
-        engine_core.indicator_engine.PERSIST_ROWS = original_persist
+        # 1. Fetch history
+        df, idx_df = fetch_data(symbols=symbol_batch)
+        if df.empty:
+            continue
+
+        # 2. Compute indicators (columnar frame, BACKFILL_ROWS per symbol)
+        updates = compute_indicators(df, idx_df, persist_rows=BACKFILL_ROWS)
+        if updates.empty:
+            continue
+
+        # 3. Write to DB (COPY into a temp table + one UPDATE ... FROM per batch)
+        update_db_with_indicators(updates)
+
+        logger.info(f"Batch {i} complete.")
 
     logger.info("=== Backfill Complete ===")
 
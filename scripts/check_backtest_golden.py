@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Golden-output check for the shared backtest engine.
+
+Re-runs the DB-backed portfolio simulations through ``engine_core.backtest_engine``
+and diffs the fresh trade log / equity curve against the committed CSVs in
+``outputs/``. Text columns must match exactly, numeric columns within
+``--rtol``. Exit code 0 = all cases match, 1 = mismatch.
+
+The golden CSVs are only meaningful against the DB they were produced from;
+after a data refresh, regenerate them with the engines' own CLIs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from engine_core.portfolio_engine import run_portfolio_simulation
+from engine_core.portfolio_engine_nextday import run_portfolio_simulation_nextday
+
+CHECK_PREFIX = "golden_check_"
+
+# name -> (runner, golden output prefix)
+CASES = {
+    "signal_day_next_open": (run_portfolio_simulation, ""),
+    "next_day_open": (run_portfolio_simulation_nextday, "nextday_"),
+}
+
+
+def compare_csv(golden: Path, produced: Path, rtol: float) -> list[str]:
+    expected = pd.read_csv(golden)
+    actual = pd.read_csv(produced)
+    if list(expected.columns) != list(actual.columns):
+        return [f"columns differ: {list(expected.columns)} vs {list(actual.columns)}"]
+    if len(expected) != len(actual):
+        return [f"row count differs: {len(expected)} vs {len(actual)}"]
+
+    problems = []
+    for col in expected.columns:
+        if pd.api.types.is_numeric_dtype(expected[col]) and pd.api.types.is_numeric_dtype(actual[col]):
+            ok = np.isclose(expected[col], actual[col], rtol=rtol, atol=1e-9, equal_nan=True)
+        else:
+            ok = expected[col].astype(str).to_numpy() == actual[col].astype(str).to_numpy()
+        if not ok.all():
+            first = int(np.flatnonzero(~ok)[0])
+            problems.append(
+                f"{col}: {int((~ok).sum())} rows differ, first at row {first} "
+                f"({expected[col].iloc[first]!r} vs {actual[col].iloc[first]!r})"
+            )
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Diff backtest engine output against outputs/ golden CSVs")
+    parser.add_argument("--case", choices=sorted(CASES), action="append", help="Case(s) to run (default: all)")
+    parser.add_argument("--rtol", type=float, default=1e-6, help="Relative tolerance for numeric columns")
+    parser.add_argument("--keep", action="store_true", help="Keep the regenerated CSVs")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # the engines write to the relative outputs/ directory
+    failed = False
+    for name in args.case or sorted(CASES):
+        runner, golden_prefix = CASES[name]
+        runner(output_prefix=f"{CHECK_PREFIX}{golden_prefix}")
+        for table in ("trade_log", "equity_curve"):
+            golden = ROOT / "outputs" / f"{golden_prefix}{table}.csv"
+            produced = ROOT / "outputs" / f"{CHECK_PREFIX}{golden_prefix}{table}.csv"
+            problems = compare_csv(golden, produced, args.rtol)
+            status = "OK" if not problems else "MISMATCH"
+            print(f"[{status}] {name}: {golden.name}")
+            for problem in problems:
+                print(f"    {problem}")
+            failed |= bool(problems)
+            if not args.keep:
+                produced.unlink(missing_ok=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Offline check for the Yahoo download scheduler.
+
+Drives ``engine_core.yahoo_scheduler.DownloadScheduler`` against a local fake
+Yahoo provider (synthetic OHLCV, simulated latency, a requests-per-second
+and concurrency limit that raises throttling errors) and verifies that:
+
+* every symbol's frame matches a direct single-ticker download,
+* the real ``yahoo_download`` (yfinance with ``Ticker.history`` stubbed, so
+  still offline) loses no symbols when batches run concurrently, and a
+  throttled batch does not refetch tickers it already had,
+* throttling is absorbed by backoff without losing symbols,
+* an interrupted run resumes from its checkpoint without refetching,
+* with every ticker costing its own request (as in ``yahoo_download``), the
+  scheduler's concurrent batches beat the old serial loop on wall time.
+
+Exit code 0 = all checks pass, 1 = a check failed. No network or DB needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from engine_core.yahoo_scheduler import (  # noqa: E402
+    DownloadCheckpoint,
+    DownloadJob,
+    DownloadScheduler,
+    YahooThrottled,
+    split_batch,
+    yahoo_download,
+)
+
+
+class FakeYahooProvider:
+    """
+    Stand-in for ``yahoo_download``: ``group_by="ticker"`` shaped frames of
+    deterministic synthetic prices. Each call sleeps ``latency + per_ticker *
+    n``; more than ``max_concurrent`` calls in flight, or more than
+    ``max_rate`` tickers in the last second, raises YahooThrottled.
+    Tickers in ``unknown`` are left out of the result, like delisted symbols.
+    """
+
+    def __init__(self, n_days=250, latency=0.02, per_ticker=0.002,
+                 max_concurrent=None, max_rate=None, unknown=()):
+        self.dates = pd.bdate_range("2024-01-01", periods=n_days, name="Date")
+        self.latency, self.per_ticker = latency, per_ticker
+        self.max_concurrent, self.max_rate = max_concurrent, max_rate
+        self.unknown = set(unknown)
+        self.calls = 0
+        self.tickers_served = []
+        self._active = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def history(self, ticker):
+        rng = np.random.default_rng(abs(hash(ticker)) % (2 ** 32))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(self.dates))))
+        spread = rng.uniform(0.005, 0.03, len(self.dates))
+        return pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.005, len(self.dates))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(1e5, 1e7, len(self.dates)).astype(float),
+        }, index=self.dates)
+
+    def __call__(self, tickers, **window):
+        now = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            while self._recent and now - self._recent[0][0] > 1.0:
+                self._recent.popleft()
+            recent = sum(n for _, n in self._recent)
+            if self.max_concurrent is not None and self._active >= self.max_concurrent:
+                raise YahooThrottled("Too Many Requests (concurrency)")
+            if self.max_rate is not None and recent + len(tickers) > self.max_rate:
+                raise YahooThrottled("Too Many Requests (rate)")
+            self._recent.append((now, len(tickers)))
+            self._active += 1
+        try:
+            time.sleep(self.latency + self.per_ticker * len(tickers))
+            frames = {t: self.history(t) for t in tickers if t not in self.unknown}
+            with self._lock:
+                self.tickers_served.extend(tickers)
+            if not frames:
+                return pd.DataFrame()
+            if "start" in window:
+                frames = {t: f[f.index >= pd.Timestamp(window["start"])] for t, f in frames.items()}
+            return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def _jobs(n):
+    return [DownloadJob(f"SYM{i:04d}", f"SYM{i:04d}.NS", {"start": "2024-01-01"}) for i in range(n)]
+
+
+def check_correctness(n):
+    provider = FakeYahooProvider(unknown={f"SYM{i:04d}.NS" for i in range(0, n, 50)})
+    report = DownloadScheduler(provider, batch_size=20, rate=1e6, max_workers=6).run(_jobs(n))
+    bad = [
+        s for s, f in report.frames.items()
+        if not f.equals(split_batch(provider([f"{s}.NS"]), [f"{s}.NS"])[f"{s}.NS"])
+    ]
+    ok = not bad and len(report.frames) == n - len(provider.unknown) and len(report.missing) == len(provider.unknown)
+    print(f"[{'OK' if ok else 'FAIL'}] correctness: {len(report.frames)} frames, "
+          f"{len(report.missing)} missing, {len(bad)} mismatched")
+    return ok
+
+
+def check_yahoo_download(n):
+    """Real yahoo_download through yfinance, with only Ticker.history replaced."""
+    try:
+        import yfinance as yf
+        from yfinance.exceptions import YFPricesMissingError, YFRateLimitError
+    except ImportError:
+        print("[SKIP] yahoo_download: yfinance not installed")
+        return True
+
+    fake = FakeYahooProvider()
+    unknown = {f"SYM{i:04d}.NS" for i in range(0, n, 40)}
+    calls, served = [0], {}
+    lock = threading.Lock()
+
+    def history(self, start=None, end=None, period=None, **kwargs):
+        with lock:
+            calls[0] += 1
+            throttled = calls[0] % 97 == 0
+            if not throttled:
+                served[self.ticker] = served.get(self.ticker, 0) + 1
+        time.sleep(0.002)  # let concurrent batches overlap
+        if throttled:
+            raise YFRateLimitError()
+        if self.ticker in unknown:
+            raise YFPricesMissingError(self.ticker, "")
+        df = fake.history(self.ticker)
+        df.index = df.index.tz_localize("Asia/Kolkata")
+        return df
+
+    original = yf.Ticker.history
+    yf.Ticker.history = history
+    try:
+        report = DownloadScheduler(yahoo_download, batch_size=20, rate=1e6, max_workers=6, initial_workers=6,
+                                   backoff_base=0.01, backoff_max=0.05).run(_jobs(n))
+    finally:
+        yf.Ticker.history = original
+    bad = [s for s, f in report.frames.items() if not f.equals(fake.history(f"{s}.NS"))]
+    refetched = sum(c - 1 for c in served.values())
+    ok = (not bad and not report.failed and report.throttled > 0 and not refetched
+          and sorted(report.missing) == sorted(t[:-3] for t in unknown)
+          and len(report.frames) == n - len(unknown))
+    print(f"[{'OK' if ok else 'FAIL'}] yahoo_download: {len(report.frames)} frames, {len(report.missing)} missing "
+          f"(expected {len(unknown)}), {len(bad)} mismatched, {report.throttled} throttled, "
+          f"{refetched} refetched, peak {report.peak_workers} workers")
+    return ok
+
+
+def check_throttling(n):
+    provider = FakeYahooProvider(max_concurrent=3, max_rate=400)
+    report = DownloadScheduler(provider, batch_size=20, rate=1e6, max_workers=8, initial_workers=8,
+                               backoff_base=0.05, backoff_max=0.5, max_retries=10).run(_jobs(n))
+    ok = len(report.accepted) == n and not report.failed and report.throttled > 0
+    print(f"[{'OK' if ok else 'FAIL'}] throttling: {len(report.accepted)}/{n} ok after "
+          f"{report.throttled} throttled responses, {report.requests} requests")
+    return ok
+
+
+def check_resume(n):
+    provider = FakeYahooProvider()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint.json")
+        seen, calls = [], [0]
+
+        def insert(frames):
+            calls[0] += 1
+            if calls[0] == 4:
+                raise RuntimeError("simulated crash")
+            seen.extend(frames)
+
+        try:
+            DownloadScheduler(provider, batch_size=20, rate=1e6, max_workers=1,
+                              checkpoint=DownloadCheckpoint(path, "run")).run(_jobs(n), on_batch=insert)
+        except RuntimeError:
+            pass
+        first = len(seen)
+        served_before = len(provider.tickers_served)
+        report = DownloadScheduler(provider, batch_size=20, rate=1e6, max_workers=4,
+                                   checkpoint=DownloadCheckpoint(path, "run")).run(_jobs(n), on_batch=seen.extend)
+        refetched = len(provider.tickers_served) - served_before
+        fresh = DownloadCheckpoint(path, "other-run")
+    ok = (sorted(seen) == sorted(j.symbol for j in _jobs(n)) and len(report.skipped) == first
+          and refetched == n - first and not fresh.done)
+    print(f"[{'OK' if ok else 'FAIL'}] resume: {first} checkpointed before crash, "
+          f"{len(report.skipped)} skipped on resume, {refetched} fetched")
+    return ok
+
+
+def check_speed(n):
+    # yahoo_download issues one request per ticker, so a batch costs as much
+    # as the same tickers fetched one by one; only concurrency can win.
+    provider = FakeYahooProvider(latency=0.0, per_ticker=0.02)
+    start = time.monotonic()
+    for job in _jobs(n):
+        provider([job.ticker], **job.window)
+    serial = time.monotonic() - start
+    report = DownloadScheduler(provider, batch_size=25, rate=1e6, max_workers=8).run(_jobs(n))
+    ok = report.elapsed < serial and len(report.accepted) == n
+    print(f"[{'OK' if ok else 'FAIL'}] speed: {n} symbols serial {serial:.2f}s vs scheduled "
+          f"{report.elapsed:.2f}s ({report.requests} requests, peak {report.peak_workers} workers)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--verbose", action="store_true", help="show scheduler retry / progress logs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    results = [check(args.symbols) for check in (check_correctness, check_yahoo_download, check_throttling,
+                                          check_resume, check_speed)]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Load test for the hot API read paths.
+
+Drives concurrent keep-alive HTTP clients (stdlib asyncio, no extra deps)
+against /api/signals/today, /api/signals/screener, /api/portfolio/positions and
+/api/watchlist, and reports requests/sec plus latency percentiles per endpoint.
+
+Compare the sync and async handlers on a single uvicorn worker:
+
+    MRI_API_ASYNC_READS=0 uvicorn api.main:app --workers 1 --port 8000
+    python scripts/load_test_api.py --token "$JWT" --concurrency 64 --duration 30
+
+    MRI_API_ASYNC_READS=1 uvicorn api.main:app --workers 1 --port 8000
+    python scripts/load_test_api.py --token "$JWT" --concurrency 64 --duration 30
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_ENDPOINTS = [
+    "/api/signals/today",
+    "/api/signals/screener",
+    "/api/portfolio/positions",
+    "/api/watchlist",
+]
+
+
+class _Client:
+    """Minimal HTTP/1.1 keep-alive client for GET requests with a Content-Length body."""
+
+    def __init__(self, host, port, token):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.reader = None
+        self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        headers = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        status = int(status_line.split()[1])
+        length = 0
+        close = False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value.strip())
+            elif name == "connection" and value.strip().lower() == "close":
+                close = True
+        if length:
+            await self.reader.readexactly(length)
+        if close:
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+
+async def _worker(client, path, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            status = await client.get(path)
+        except Exception:
+            errors.append(path)
+            await client.close()
+            continue
+        if status >= 400:
+            errors.append(path)
+        else:
+            latencies.append(time.perf_counter() - started)
+    await client.close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_load_test(base_url, token, endpoints, concurrency, duration):
+    """Hit each endpoint with ``concurrency`` clients for ``duration`` seconds; return per-endpoint stats."""
+    parts = urlsplit(base_url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    results = {}
+    for path in endpoints:
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            _worker(_Client(host, port, token), path, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+        results[path] = {
+            "requests": len(latencies),
+            "errors": len(errors),
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p95_ms": _percentile(latencies, 95) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the MRI API hot read endpoints")
+    parser.add_argument("--base-url", default=os.getenv("MRI_API_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--token", default=os.getenv("MRI_LOAD_TEST_TOKEN", ""), help="JWT for the authenticated endpoints")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per endpoint")
+    parser.add_argument("--endpoint", action="append", dest="endpoints", help="Repeatable; defaults to the hot read paths")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(
+        args.base_url, args.token, args.endpoints or DEFAULT_ENDPOINTS, args.concurrency, args.duration
+    ))
+
+    print(f"{'endpoint':<28}{'req/s':>10}{'ok':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for path, r in results.items():
+        print(
+            f"{path:<28}{r['rps']:>10.1f}{r['requests']:>9}{r['errors']:>8}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
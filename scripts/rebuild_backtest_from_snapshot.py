@@ -1,22 +1,29 @@
 #!/usr/bin/env python3
 """Rebuild the MRI backtest from frozen CSV snapshots.
 
-This script is intentionally self-contained:
-- reads the frozen daily price snapshot
+Runs offline, without a DB connection:
+- reads the frozen daily price snapshot (engine_core.columnar_snapshot)
 - recomputes regime and score signals
-- runs both same-day and next-day execution variants
+- runs both same-day and next-day execution variants (engine_core.backtest_engine)
 - benchmarks each variant against the frozen NIFTY50 series
+
+    python scripts/rebuild_backtest_from_snapshot.py
 """
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
-
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from engine_core.backtest_engine import BacktestRules, FrameDataSource, run_backtest  # noqa: E402
+from engine_core.columnar_snapshot import load_frame  # noqa: E402
+
 DAILY_SNAPSHOT = ROOT / "backups" / "20260304" / "daily_prices.csv"
 INDEX_SNAPSHOT = Path("/home/edwar/index_prices.csv")
 START_DATE = pd.Timestamp("2007-09-17")
@@ -81,23 +88,11 @@ def load_snapshot():
         "avg_volume_20d",
         "rs_90d",
     ]
-    daily = pd.read_csv(
-        DAILY_SNAPSHOT,
-        usecols=usecols,
-        parse_dates=["date"],
+    # Columnar copy when exported (engine_core.columnar_snapshot), else the CSV.
+    daily, _, _ = load_frame(DAILY_SNAPSHOT, usecols, START_DATE, END_DATE)
+    index_df, _, _ = load_frame(
+        INDEX_SNAPSHOT, ["symbol", "date", "close"], START_DATE, END_DATE, symbols=["NIFTY50"]
     )
-    daily = daily[(daily["date"] >= START_DATE) & (daily["date"] <= END_DATE)].copy()
-    for col in ["open", "high", "low", "close", "volume", "ema_50", "ema_200", "ema_200_slope_20", "rolling_high_6m", "avg_volume_20d", "rs_90d"]:
-        daily[col] = pd.to_numeric(daily[col], errors="coerce")
-    daily["symbol"] = daily["symbol"].astype(str)
-
-    index_df = pd.read_csv(
-        INDEX_SNAPSHOT,
-        usecols=["symbol", "date", "close"],
-        parse_dates=["date"],
-    )
-    index_df = index_df[(index_df["symbol"] == "NIFTY50") & (index_df["date"] >= START_DATE) & (index_df["date"] <= END_DATE)].copy()
-    index_df["close"] = pd.to_numeric(index_df["close"], errors="coerce")
     return daily, index_df
 
 
@@ -138,158 +133,17 @@ def compute_scores(daily):
     ]
 
 
-def backtest(daily, regime_df, same_day_close: bool):
-    regime_by_date = dict(zip(regime_df["date"], regime_df["classification"]))
-    dates = sorted(regime_df["date"].tolist())
-
-    close_by_date = daily.groupby("date").apply(lambda x: dict(zip(x.symbol, x.close))).to_dict()
-    open_by_date = daily.groupby("date").apply(lambda x: dict(zip(x.symbol, x.open))).to_dict()
-    score_by_date = daily.groupby("date").apply(lambda x: dict(zip(x.symbol, x.total_score))).to_dict()
-
-    cash = INITIAL_CAPITAL
-    positions = {}
-    trade_log = []
-    equity_curve = []
-    pending_exits = []
-    pending_entries = []
-
-    for i, current_date in enumerate(dates):
-        regime = regime_by_date.get(current_date, "NEUTRAL")
-        today_close = close_by_date.get(current_date, {})
-        today_open = open_by_date.get(current_date, {})
-        today_scores = score_by_date.get(current_date, {})
-        if not today_close:
-            continue
-
-        if not same_day_close:
-            for sym, reason in pending_exits:
-                if sym in positions:
-                    exec_price = today_open.get(sym)
-                    if exec_price is None or exec_price <= 0:
-                        exec_price = today_close.get(sym)
-                    if exec_price is None:
-                        continue
-                    pos = positions.pop(sym)
-                    shares = pos["shares"]
-                    gross = shares * exec_price
-                    fee = gross * TX_COST
-                    cash += gross - fee
-                    trade_log.append(
-                        {
-                            "symbol": sym,
-                            "entry_date": pos["entry_date"],
-                            "exit_date": current_date,
-                            "entry_price": pos["entry_price"],
-                            "exit_price": exec_price,
-                            "shares": shares,
-                            "pnl": (gross - fee) - (shares * pos["entry_price"]),
-                            "exit_reason": reason,
-                            "execution": "NEXT_DAY_OPEN",
-                        }
-                    )
-            pending_exits = []
-            for sym in pending_entries:
-                if sym in positions or len(positions) >= TOP_POSITIONS:
-                    continue
-                buy_price = today_open.get(sym)
-                if buy_price is None or buy_price <= 0:
-                    buy_price = today_close.get(sym)
-                if buy_price is None or buy_price <= 0 or cash <= 0:
-                    continue
-                equity = cash + sum(pos["shares"] * today_close.get(s, pos["entry_price"]) for s, pos in positions.items())
-                alloc = equity * 0.10
-                invest = min(alloc, cash)
-                post_fee = invest / (1 + TX_COST)
-                shares = int(post_fee // buy_price)
-                cost = (shares * buy_price) * (1 + TX_COST)
-                if shares > 0 and cash >= cost:
-                    cash -= cost
-                    positions[sym] = {
-                        "shares": shares,
-                        "entry_price": buy_price,
-                        "highest_price": buy_price,
-                        "entry_date": current_date,
-                    }
-            pending_entries = []
-
-        for sym, pos in list(positions.items()):
-            current_price = today_close.get(sym)
-            if current_price is None:
-                continue
-            pos["highest_price"] = max(pos["highest_price"], current_price)
-            current_score = today_scores.get(sym, 0)
-            exit_reason = None
-            if regime == "BEAR":
-                exit_reason = "REGIME_BEAR"
-            elif current_score <= 2:
-                exit_reason = "SCORE_LOW"
-            elif current_price <= pos["highest_price"] * 0.8:
-                exit_reason = "TRAILING_STOP_20"
-            if exit_reason:
-                if same_day_close:
-                    exit_price = current_price
-                    gross = pos["shares"] * exit_price
-                    fee = gross * TX_COST
-                    cash += gross - fee
-                    positions.pop(sym)
-                    trade_log.append(
-                        {
-                            "symbol": sym,
-                            "entry_date": pos["entry_date"],
-                            "exit_date": current_date,
-                            "entry_price": pos["entry_price"],
-                            "exit_price": exit_price,
-                            "shares": pos["shares"],
-                            "pnl": (gross - fee) - (pos["shares"] * pos["entry_price"]),
-                            "exit_reason": exit_reason,
-                            "execution": "SAME_DAY_CLOSE",
-                        }
-                    )
-                else:
-                    pending_exits.append((sym, exit_reason))
+RULES = BacktestRules(initial_capital=INITIAL_CAPITAL, tx_cost=TX_COST, max_positions=TOP_POSITIONS)
 
-        if regime == "BULL" and (len(positions) - len(pending_exits)) < TOP_POSITIONS:
-            slots_available = TOP_POSITIONS - (len(positions) - len(pending_exits))
-            eligible = [
-                s
-                for s, score in today_scores.items()
-                if score >= 4 and s not in positions and s in today_close
-            ]
-            eligible.sort(key=lambda s: today_scores[s], reverse=True)
-            chosen = eligible[:slots_available]
-            if same_day_close:
-                for sym in chosen:
-                    if sym in positions or len(positions) >= TOP_POSITIONS:
-                        continue
-                    buy_price = today_close.get(sym)
-                    if buy_price is None or buy_price <= 0 or cash <= 0:
-                        continue
-                    equity = cash + sum(pos["shares"] * today_close.get(s, pos["entry_price"]) for s, pos in positions.items())
-                    alloc = equity * 0.10
-                    invest = min(alloc, cash)
-                    post_fee = invest / (1 + TX_COST)
-                    shares = int(post_fee // buy_price)
-                    cost = (shares * buy_price) * (1 + TX_COST)
-                    if shares > 0 and cash >= cost:
-                        cash -= cost
-                        positions[sym] = {
-                            "shares": shares,
-                            "entry_price": buy_price,
-                            "highest_price": buy_price,
-                            "entry_date": current_date,
-                        }
-            else:
-                pending_entries = chosen
 
-        equity = cash + sum(pos["shares"] * today_close.get(sym, pos["entry_price"]) for sym, pos in positions.items())
-        equity_curve.append({"date": current_date, "equity": equity, "cash": cash, "open_positions": len(positions)})
-
-        if not same_day_close:
-            # If entries/exits are pending, they are processed on the next day.
-            pass
-
-    eq_df = pd.DataFrame(equity_curve)
-    return eq_df, pd.DataFrame(trade_log)
+def backtest(daily, regime_df, same_day_close: bool):
+    market = FrameDataSource(daily, regime_df).load()
+    trade_log, equity_curve = run_backtest(
+        market,
+        execution="same_day_close" if same_day_close else "next_day_open",
+        rules=RULES,
+    )
+    return pd.DataFrame(equity_curve), pd.DataFrame(trade_log)
 
 
 def run():
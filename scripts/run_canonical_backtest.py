@@ -23,6 +23,10 @@ DATA SOURCES (READ-ONLY)
   If index_prices.csv is not in the backups folder, the script will also
   check /home/edwar/index_prices.csv as a fallback (original location).
 
+  Export a CSV once with `python -m engine_core.columnar_snapshot export <csv>`
+  and the script memory-maps the year-partitioned .npy copy next to it
+  (<name>.columnar/) instead of re-parsing the CSV.
+
 EXPECTED OUTPUT (frozen reference)
 -----------------------------------
   Same-day  : CAGR ~26.8%, Max DD ~-25.25%, Sharpe ~1.04
@@ -39,13 +43,15 @@ USAGE
 
 from __future__ import annotations
 
-import hashlib
 from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+from engine_core.backtest_engine import BacktestRules, FrameDataSource, run_backtest
+from engine_core.columnar_snapshot import columnar_path, load_frame
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -128,18 +134,10 @@ def calculate_metrics(dates, values, name: str) -> dict:
 # ---------------------------------------------------------------------------
 # Data loading
 # ---------------------------------------------------------------------------
-def _fingerprint(path: Path) -> str:
-    h = hashlib.md5()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            h.update(chunk)
-    return h.hexdigest()[:12]
-
-
 def load_snapshot():
-    if not DAILY_SNAPSHOT.exists():
+    if not DAILY_SNAPSHOT.exists() and not columnar_path(DAILY_SNAPSHOT).exists():
         raise FileNotFoundError(f"Daily snapshot not found: {DAILY_SNAPSHOT}")
-    if not INDEX_SNAPSHOT.exists():
+    if not INDEX_SNAPSHOT.exists() and not columnar_path(INDEX_SNAPSHOT).exists():
         raise FileNotFoundError(
             f"Index snapshot not found.\n"
             f"Tried:\n  {_INDEX_IN_BACKUPS}\n  {_INDEX_ORIGINAL}\n"
@@ -147,28 +145,19 @@ def load_snapshot():
             f"{_INDEX_IN_BACKUPS}"
         )
 
-    print(f"[load] daily  : {DAILY_SNAPSHOT}")
-    print(f"[load] index  : {INDEX_SNAPSHOT}")
-
     usecols = [
         "symbol", "date", "open", "high", "low", "close", "volume",
         "ema_50", "ema_200", "ema_200_slope_20",
         "rolling_high_6m", "avg_volume_20d", "rs_90d",
     ]
-    daily = pd.read_csv(DAILY_SNAPSHOT, usecols=usecols, parse_dates=["date"])
-    daily = daily[(daily["date"] >= START_DATE) & (daily["date"] <= END_DATE)].copy()
-    for col in usecols[2:]:
-        daily[col] = pd.to_numeric(daily[col], errors="coerce")
-    daily["symbol"] = daily["symbol"].astype(str)
-
-    index_df = pd.read_csv(INDEX_SNAPSHOT, usecols=["symbol", "date", "close"],
-                           parse_dates=["date"])
-    index_df = index_df[
-        (index_df["symbol"] == "NIFTY50") &
-        (index_df["date"] >= START_DATE) &
-        (index_df["date"] <= END_DATE)
-    ].copy()
-    index_df["close"] = pd.to_numeric(index_df["close"], errors="coerce")
+    # Uses the columnar copy (python -m engine_core.columnar_snapshot export <csv>)
+    # when it is current; otherwise parses the CSV as before.
+    daily, daily_fp, daily_src = load_frame(DAILY_SNAPSHOT, usecols, START_DATE, END_DATE)
+    index_df, index_fp, index_src = load_frame(
+        INDEX_SNAPSHOT, ["symbol", "date", "close"], START_DATE, END_DATE, symbols=["NIFTY50"]
+    )
+    print(f"[load] daily  : {daily_src}")
+    print(f"[load] index  : {index_src}")
 
     stats = {
         "daily_rows": len(daily),
@@ -178,8 +167,8 @@ def load_snapshot():
         "index_rows": len(index_df),
         "index_date_min": str(index_df["date"].min().date()),
         "index_date_max": str(index_df["date"].max().date()),
-        "daily_md5": _fingerprint(DAILY_SNAPSHOT),
-        "index_md5": _fingerprint(INDEX_SNAPSHOT),
+        "daily_fingerprint": daily_fp,
+        "index_fingerprint": index_fp,
     }
     print(f"[load] {stats['daily_rows']:,} daily rows / {stats['daily_symbols']} symbols / "
           f"{stats['daily_date_min']} → {stats['daily_date_max']}")
@@ -226,172 +215,25 @@ def compute_scores(daily: pd.DataFrame) -> pd.DataFrame:
 # ---------------------------------------------------------------------------
 # Portfolio backtest engine
 # ---------------------------------------------------------------------------
-def backtest(daily: pd.DataFrame, regime_df: pd.DataFrame,
-             same_day_close: bool) -> tuple[pd.DataFrame, pd.DataFrame]:
-    regime_by_date = dict(zip(regime_df["date"], regime_df["classification"]))
-    dates = sorted(regime_df["date"].tolist())
-    close_by_date = {
-        d: dict(zip(g["symbol"], g["close"]))
-        for d, g in daily.groupby("date")
-    }
-    open_by_date = {
-        d: dict(zip(g["symbol"], g["open"]))
-        for d, g in daily.groupby("date")
-    }
-    score_by_date = {
-        d: dict(zip(g["symbol"], g["total_score"]))
-        for d, g in daily.groupby("date")
-    }
+RULES = BacktestRules(
+    initial_capital=INITIAL_CAPITAL,
+    tx_cost=TX_COST,
+    entry_score=ENTRY_SCORE_MIN,
+    exit_score=EXIT_SCORE_MAX,
+    trailing_stop=TRAILING_STOP,
+    max_positions=TOP_POSITIONS,
+    stop_label="TRAILING_STOP_20PCT",
+)
 
-    cash = INITIAL_CAPITAL
-    positions: dict = {}
-    trade_log = []
-    equity_curve = []
-    pending_exits = []
-    pending_entries = []
-
-    for current_date in dates:
-        regime = regime_by_date.get(current_date, "NEUTRAL")
-        today_close  = close_by_date.get(current_date, {})
-        today_open   = open_by_date.get(current_date, {})
-        today_scores = score_by_date.get(current_date, {})
-        if not today_close:
-            continue
-
-        # --- Next-day execution: flush pending exits and entries first ---
-        if not same_day_close:
-            for sym, reason in pending_exits:
-                if sym not in positions:
-                    continue
-                exec_price = today_open.get(sym) or today_close.get(sym)
-                if not exec_price:
-                    continue
-                pos = positions.pop(sym)
-                gross = pos["shares"] * exec_price
-                fee   = gross * TX_COST
-                cash += gross - fee
-                trade_log.append({
-                    "symbol": sym,
-                    "entry_date": pos["entry_date"],
-                    "exit_date": current_date,
-                    "entry_price": pos["entry_price"],
-                    "exit_price": exec_price,
-                    "shares": pos["shares"],
-                    "pnl": (gross - fee) - (pos["shares"] * pos["entry_price"]),
-                    "exit_reason": reason,
-                    "execution": "NEXT_DAY_OPEN",
-                })
-            pending_exits = []
-
-            for sym in pending_entries:
-                if sym in positions or len(positions) >= TOP_POSITIONS:
-                    continue
-                buy_price = today_open.get(sym) or today_close.get(sym)
-                if not buy_price or buy_price <= 0 or cash <= 0:
-                    continue
-                equity = cash + sum(
-                    p["shares"] * today_close.get(s, p["entry_price"])
-                    for s, p in positions.items()
-                )
-                invest = min(equity * 0.10, cash)
-                post_fee = invest / (1 + TX_COST)
-                shares = int(post_fee // buy_price)
-                cost = shares * buy_price * (1 + TX_COST)
-                if shares > 0 and cash >= cost:
-                    cash -= cost
-                    positions[sym] = {
-                        "shares": shares,
-                        "entry_price": buy_price,
-                        "highest_price": buy_price,
-                        "entry_date": current_date,
-                    }
-            pending_entries = []
-
-        # --- Mark positions and check exits ---
-        for sym, pos in list(positions.items()):
-            current_price = today_close.get(sym)
-            if current_price is None:
-                continue
-            pos["highest_price"] = max(pos["highest_price"], current_price)
-            score = today_scores.get(sym, 0)
-            exit_reason = None
-            if regime == "BEAR":
-                exit_reason = "REGIME_BEAR"
-            elif score <= EXIT_SCORE_MAX:
-                exit_reason = "SCORE_LOW"
-            elif current_price <= pos["highest_price"] * (1 - TRAILING_STOP):
-                exit_reason = "TRAILING_STOP_20PCT"
-
-            if exit_reason:
-                if same_day_close:
-                    gross = pos["shares"] * current_price
-                    fee   = gross * TX_COST
-                    cash += gross - fee
-                    positions.pop(sym)
-                    trade_log.append({
-                        "symbol": sym,
-                        "entry_date": pos["entry_date"],
-                        "exit_date": current_date,
-                        "entry_price": pos["entry_price"],
-                        "exit_price": current_price,
-                        "shares": pos["shares"],
-                        "pnl": (gross - fee) - (pos["shares"] * pos["entry_price"]),
-                        "exit_reason": exit_reason,
-                        "execution": "SAME_DAY_CLOSE",
-                    })
-                else:
-                    pending_exits.append((sym, exit_reason))
-
-        # --- Look for new entries in BULL regime ---
-        if regime == "BULL":
-            active_count = len(positions) - len(pending_exits)
-            slots = TOP_POSITIONS - active_count
-            if slots > 0:
-                eligible = sorted(
-                    [s for s, sc in today_scores.items()
-                     if sc >= ENTRY_SCORE_MIN and s not in positions and s in today_close],
-                    key=lambda s: today_scores[s],
-                    reverse=True,
-                )[:slots]
-
-                if same_day_close:
-                    for sym in eligible:
-                        if sym in positions or len(positions) >= TOP_POSITIONS:
-                            continue
-                        buy_price = today_close.get(sym)
-                        if not buy_price or buy_price <= 0 or cash <= 0:
-                            continue
-                        equity = cash + sum(
-                            p["shares"] * today_close.get(s, p["entry_price"])
-                            for s, p in positions.items()
-                        )
-                        invest = min(equity * 0.10, cash)
-                        post_fee = invest / (1 + TX_COST)
-                        shares = int(post_fee // buy_price)
-                        cost = shares * buy_price * (1 + TX_COST)
-                        if shares > 0 and cash >= cost:
-                            cash -= cost
-                            positions[sym] = {
-                                "shares": shares,
-                                "entry_price": buy_price,
-                                "highest_price": buy_price,
-                                "entry_date": current_date,
-                            }
-                else:
-                    pending_entries = eligible
-
-        # --- Record equity ---
-        equity = cash + sum(
-            p["shares"] * today_close.get(s, p["entry_price"])
-            for s, p in positions.items()
-        )
-        equity_curve.append({
-            "date": current_date,
-            "equity": equity,
-            "cash": cash,
-            "open_positions": len(positions),
-        })
 
+def backtest(daily: pd.DataFrame, regime_df: pd.DataFrame,
+             same_day_close: bool) -> tuple[pd.DataFrame, pd.DataFrame]:
+    market = FrameDataSource(daily, regime_df).load()
+    trade_log, equity_curve = run_backtest(
+        market,
+        execution="same_day_close" if same_day_close else "next_day_open",
+        rules=RULES,
+    )
     return pd.DataFrame(equity_curve), pd.DataFrame(trade_log)
 
 
@@ -9,17 +9,33 @@ Implements the full STEE PRD logic:
 - EMA-10 Trailing Stop (Remaining 50%)
 - 5d-Low Hard Stop
 - Market Regime sizing (Full vs 50%)
+- Optional live-engine filters (gap-up %, candle range vs ATR), off by default
+
+The simulation itself lives in engine_core.stee_backtest.
+
+    python scripts/run_stee_backtest.py
+    python scripts/run_stee_backtest.py --sweep-gap none 3 4 6 --sweep-atr none 1.5 2 3
 """
 from __future__ import annotations
+import argparse
+import itertools
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from engine_core.columnar_snapshot import load_frame  # noqa: E402
+from engine_core.stee_backtest import (  # noqa: E402
+    MAX_ATR_MULT, MAX_GAP_UP_PCT, SteeRules, build_stee_arrays, compute_indicators, index_regime, run_stee,
+)
+
 # ---------------------------------------------------------------------------
 # Paths & Settings
 # ---------------------------------------------------------------------------
-ROOT = Path(__file__).resolve().parents[1]
 DAILY_SNAPSHOT = ROOT / "backups" / "20260304" / "daily_prices.csv"
 INDEX_SNAPSHOT = ROOT / "backups" / "20260304" / "index_prices.csv"
 if not INDEX_SNAPSHOT.exists():
@@ -32,7 +48,7 @@ INITIAL_CAPITAL = 100_000.0
 TX_COST = 0.002 # 0.2% per leg
 
 def calculate_metrics(dates, values, name: str) -> dict:
-    series = pd.Series(values, index=pd.to_datetime(dates)).sort_index()
+    series = pd.Series(np.asarray(values, dtype=float), index=pd.to_datetime(dates)).sort_index()
     returns = series.pct_change().dropna()
     years = (series.index[-1] - series.index[0]).days / 365.25
     cagr = ((series.iloc[-1] / series.iloc[0]) ** (1 / years) - 1) if years > 0 else 0
@@ -51,137 +67,10 @@ def calculate_metrics(dates, values, name: str) -> dict:
         "Avg R": 0,        # To be filled after trade analysis
     }
 
-def run_stee_backtest():
-    print("🚀 Starting STEE 10-Year Backtest...")
-    
-    # 1. Load Data
-    cols = ["symbol", "date", "open", "high", "low", "close", "volume"]
-    df = pd.read_csv(DAILY_SNAPSHOT, usecols=cols, parse_dates=["date"])
-    df = df[(df["date"] >= START_DATE - pd.Timedelta(days=300)) & (df["date"] <= END_DATE)].copy()
-    df = df.sort_values(["symbol", "date"])
-
-    idx = pd.read_csv(INDEX_SNAPSHOT, parse_dates=["date"])
-    idx = idx[idx["symbol"] == "NIFTY50"].sort_values("date")
-    
-    # 2. Compute STEE Indicators
-    print("  Computing indicators...")
-    df["ema_10"] = df.groupby("symbol")["close"].transform(lambda x: x.ewm(span=10, adjust=False).mean())
-    df["ema_50"] = df.groupby("symbol")["close"].transform(lambda x: x.ewm(span=50, adjust=False).mean())
-    df["ema_200"] = df.groupby("symbol")["close"].transform(lambda x: x.ewm(span=200, adjust=False).mean())
-    df["high_10d"] = df.groupby("symbol")["high"].transform(lambda x: x.rolling(10).max().shift(1))
-    df["low_5d"] = df.groupby("symbol")["low"].transform(lambda x: x.rolling(5).min().shift(1))
-    df["avg_vol_20"] = df.groupby("symbol")["volume"].transform(lambda x: x.rolling(20).mean())
-    df["atr_14"] = df.groupby("symbol").apply(lambda x: (
-        pd.concat([x["high"] - x["low"], (x["high"] - x["close"].shift(1)).abs(), (x["low"] - x["close"].shift(1)).abs()], axis=1).max(axis=1).rolling(14).mean()
-    )).reset_index(level=0, drop=True)
-    
-    # Index Regime
-    idx["ema_50"] = idx["close"].ewm(span=50, adjust=False).mean()
-    idx["ema_200"] = idx["close"].ewm(span=200, adjust=False).mean()
-    idx["regime"] = "NEUTRAL"
-    idx.loc[(idx["close"] > idx["ema_200"]) & (idx["ema_50"] > idx["ema_200"]), "regime"] = "BULLISH"
-    idx.loc[(idx["close"] < idx["ema_200"]) & (idx["ema_50"] < idx["ema_200"]), "regime"] = "BEARISH"
-    idx.loc[(idx["regime"] == "NEUTRAL") & (abs(idx["close"] - idx["ema_200"]) / idx["ema_200"] <= 0.02), "regime"] = "SIDEWAYS"
-    
-    regime_map = dict(zip(idx["date"], idx["regime"]))
-    dates = sorted(df["date"].unique())
-    
-    # 3. Backtest Loop
-    cash = INITIAL_CAPITAL
-    equity_curve = []
-    active_trades = [] # List of dicts
-    trade_log = []
-    
-    # Group data by date for speed
-    data_by_date = {d: g.set_index("symbol") for d, g in df.groupby("date")}
-    
-    print("  Running simulation...")
-    for today in dates:
-        if today < START_DATE: continue
-        
-        regime = regime_map.get(today, "NEUTRAL")
-        today_data = data_by_date.get(today)
-        if today_data is None: continue
-        
-        # A. Manage Exits for active trades
-        remaining_trades = []
-        for t in active_trades:
-            sym = t["symbol"]
-            if sym not in today_data.index:
-                remaining_trades.append(t)
-                continue
-            
-            row = today_data.loc[sym]
-            price = float(row["close"])
-            ema10 = float(row["ema_10"])
-            
-            # 1. Hard Stop (5d Low or Breakout Low)
-            if price <= t["stop_loss"]:
-                exit_val = t["shares"] * price * (1 - TX_COST)
-                cash += exit_val
-                trade_log.append({**t, "exit_date": today, "exit_price": price, "reason": "STOP_LOSS", "final_val": exit_val})
-                continue
-            
-            # 2. Partial Profit (2R)
-            if t["status"] == "OPEN" and price >= t["target_2r"]:
-                sell_shares = t["shares"] // 2
-                exit_val = sell_shares * price * (1 - TX_COST)
-                cash += exit_val
-                t["shares"] -= sell_shares
-                t["status"] = "PARTIAL"
-                t["partial_exit_price"] = price
-                # Don't log full trade yet
-            
-            # 3. Trailing Stop (Close < EMA 10)
-            if price < ema10:
-                exit_val = t["shares"] * price * (1 - TX_COST)
-                cash += exit_val
-                trade_log.append({**t, "exit_date": today, "exit_price": price, "reason": "EMA10_TRAILING", "final_val": exit_val})
-                continue
-                
-            remaining_trades.append(t)
-        active_trades = remaining_trades
-        
-        # B. Manage Entries
-        if regime != "BEARISH":
-            size_mod = 0.5 if regime == "SIDEWAYS" else 1.0
-            eligible = today_data[
-                (today_data["close"] > today_data["high_10d"]) & # Breakout
-                (today_data["volume"] > 1.5 * today_data["avg_vol_20"]) & # Volume
-                ((today_data["close"] - today_data["low"]) / (today_data["high"] - today_data["low"]) >= 0.7) & # Strength
-                (today_data["close"] > today_data["ema_200"]) # Trend filter
-            ]
-            
-            for sym, row in eligible.iterrows():
-                if any(t["symbol"] == sym for t in active_trades): continue
-                
-                price = float(row["close"])
-                sl = float(row["low_5d"])
-                risk_per_share = price - sl
-                if risk_per_share <= 0: continue
-                
-                # Risk 1% of CURRENT equity
-                current_equity = cash + sum(t["shares"] * today_data.loc[t["symbol"]]["close"] for t in active_trades if t["symbol"] in today_data.index)
-                risk_amt = current_equity * 0.01 * size_mod
-                shares = int(risk_amt / risk_per_share)
-                cost = shares * price * (1 + TX_COST)
-                
-                if shares > 0 and cash >= cost:
-                    cash -= cost
-                    active_trades.append({
-                        "symbol": sym, "entry_date": today, "entry_price": price,
-                        "stop_loss": sl, "target_2r": price + (2 * risk_per_share),
-                        "shares": shares, "initial_risk": risk_amt, "status": "OPEN", "cost": cost
-                    })
-
-        # C. Equity Tracking
-        current_val = cash + sum(t["shares"] * today_data.loc[t["symbol"]]["close"] for t in active_trades if t["symbol"] in today_data.index)
-        equity_curve.append({"date": today, "equity": current_val})
-
-    # 4. Results Generation
+def summarize(equity_curve, trade_log, name: str) -> dict:
     eq_df = pd.DataFrame(equity_curve)
-    metrics = calculate_metrics(eq_df["date"], eq_df["equity"], "STEE Momentum Swing")
-    
+    metrics = calculate_metrics(eq_df["date"], eq_df["equity"], name)
+
     # Win Rate & R analysis
     if trade_log:
         wins = [t for t in trade_log if (t["exit_price"] > t["entry_price"])]
@@ -189,6 +78,26 @@ def run_stee_backtest():
         # Simplified R Calculation: (Profit) / (Initial Risk)
         rs = [(t["final_val"] - t["cost"]) / t["initial_risk"] for t in trade_log]
         metrics["Avg R"] = round(np.mean(rs), 2)
+    return metrics
+
+def load_market():
+    cols = ["symbol", "date", "open", "high", "low", "close", "volume"]
+    df, _, _ = load_frame(DAILY_SNAPSHOT, cols, START_DATE - pd.Timedelta(days=300), END_DATE)
+    idx, _, _ = load_frame(INDEX_SNAPSHOT, ["symbol", "date", "close"], symbols=["NIFTY50"])
+
+    print("  Computing indicators...")
+    df = compute_indicators(df)
+    return build_stee_arrays(df, index_regime(idx), START_DATE, END_DATE)
+
+def run_stee_backtest(rules: SteeRules | None = None):
+    print("🚀 Starting STEE 10-Year Backtest...")
+    rules = rules or SteeRules(initial_capital=INITIAL_CAPITAL, tx_cost=TX_COST)
+    m = load_market()
+
+    print("  Running simulation...")
+    trade_log, equity_curve = run_stee(m, rules)
+    eq_df = pd.DataFrame(equity_curve)
+    metrics = summarize(equity_curve, trade_log, "STEE Momentum Swing")
 
     # Write Report
     report_path = OUTPUT_DIR / "stee_backtest_report.md"
@@ -205,5 +114,36 @@ def run_stee_backtest():
     print(f"✅ Backtest Complete. Report saved to {report_path}")
     print(metrics)
 
+def run_stee_sweep(gap_values, atr_values):
+    """Grid over the live engine's gap-up / ATR-extension filters (None = filter off)."""
+    print("🚀 Starting STEE filter sweep...")
+    m = load_market()
+    rows = []
+    for gap, atr in itertools.product(gap_values, atr_values):
+        rules = SteeRules(initial_capital=INITIAL_CAPITAL, tx_cost=TX_COST, max_gap_up_pct=gap, max_atr_mult=atr)
+        trade_log, equity_curve = run_stee(m, rules)
+        metrics = summarize(equity_curve, trade_log, f"gap={gap} atr={atr}")
+        rows.append({"max_gap_up_pct": gap, "max_atr_mult": atr, "trades": len(trade_log),
+                     "final_equity": round(equity_curve[-1]["equity"], 2), **metrics})
+        print(f"  {metrics['Portfolio']}: {len(trade_log)} trades, CAGR {metrics['CAGR (%)']}%")
+
+    out_path = OUTPUT_DIR / "stee_sweep_results.csv"
+    pd.DataFrame(rows).to_csv(out_path, index=False)
+    print(f"✅ Sweep Complete. {len(rows)} scenarios saved to {out_path}")
+
+def _optional_floats(values):
+    return [None if v.lower() == "none" else float(v) for v in values]
+
 if __name__ == "__main__":
-    run_stee_backtest()
+    parser = argparse.ArgumentParser(description="STEE swing backtest on the frozen snapshot")
+    parser.add_argument("--max-gap-up-pct", type=float, default=None, help="Skip breakouts gapping up more than this %% (default: off)")
+    parser.add_argument("--max-atr-mult", type=float, default=None, help="Skip candles wider than this x ATR-14 (default: off)")
+    parser.add_argument("--sweep-gap", nargs="+", default=None, help=f"Gap-up limits to sweep, 'none' = off (live: {MAX_GAP_UP_PCT})")
+    parser.add_argument("--sweep-atr", nargs="+", default=None, help=f"ATR multiples to sweep, 'none' = off (live: {MAX_ATR_MULT})")
+    args = parser.parse_args()
+
+    if args.sweep_gap or args.sweep_atr:
+        run_stee_sweep(_optional_floats(args.sweep_gap or ["none"]), _optional_floats(args.sweep_atr or ["none"]))
+    else:
+        run_stee_backtest(SteeRules(initial_capital=INITIAL_CAPITAL, tx_cost=TX_COST,
+                                    max_gap_up_pct=args.max_gap_up_pct, max_atr_mult=args.max_atr_mult))